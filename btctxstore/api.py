@@ -7,24 +7,52 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 
+import six
 import binascii
 from btctxstore import serialize
 from btctxstore import deserialize
 from btctxstore import control
-from btctxstore import exceptions
 from btctxstore import common
 from btctxstore import services
+from btctxstore import backends
+from btctxstore import cache
+from btctxstore import signer
+from btctxstore import blobio
+from btctxstore import builder
+from btctxstore import coinselect
+from btctxstore import compression
+from btctxstore import scanner
+from btctxstore import index as payloadindex
 from btctxstore import validate
 
 
 class BtcTxStore():  # TODO use apigen when ported to python 3
     """Bitcoin nulldata output io library."""
 
-    def __init__(self, testnet=False, dryrun=False, service="automatic"):
+    def __init__(self, testnet=False, dryrun=False, service="automatic",
+                 crypto_backend="automatic", verify_cache_size=0,
+                 max_message_size=compression.MAX_DECOMPRESSED_SIZE,
+                 index=None, utxo_cache_size=0):
         self.testnet = deserialize.flag(testnet)
         self.dryrun = deserialize.flag(dryrun)
         self.service = services.select(service, testnet=testnet,
                                        dryrun=dryrun)
+        self.crypto_backend = backends.select(crypto_backend)
+        verify_cache_size = deserialize.positive_integer(verify_cache_size)
+        self.verify_cache = None
+        if verify_cache_size:
+            self.verify_cache = cache.LRUCache(verify_cache_size)
+        # coin selection indexes per address set, kept across sends
+        utxo_cache_size = deserialize.positive_integer(utxo_cache_size)
+        self.utxo_cache = None
+        if utxo_cache_size:
+            self.utxo_cache = cache.LRUCache(utxo_cache_size)
+        self.max_message_size = deserialize.positive_integer(max_message_size)
+        if isinstance(index, six.string_types):  # database path
+            index = payloadindex.PayloadIndex(index, testnet=self.testnet)
+        elif index is not None:  # refuses an index of the other network
+            index.use_network(self.testnet)
+        self.index = index  # retrieved payloads are served from/added to
 
     ###########
     # wallets #
@@ -57,9 +85,7 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
         @param: master_secret Create from master secret, otherwise random.
         """
         master_secret = deserialize.bytes_str(master_secret)
-        bip32node = control.create_wallet(self.testnet,
-                                          master_secret=master_secret)
-        return bip32node.wif()
+        return control.create_key(self.testnet, master_secret=master_secret)
 
     def validate_key(self, wif):  # TODO test
         return validate.key_network(wif, self.testnet)
@@ -70,7 +96,8 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
 
     def get_address(self, wif):
         """Return bitcoin address for given wallet. """
-        return deserialize.key(self.testnet, wif).address()
+        return deserialize.key(self.testnet, wif,
+                               backend=self.crypto_backend).address()
 
     def validate_address(self, address):  # TODO test
         return validate.address_network(address, self.testnet)
@@ -84,50 +111,81 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
         <txins>: '[{"txid" : hexdata, "index" : integer}, ...]'
         <txouts>: '[{"address" : hexdata, "value" : satoshis}, ...]'
         """
+        return serialize.tx(self._create_builder(txins, txouts, lock_time).tx)
+
+    def _create_builder(self, txins=None, txouts=None, lock_time=0):
         txins = [] if txins is None else txins
         txouts = [] if txouts is None else txouts
         lock_time = deserialize.positive_integer(lock_time)
         txins = deserialize.txins(txins)
         txouts = deserialize.txouts(self.testnet, txouts)
-        tx = control.create_tx(self.service, self.testnet, txins, txouts,
-                               lock_time=lock_time)
-        return serialize.tx(tx)
+        return builder.TxBuilder.create(self.service, self.testnet, txins,
+                                        txouts, lock_time=lock_time)
+
+    def _load_builder(self, rawtx):
+        return builder.TxBuilder(self.service, self.testnet,
+                                 tx=deserialize.tx(rawtx))
+
+    def _add_inputs(self, txbuilder, wifs, change_address=None, fee=10000,
+                    sign=True, strategy=coinselect.LARGEST_FIRST):
+        keys = deserialize.keys(self.testnet, wifs,
+                                backend=self.crypto_backend)
+        fee = deserialize.positive_integer(fee)
+        strategy = deserialize.unicode_str(strategy)
+        if change_address is not None:
+            change_address = deserialize.address(self.testnet, change_address)
+        return txbuilder.add_inputs(keys, change_address=change_address,
+                                    fee=fee, sign=sign, strategy=strategy,
+                                    utxo_cache=self.utxo_cache)
+
+    def _publish(self, txbuilder):
+        txid = txbuilder.publish(dryrun=self.dryrun,
+                                 utxo_cache=self.utxo_cache)
+        return serialize.txid(txid)
 
     def send(self, wifs, txouts, change_address=None, lock_time=0, fee=10000):
         """TODO add doc string"""
         # FIXME test!!
-        rawtx = self.create_tx(txouts=txouts, lock_time=lock_time)
-        rawtx = self.add_inputs(rawtx, wifs, change_address=change_address,
-                                fee=fee)
-        return self.publish(rawtx)
+        txbuilder = self._create_builder(txouts=txouts, lock_time=lock_time)
+        self._add_inputs(txbuilder, wifs, change_address=change_address,
+                         fee=fee)
+        return self._publish(txbuilder)
 
     def add_inputs(self, rawtx, wifs, change_address=None, fee=10000,
-                   dont_sign=False):
+                   dont_sign=False, strategy=coinselect.LARGEST_FIRST):
         """Add sufficient inputs from given <wifs> to cover <rawtx> outputs
         and <fee>. If no <change_address> is given, change will be sent to
-        first wif.
+        first wif. Inputs are selected with the coin selection <strategy>:
+        largest_first, branch_and_bound, knapsack or fee_aware.
         """
-        tx = deserialize.tx(rawtx)
-        keys = deserialize.keys(self.testnet, wifs)
-        fee = deserialize.positive_integer(fee)
-        if change_address is not None:
-            change_address = deserialize.address(self.testnet, change_address)
-        tx = control.add_inputs(self.service, self.testnet, tx, keys,
-                                change_address=change_address, fee=fee)
-
-        if not dont_sign:
-            tx = control.sign_tx(self.service, self.testnet, tx, keys)
-
-        return serialize.tx(tx)
-
-    def sign_tx(self, rawtx, wifs):
-        """Sign <rawtx> with  given <wifs> as json data.
+        txbuilder = self._load_builder(rawtx)
+        self._add_inputs(txbuilder, wifs, change_address=change_address,
+                         fee=fee, sign=not dont_sign, strategy=strategy)
+        return serialize.tx(txbuilder.tx)
+
+    def clear_utxo_cache(self):
+        """Drop the kept utxos, so the next send retrieves them again
+        (for example to see received funds). Only used if enabled
+        (utxo_cache_size > 0).
+        """
+        if self.utxo_cache is not None:
+            self.utxo_cache.clear()
+
+    def sign_tx(self, rawtx, wifs, prevouts=None, processes=1):
+        """Sign <rawtx> with  given <wifs> as json data. Previous output
+        scripts given in <prevouts> are not fetched from the service.
+        Inputs are signed by a pool of <processes> worker processes,
+        None for one per cpu.
         <wifs>: '["privatekey_in_wif_format", ...]'
+        <prevouts>: '[{"txid" : hexdata, "index" : integer,
+                       "script" : hexdata}, ...]'
         """
-        tx = deserialize.tx(rawtx)
-        keys = deserialize.keys(self.testnet, wifs)
-        tx = control.sign_tx(self.service, self.testnet, tx, keys)
-        return serialize.tx(tx)
+        txbuilder = self._load_builder(rawtx)
+        keys = deserialize.keys(self.testnet, wifs,
+                                backend=self.crypto_backend)
+        prevouts = deserialize.prevouts(prevouts or [])
+        txbuilder.sign(keys, prevouts=prevouts, processes=processes)
+        return serialize.tx(txbuilder.tx)
 
     #################
     # blockchain io #
@@ -139,18 +197,40 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
         tx = self.service.get_tx(txid)
         return serialize.tx(tx)
 
+    def _retrieve_indexed(self, txid, kind):
+        """Returns (entry, tx) with the index entry of <kind> for <txid>,
+        if not indexed the tx is retrieved and its payloads added to the
+        index first. The entry is None if no index is used or the tx has
+        no such payload, the tx is None unless it was retrieved.
+        """
+        if self.index is None:
+            return None, None
+        txid = serialize.txid(deserialize.txid(txid))  # normalize
+        entry = self.index.get(txid, kind)
+        if entry is not None:
+            return entry, None
+        tx = self.service.get_tx(deserialize.txid(txid))
+        self.index.add_tx(self.testnet, tx,
+                          max_message_size=self.max_message_size)
+        return self.index.get(txid, kind), tx
+
+    def _retrieve_rawtx(self, txid, tx=None):
+        """Returns <tx> if already retrieved else retrieves <txid>."""
+        if tx is not None:
+            return serialize.tx(tx)
+        return self.retrieve_tx(txid)
+
     def retrieve_utxos(self, addresses):
         """Get current utxos for <address>."""
         addresses = deserialize.addresses(self.testnet, addresses)
-        spendables = control.retrieve_utxos(self.service, addresses)
-        return serialize.utxos(spendables)
+        utxos = control.retrieve_utxoset(self.service, addresses)
+        return list(utxos.dicts())
 
     def publish(self, rawtx):
         """Publish signed <rawtx> to bitcoin network."""
         tx = deserialize.signedtx(rawtx)
-        if not self.dryrun:
-            self.service.send_tx(tx)
-        return serialize.txid(tx.hash())
+        return self._publish(builder.TxBuilder(self.service, self.testnet,
+                                               tx=tx))
 
     ###########
     # signing #
@@ -159,20 +239,70 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
     def sign_data(self, wif, hexdata):
         """Signing <hexdata> with <wif> private key."""
         data = deserialize.binary(hexdata)
-        key = deserialize.key(self.testnet, wif)
-        sigdata = control.sign_data(self.testnet, data, key)
+        key = deserialize.key(self.testnet, wif,
+                              backend=self.crypto_backend)
+        sigdata = control.sign_data(self.testnet, data, key,
+                                    backend=self.crypto_backend)
         return serialize.signature(sigdata)
 
+    def get_crypto_backend(self):
+        """Returns name of the active crypto backend."""
+        return self.crypto_backend.name
+
     def verify_signature(self, address, signature, hexdata):
-        """Verify <signature> of <hexdata> by <address>."""
+        """Verify <signature> of <hexdata> by <address>, malformed input
+        is returned as False like in verify_signatures.
+        """
+        item = self._deserialize_verify_item((address, signature, hexdata))
+        if item is None:
+            return False
+        address, signature, data = item
+        return control.verify_signature(self.testnet, address, signature,
+                                        data, backend=self.crypto_backend,
+                                        cache=self.verify_cache)
+
+    def get_verify_cache_info(self):
+        """Returns verify cache hits, misses, size and maxsize or None if
+        the cache is disabled (verify_cache_size=0).
+        """
+        if self.verify_cache is None:
+            return None
+        return self.verify_cache.info()
+
+    def clear_verify_cache(self):
+        """Remove all entries from the verify cache and reset counters."""
+        if self.verify_cache is not None:
+            self.verify_cache.clear()
+
+    def verify_signatures(self, items, processes=None):
+        """Verify list of (<address>, <signature>, <hexdata>) triples.
+        Returns list of results in the same order, malformed triples are
+        returned as False. The work is spread over <processes> worker
+        processes, defaults to the number of cpus.
+        """
+        if processes is not None:
+            processes = deserialize.positive_integer(processes)
+        items = list(map(self._deserialize_verify_item, items))
+        valid = [item for item in items if item is not None]
+        results = iter(control.verify_signatures(
+            self.testnet, valid, processes=processes,
+            backend=self.crypto_backend
+        ))
+        return [False if item is None else next(results) for item in items]
+
+    def _deserialize_verify_item(self, item):
         try:
+            address, signature, hexdata = item
             address = deserialize.address(self.testnet, address)
             data = deserialize.binary(hexdata)
             signature = deserialize.signature(signature)
-            return control.verify_signature(self.testnet, address,
-                                            signature, data)
-        except exceptions.InvalidAddress:
-            return False
+            return address, signature, data
+        except Exception:
+            return None  # malformed input
+
+    def create_signer(self, wif):
+        """Create Signer for <wif> to sign many messages with one key."""
+        return signer.Signer(self.testnet, wif, backend=self.crypto_backend)
 
     def sign_unicode(self, wif, message):
         """Signing <unicode> with <wif> private key."""
@@ -184,21 +314,69 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
         hexdata = binascii.hexlify(message.encode("utf-8"))
         return self.verify_signature(address, signature, hexdata)
 
+    def sign_stream(self, wif, fileobj, length):
+        """Signing <length> bytes read from binary <fileobj> with <wif>
+        private key, the data is hashed incrementally.
+        """
+        key = deserialize.key(self.testnet, wif,
+                              backend=self.crypto_backend)
+        length = deserialize.positive_integer(length)
+        sigdata = control.sign_stream(self.testnet, fileobj, length, key,
+                                      backend=self.crypto_backend)
+        return serialize.signature(sigdata)
+
+    def verify_stream(self, address, signature, fileobj, length):
+        """Verify <signature> of <length> bytes read from binary <fileobj>
+        by <address>, the data is hashed incrementally. Malformed
+        <address> or <signature> is returned as False.
+        """
+        try:
+            address = deserialize.address(self.testnet, address)
+            signature = deserialize.signature(signature)
+        except Exception:
+            return False  # malformed input
+        length = deserialize.positive_integer(length)
+        return control.verify_stream(self.testnet, address, signature,
+                                     fileobj, length,
+                                     backend=self.crypto_backend,
+                                     cache=self.verify_cache)
+
+    def sign_file(self, wif, path):
+        """Signing content of file at <path> with <wif> private key."""
+        key = deserialize.key(self.testnet, wif,
+                              backend=self.crypto_backend)
+        sigdata = control.sign_file(self.testnet, path, key,
+                                    backend=self.crypto_backend)
+        return serialize.signature(sigdata)
+
+    def verify_file(self, address, signature, path):
+        """Verify <signature> of content of file at <path> by <address>,
+        malformed <address> or <signature> is returned as False.
+        """
+        try:
+            address = deserialize.address(self.testnet, address)
+            signature = deserialize.signature(signature)
+        except Exception:
+            return False  # malformed input
+        return control.verify_file(self.testnet, address, signature, path,
+                                   backend=self.crypto_backend,
+                                   cache=self.verify_cache)
+
     ###############
     # hash160data #
     ###############
 
     def add_hash160data(self, rawtx, hexdata, dust_limit=common.DUST_LIMIT):
         """Writes <hexdata> as new Pay-to-PubkeyHash output to <rawtx>."""
-        tx = deserialize.unsignedtx(rawtx)
+        txbuilder = self._load_builder(rawtx)
         dust_limit = deserialize.positive_integer(dust_limit)
-        hash160data_txout = deserialize.hash160data_txout(hexdata, dust_limit)
-        tx = control.add_hash160data_output(tx, hash160data_txout)
-        return serialize.tx(tx)
+        txbuilder.add_hash160data(deserialize.binary(hexdata),
+                                  dust_limit=dust_limit)
+        return serialize.tx(txbuilder.tx)
 
     def get_hash160data(self, rawtx, output_index):
         """TODO doc string"""
-        tx = deserialize.unsignedtx(rawtx)
+        tx = deserialize.lazytx(rawtx)
         output_index = deserialize.positive_integer(output_index)
         data = control.get_hash160_data(tx, output_index)
         return serialize.data(data)
@@ -207,11 +385,13 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
                           txouts=None, fee=10000, lock_time=0,
                           dust_limit=common.DUST_LIMIT):
         """TODO doc string"""
-        rawtx = self.create_tx(txouts=txouts, lock_time=lock_time)
-        rawtx = self.add_hash160data(rawtx, hexdata, dust_limit=dust_limit)
-        rawtx = self.add_inputs(rawtx, wifs, change_address=change_address,
-                                fee=fee)
-        return self.publish(rawtx)
+        txbuilder = self._create_builder(txouts=txouts, lock_time=lock_time)
+        dust_limit = deserialize.positive_integer(dust_limit)
+        txbuilder.add_hash160data(deserialize.binary(hexdata),
+                                  dust_limit=dust_limit)
+        self._add_inputs(txbuilder, wifs, change_address=change_address,
+                         fee=fee)
+        return self._publish(txbuilder)
 
     def retrieve_hash160data(self, txid, output_index):
         """TODO doc string"""
@@ -224,14 +404,13 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
 
     def add_nulldata(self, rawtx, hexdata):
         """Writes <hexdata> as new nulldata output to <rawtx>."""
-        tx = deserialize.unsignedtx(rawtx)
-        nulldata_txout = deserialize.nulldata_txout(hexdata)
-        tx = control.add_nulldata_output(tx, nulldata_txout)
-        return serialize.tx(tx)
+        txbuilder = self._load_builder(rawtx)
+        txbuilder.add_nulldata(deserialize.binary(hexdata))
+        return serialize.tx(txbuilder.tx)
 
     def get_nulldata(self, rawtx):
         """Returns nulldata from <rawtx> as hexdata."""
-        tx = deserialize.tx(rawtx)
+        tx = deserialize.lazytx(rawtx)
         index, data = control.get_nulldata(tx)
         return serialize.data(data)
 
@@ -241,48 +420,122 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
         Utxos taken from <wifs> and change sent to <change_address>.
         <wifs>: '["privatekey_in_wif_format", ...]'
         """
-        rawtx = self.create_tx(txouts=txouts, lock_time=lock_time)
-        rawtx = self.add_nulldata(rawtx, hexdata)
-        rawtx = self.add_inputs(rawtx, wifs, change_address=change_address,
-                                fee=fee)
-        return self.publish(rawtx)
+        txbuilder = self._create_builder(txouts=txouts, lock_time=lock_time)
+        txbuilder.add_nulldata(deserialize.binary(hexdata))
+        self._add_inputs(txbuilder, wifs, change_address=change_address,
+                         fee=fee)
+        return self._publish(txbuilder)
 
     def retrieve_nulldata(self, txid):
         """Returns nulldata stored in blockchain <txid> as hexdata."""
-        rawtx = self.retrieve_tx(txid)
+        entry, tx = self._retrieve_indexed(txid, scanner.NULLDATA)
+        if entry is not None:
+            return serialize.data(entry["payload"])
+        rawtx = self._retrieve_rawtx(txid, tx)
         return self.get_nulldata(rawtx)
 
     #############
     # data blob #
     #############
 
-    def get_data_blob(self, rawtx):
-        """TODO add docstring"""
-        tx = deserialize.tx(rawtx)
-        data = control.get_data_blob(tx)
+    def get_data_blob(self, rawtx, decompress=False):
+        """Returns the data blob of <rawtx> as hexdata, if <decompress> is
+        set blobs stored compressed are decompressed.
+        """
+        tx = deserialize.lazytx(rawtx)
+        decompress = deserialize.flag(decompress)
+        data = control.get_data_blob(tx, decompress=decompress)
         return serialize.data(data)
 
-    def add_data_blob(self, rawtx, hexdata, dust_limit=common.DUST_LIMIT):
-        """TODO add docstring"""
-        tx = deserialize.tx(rawtx)
+    def add_data_blob(self, rawtx, hexdata, dust_limit=common.DUST_LIMIT,
+                      compress=False):
+        """Add <hexdata> as data blob to <rawtx>, if <compress> is set it
+        is stored compressed when that needs less outputs.
+        """
+        txbuilder = self._load_builder(rawtx)
         data = deserialize.binary(hexdata)
-        tx = control.add_data_blob(tx, data, dust_limit=dust_limit)
-        return serialize.tx(tx)
+        compress = deserialize.flag(compress)
+        txbuilder.add_data_blob(data, dust_limit=dust_limit,
+                                compress=compress)
+        return serialize.tx(txbuilder.tx)
 
     def store_data_blob(self, hexdata, wifs, change_address=None,
                         txouts=None, fee=10000, lock_time=0,
-                        dust_limit=common.DUST_LIMIT):
-        """TODO add docstring"""
-        rawtx = self.create_tx(txouts=txouts, lock_time=lock_time)
-        rawtx = self.add_data_blob(rawtx, hexdata, dust_limit=dust_limit)
-        rawtx = self.add_inputs(rawtx, wifs, change_address=change_address,
-                                fee=fee)
-        return self.publish(rawtx)
-
-    def retrieve_data_blob(self, txid):
+                        dust_limit=common.DUST_LIMIT, compress=False):
         """TODO add docstring"""
-        rawtx = self.retrieve_tx(txid)
-        return self.get_data_blob(rawtx)
+        txbuilder = self._create_builder(txouts=txouts, lock_time=lock_time)
+        data = deserialize.binary(hexdata)
+        compress = deserialize.flag(compress)
+        txbuilder.add_data_blob(data, dust_limit=dust_limit,
+                                compress=compress)
+        self._add_inputs(txbuilder, wifs, change_address=change_address,
+                         fee=fee)
+        return self._publish(txbuilder)
+
+    def retrieve_data_blob(self, txid, decompress=False):
+        """Returns the data blob stored in <txid> as hexdata, see
+        get_data_blob.
+        """
+        decompress = deserialize.flag(decompress)
+        entry, tx = self._retrieve_indexed(txid, scanner.BLOB)
+        if entry is not None:
+            data = entry["payload"]  # as stored
+            try:
+                if decompress:
+                    data = compression.decompress(data)
+                return serialize.data(data)
+            except ValueError:
+                pass  # raised with the tx below
+        rawtx = self._retrieve_rawtx(txid, tx)
+        return self.get_data_blob(rawtx, decompress=decompress)
+
+    def open_data_blob(self, txid, decompress=False):
+        """Returns a read-only binary file object over the data blob of
+        <txid>, chunks are decoded (and decompressed if <decompress> is
+        set) as they are read.
+        """
+        txid = deserialize.txid(txid)
+        decompress = deserialize.flag(decompress)
+        tx = self.service.get_tx(txid)
+        return blobio.DataBlobReader(tx, decompress=decompress)
+
+    ##############
+    # large blob #
+    ##############
+
+    def store_large_blob(self, hexdata, wifs, change_address=None,
+                         fee=10000, dust_limit=common.DUST_LIMIT,
+                         segment_size=control.LARGE_BLOB_SEGMENT_SIZE):
+        """Store <hexdata> of any size in a chain of transactions, each
+        holding a segment of <segment_size> bytes, and a root transaction
+        with the manifest. <fee> is paid per transaction.
+        Returns the txid of the root transaction.
+        """
+        data = deserialize.binary(hexdata)
+        keys = deserialize.keys(self.testnet, wifs,
+                                backend=self.crypto_backend)
+        fee = deserialize.positive_integer(fee)
+        segment_size = deserialize.positive_integer(segment_size)
+        if change_address is not None:
+            change_address = deserialize.address(self.testnet, change_address)
+        txs = control.create_large_blob_txs(
+            self.service, self.testnet, data, keys,
+            change_address=change_address, fee=fee, dust_limit=dust_limit,
+            segment_size=segment_size
+        )
+        for tx in txs:  # segments first, root last
+            txid = self._publish(builder.TxBuilder(self.service,
+                                                   self.testnet, tx=tx))
+        return txid
+
+    def retrieve_large_blob(self, txid, threads=None):
+        """Returns the data stored with store_large_blob under root
+        <txid>, segments are fetched by <threads> concurrent threads.
+        """
+        txid = deserialize.txid(txid)
+        tx = self.service.get_tx(txid)
+        data = control.get_large_blob(self.service, tx, threads=threads)
+        return serialize.data(data)
 
     #####################
     # broadcast message #
@@ -291,17 +544,20 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
     def add_broadcast_message(self, rawtx, message, sender_wif,
                               dust_limit=common.DUST_LIMIT):
         """TODO add docstring"""
-        tx = deserialize.tx(rawtx)
+        txbuilder = self._load_builder(rawtx)
         message = deserialize.unicode_str(message)
-        sender_key = deserialize.key(self.testnet, sender_wif)
-        tx = control.add_broadcast_message(self.testnet, tx, message,
-                                           sender_key, dust_limit=dust_limit)
-        return serialize.tx(tx)
+        sender_key = deserialize.key(self.testnet, sender_wif,
+                                     backend=self.crypto_backend)
+        txbuilder.add_broadcast_message(message, sender_key,
+                                        dust_limit=dust_limit)
+        return serialize.tx(txbuilder.tx)
 
     def get_broadcast_message(self, rawtx):
         """TODO add docstring"""
-        tx = deserialize.tx(rawtx)
-        result = control.get_broadcast_message(self.testnet, tx)
+        tx = deserialize.lazytx(rawtx)
+        result = control.get_broadcast_message(
+            self.testnet, tx, max_size=self.max_message_size
+        )
         result["signature"] = serialize.signature(result["signature"])
         return result
 
@@ -309,16 +565,26 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
                                 change_address=None, txouts=None, fee=10000,
                                 lock_time=0, dust_limit=common.DUST_LIMIT):
         """TODO add docstring"""
-        rawtx = self.create_tx(txouts=txouts, lock_time=lock_time)
-        rawtx = self.add_broadcast_message(rawtx, message, sender_wif,
-                                           dust_limit=dust_limit)
-        rawtx = self.add_inputs(rawtx, wifs, change_address=change_address,
-                                fee=fee)
-        return self.publish(rawtx)
+        txbuilder = self._create_builder(txouts=txouts, lock_time=lock_time)
+        message = deserialize.unicode_str(message)
+        sender_key = deserialize.key(self.testnet, sender_wif,
+                                     backend=self.crypto_backend)
+        txbuilder.add_broadcast_message(message, sender_key,
+                                        dust_limit=dust_limit)
+        self._add_inputs(txbuilder, wifs, change_address=change_address,
+                         fee=fee)
+        return self._publish(txbuilder)
 
     def retrieve_broadcast_message(self, txid):
         """TODO add docstring"""
-        rawtx = self.retrieve_tx(txid)
+        entry, tx = self._retrieve_indexed(txid, scanner.BROADCAST)
+        if entry is not None:
+            return {
+                "address": entry["address"],
+                "message": entry["payload"].decode("utf-8"),
+                "signature": serialize.signature(entry["signature"])
+            }
+        rawtx = self._retrieve_rawtx(txid, tx)
         return self.get_broadcast_message(rawtx)
 
     ########
@@ -336,7 +602,8 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
 
     def split_utxos(self, wif, limit, fee=10000, max_outputs=100):
         """Split utxos of <wif> unitil <limit> or <max_outputs> reached."""
-        key = deserialize.key(self.testnet, wif)
+        key = deserialize.key(self.testnet, wif,
+                              backend=self.crypto_backend)
         limit = deserialize.positive_integer(limit)
         fee = deserialize.positive_integer(fee)
         max_outputs = deserialize.positive_integer(max_outputs)
@@ -345,4 +612,5 @@ class BtcTxStore():  # TODO use apigen when ported to python 3
                                     spendables, limit, fee=fee,
                                     max_outputs=max_outputs,
                                     publish=(not self.dryrun))
+        self.clear_utxo_cache()  # the utxos of <wif> were reorganized
         return serialize.txids(txids)
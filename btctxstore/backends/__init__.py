@@ -0,0 +1,46 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from btctxstore.backends.python import Python
+from btctxstore.backends.openssl import OpenSSL
+from btctxstore.backends.libsecp256k1 import LibSecp256k1
+
+
+_all = {
+    "python": Python,
+    "openssl": OpenSSL,
+    "libsecp256k1": LibSecp256k1,
+}
+
+
+# order in which backends are tried for "automatic"
+_preference = ["libsecp256k1", "openssl", "python"]
+
+
+_default = None
+
+
+def available():
+    """Return names of the backends usable on this system."""
+    return [name for name in _preference if _all[name].available()]
+
+
+def select(name="automatic"):
+    if name == "automatic":
+        name = available()[0]  # python is always available
+    backend_class = _all.get(name)
+    if backend_class is None:
+        raise Exception("Crypto backend {0} not found!".format(name))
+    if not backend_class.available():
+        raise Exception("Crypto backend {0} not available!".format(name))
+    return backend_class()
+
+
+def default():
+    """Return the automatically selected backend, shared per process."""
+    global _default
+    if _default is None:
+        _default = select("automatic")
+    return _default
@@ -0,0 +1,57 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+import pycoin
+from btctxstore import ecmath
+
+
+class CryptoBackend(object):
+
+    name = None
+
+    @classmethod
+    def available(cls):
+        """Return True if the backend can be used on this system."""
+        return True
+
+    def sign(self, secret_exponent, e):
+        """Sign integer <e> with a deterministic (rfc6979) nonce like
+        pycoin.ecdsa.sign, s is not normalized. Returns (r, s, i) with
+        i being the public key recovery parameter.
+        """
+        raise NotImplementedError()
+
+    def verify(self, public_pair, e, r, s):
+        """Return True if (r, s) is a valid signature of <e>."""
+        raise NotImplementedError()
+
+    def recover(self, r, s, i, e):
+        """Recover the public pair from signature (r, s) of <e> and
+        recovery parameter <i>. Raises ValueError if not possible.
+        """
+        raise NotImplementedError()
+
+    def public_pair(self, secret_exponent):
+        """Return the public pair for <secret_exponent>."""
+        raise NotImplementedError()
+
+    def _nonce(self, secret_exponent, e):
+        return pycoin.ecdsa.ecdsa.deterministic_generate_k(
+            ecmath.N, secret_exponent, e
+        )
+
+    def _sign_with_nonce_point(self, secret_exponent, e, k, R):
+        """Finish signing given the nonce <k> and nonce point <R>.
+        As r is taken unreduced from R, the recovery parameter is given
+        by the parity of R.y alone.
+        """
+        n = ecmath.N
+        r = R[0]
+        if r == 0:
+            raise RuntimeError("amazingly unlucky random number r")
+        s = (ecmath.inverse_mod(k, n) * (e + (secret_exponent * r) % n)) % n
+        if s == 0:
+            raise RuntimeError("amazingly unlucky random number s")
+        return r, s, R[1] & 1
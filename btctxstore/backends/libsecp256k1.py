@@ -0,0 +1,60 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import absolute_import
+from pycoin.encoding import to_bytes_32
+from pycoin.encoding import sec_to_public_pair, public_pair_to_sec
+from pycoin.tx.script.der import sigencode_der
+from btctxstore import ecmath
+from btctxstore.backends.interface import CryptoBackend
+try:
+    import coincurve
+except ImportError:
+    coincurve = None
+
+
+class LibSecp256k1(CryptoBackend):
+    """Native libsecp256k1 through the optional coincurve binding."""
+
+    name = "libsecp256k1"
+
+    @classmethod
+    def available(cls):
+        return coincurve is not None
+
+    def sign(self, secret_exponent, e):
+        # libsecp256k1 normalizes s and picks its own nonce, so only the
+        # nonce point is computed natively to stay identical to pycoin
+        k = self._nonce(secret_exponent, e)
+        nonce_key = coincurve.PrivateKey(to_bytes_32(k))
+        R = sec_to_public_pair(nonce_key.public_key.format(compressed=True))
+        return self._sign_with_nonce_point(secret_exponent, e, k, R)
+
+    def verify(self, public_pair, e, r, s):
+        if not (0 < r < ecmath.N and 0 < s < ecmath.N):
+            return False
+        if not ecmath.is_on_curve(public_pair):
+            return False
+        if s > ecmath.N // 2:  # libsecp256k1 only accepts low s values
+            s = ecmath.N - s
+        public_key = coincurve.PublicKey(public_pair_to_sec(public_pair))
+        return public_key.verify(sigencode_der(r, s), to_bytes_32(e),
+                                 hasher=None)
+
+    def recover(self, r, s, i, e):
+        if not (0 < r < ecmath.N and 0 < s < ecmath.N and 0 <= i < 4):
+            raise ValueError("Invalid signature!")
+        signature = to_bytes_32(r) + to_bytes_32(s) + bytearray([i])
+        try:
+            public_key = coincurve.PublicKey.from_signature_and_message(
+                bytes(signature), to_bytes_32(e), hasher=None
+            )
+        except Exception as e:
+            raise ValueError(repr(e))
+        return sec_to_public_pair(public_key.format(compressed=False))
+
+    def public_pair(self, secret_exponent):
+        private_key = coincurve.PrivateKey(to_bytes_32(secret_exponent))
+        return sec_to_public_pair(private_key.public_key.format(False))
@@ -0,0 +1,56 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+import pycoin
+from pycoin.ecdsa.ellipticcurve import Point
+from btctxstore import ecmath
+from btctxstore.backends.interface import CryptoBackend
+
+
+class OpenSSL(CryptoBackend):
+    """Uses pycoins native OpenSSL point multiplication hook,
+    enabled by setting the PYCOIN_NATIVE=openssl environment variable.
+    """
+
+    name = "openssl"
+
+    @classmethod
+    def available(cls):
+        try:
+            from pycoin.ecdsa.ellipticcurve import NATIVE_LIBRARY
+            return NATIVE_LIBRARY is not None
+        except ImportError:
+            return False
+
+    def _multiply(self, k, point):
+        G = pycoin.ecdsa.generator_secp256k1
+        if point is None:
+            return (k * G).pair()
+        return (k * Point(G.curve(), point[0], point[1])).pair()
+
+    def sign(self, secret_exponent, e):
+        k = self._nonce(secret_exponent, e)
+        R = self._multiply(k, None)
+        return self._sign_with_nonce_point(secret_exponent, e, k, R)
+
+    def verify(self, public_pair, e, r, s):
+        G = pycoin.ecdsa.generator_secp256k1
+        if not ecmath.is_on_curve(public_pair):
+            return False
+        return bool(pycoin.ecdsa.verify(G, public_pair, e, (r, s)))
+
+    def recover(self, r, s, i, e):
+        x, y = ecmath.recovery_point(r, i)
+        r_inv = ecmath.inverse_mod(r, ecmath.N)
+        u1 = (-e * r_inv) % ecmath.N
+        u2 = (s * r_inv) % ecmath.N
+        G = pycoin.ecdsa.generator_secp256k1
+        Q = u1 * G + u2 * Point(G.curve(), x, y)
+        if Q.x() is None:
+            raise ValueError("Recovered public key at infinity!")
+        return Q.pair()
+
+    def public_pair(self, secret_exponent):
+        return self._multiply(secret_exponent, None)
@@ -0,0 +1,27 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from btctxstore import ecmath
+from btctxstore.backends.interface import CryptoBackend
+
+
+class Python(CryptoBackend):
+    """Pure python fallback, see btctxstore.ecmath."""
+
+    name = "python"
+
+    def sign(self, secret_exponent, e):
+        k = self._nonce(secret_exponent, e)
+        R = ecmath.multiply_generator(k)
+        return self._sign_with_nonce_point(secret_exponent, e, k, R)
+
+    def verify(self, public_pair, e, r, s):
+        return ecmath.verify(public_pair, e, r, s)
+
+    def recover(self, r, s, i, e):
+        return ecmath.recover_public_pair(r, s, i, e)
+
+    def public_pair(self, secret_exponent):
+        return ecmath.multiply_generator(secret_exponent)
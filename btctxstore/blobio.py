@@ -0,0 +1,80 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import io
+import itertools
+from . import control
+from . import compression
+from . import exceptions
+
+
+class DataBlobReader(io.RawIOBase):
+    """Read-only binary file object over the data blob of a tx.
+
+    The tx is validated like control.get_data_blob and the chunks stored
+    in the outputs are extracted and copied out as they are read (invalid
+    or oversized compressed data raises NoDataBlob), so the payload can be
+    piped into files, sockets or hashers without joining it. If
+    <decompress> is set, blobs stored compressed are decompressed
+    incrementally to at most <max_size> bytes. <size> is the stored size.
+    """
+
+    def __init__(self, tx, decompress=False,
+                 max_size=compression.MAX_DECOMPRESSED_SIZE):
+        super(DataBlobReader, self).__init__()
+        self.tx = tx
+        self.size, nulldata_index, hash160_count = \
+            control._data_blob_outputs(tx)
+        segments = control._iter_data_blob_segments(tx, self.size,
+                                                     nulldata_index,
+                                                     hash160_count)
+        peeked, header = [], b""
+        for segment in segments:  # only the outputs holding the header
+            peeked.append(segment)
+            header += segment
+            if len(header) >= compression.HEADER_BYTES:
+                break
+        self.compressed = compression.is_compressed(header)
+        self._chunks = itertools.chain(peeked, segments)
+        if decompress and self.compressed:
+            self._chunks = compression.iter_decompress(self._chunks,
+                                                       max_size=max_size)
+        self._chunk = b""
+        self._chunk_pos = 0
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def _next_chunk(self):
+        try:
+            self._chunk = next(self._chunks, None)
+        except (ValueError, exceptions.MaxDecompressedSizeExceeded):
+            raise exceptions.NoDataBlob(self.tx)
+        self._chunk_pos = 0
+        return self._chunk is not None
+
+    def readinto(self, buffer):
+        view = memoryview(buffer)
+        written = 0
+        while written < len(view):
+            if self._chunk is None:
+                break  # end of blob
+            if self._chunk_pos == len(self._chunk):
+                self._next_chunk()
+                continue
+            available = len(self._chunk) - self._chunk_pos
+            count = min(len(view) - written, available)
+            view[written:written + count] = \
+                self._chunk[self._chunk_pos:self._chunk_pos + count]
+            self._chunk_pos += count
+            written += count
+        self._position += written
+        return written
@@ -0,0 +1,109 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+from . import common
+from . import cachedtx
+from . import coinselect
+from . import control
+from . import deserialize
+
+
+class TxBuilder(object):
+    """Binary transaction building session.
+
+    Keeps a live pycoin Tx across steps and takes and returns bytes, Tx
+    and Key objects, so a pipeline like create, add data, add inputs and
+    publish parses and serializes the tx only once. The hex json api of
+    BtcTxStore is a thin wrapper around it.
+    """
+
+    def __init__(self, service, testnet, tx=None):
+        self.service = service
+        self.testnet = testnet
+        if tx is None:
+            tx = cachedtx.CachedTx(1, [], [])
+        self.tx = cachedtx.CachedTx.from_tx(tx)
+
+    @classmethod
+    def from_bin(cls, service, testnet, rawtx):
+        return cls(service, testnet, tx=cachedtx.CachedTx.from_bin(rawtx))
+
+    @classmethod
+    def create(cls, service, testnet, txins=None, txouts=None, lock_time=0):
+        """Start with a new tx from pycoin TxIn/TxOut lists."""
+        tx = control.create_tx(service, testnet, list(txins or []),
+                               list(txouts or []), lock_time=lock_time)
+        return cls(service, testnet, tx=tx)
+
+    def as_bin(self):
+        """Serialized tx, memoized until the next step."""
+        return self.tx.as_bin()
+
+    def add_outputs(self, txouts):
+        self.tx.txs_out.extend(txouts)
+        self.tx.changed()
+        return self
+
+    def add_nulldata(self, data):
+        txout = deserialize.nulldata_txout_bin(data)
+        control.add_nulldata_output(self.tx, txout)
+        self.tx.changed()
+        return self
+
+    def add_hash160data(self, data, dust_limit=common.DUST_LIMIT):
+        txout = deserialize.hash160data_txout_bin(data, dust_limit=dust_limit)
+        control.add_hash160data_output(self.tx, txout)
+        self.tx.changed()
+        return self
+
+    def add_data_blob(self, data, dust_limit=common.DUST_LIMIT,
+                      compress=False):
+        control.add_data_blob(self.tx, data, dust_limit=dust_limit,
+                              compress=compress)
+        self.tx.changed()
+        return self
+
+    def add_broadcast_message(self, message, sender_key,
+                              dust_limit=common.DUST_LIMIT):
+        control.add_broadcast_message(self.testnet, self.tx, message,
+                                      sender_key, dust_limit=dust_limit)
+        self.tx.changed()
+        return self
+
+    def add_inputs(self, keys, change_address=None, fee=10000, sign=True,
+                   strategy=coinselect.LARGEST_FIRST, fee_per_input=0,
+                   utxo_cache=None):
+        """Add inputs of <keys> covering the outputs and <fee>, selected
+        with the coinselect <strategy> (from <utxo_cache> if given, see
+        control.find_spendables). The inputs are signed unless <sign> is
+        False.
+        """
+        control.add_inputs(self.service, self.testnet, self.tx, keys,
+                           change_address=change_address, fee=fee,
+                           strategy=strategy, fee_per_input=fee_per_input,
+                           utxo_cache=utxo_cache)
+        self.tx.changed()
+        if sign:
+            self.sign(keys)
+        return self
+
+    def sign(self, keys, prevouts=None, processes=1):
+        control.sign_tx(self.service, self.testnet, self.tx, keys,
+                        prevouts=prevouts, processes=processes)
+        self.tx.changed()
+        return self
+
+    def publish(self, dryrun=False, utxo_cache=None):
+        """Send the tx unless <dryrun> and return its txid (hash bytes),
+        the service and the txid share one serialization. Once sent the
+        tx is applied to <utxo_cache>, see control.update_utxo_cache.
+        """
+        if not dryrun:
+            self.service.send_tx(self.tx)
+            if utxo_cache is not None:
+                control.update_utxo_cache(utxo_cache, self.testnet, self.tx)
+        return self.tx.hash()
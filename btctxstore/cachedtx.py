@@ -0,0 +1,52 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import pycoin
+from pycoin.encoding import double_sha256
+
+
+class CachedTx(pycoin.tx.Tx):
+    """pycoin Tx memoizing its serialization and hash.
+
+    Publishing a tx serializes it for the service and hashes it for the
+    txid, both are computed once and shared. Code mutating the tx after
+    either was requested must call changed(), TxBuilder does so for all
+    of its steps. The control functions take and return plain pycoin
+    transactions and only wrap complete ones.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(CachedTx, self).__init__(*args, **kwargs)
+        self._bin = None
+        self._hash = None
+
+    @classmethod
+    def from_tx(cls, tx):
+        """Wrap <tx>, the inputs and outputs lists are shared."""
+        if isinstance(tx, cls):
+            return tx
+        return cls(tx.version, tx.txs_in, tx.txs_out, tx.lock_time,
+                   tx.unspents)
+
+    def changed(self):
+        """Drop the memoized serialization and hash."""
+        self._bin = None
+        self._hash = None
+
+    def as_bin(self, include_unspents=False):
+        if include_unspents:
+            return super(CachedTx, self).as_bin(include_unspents=True)
+        if self._bin is None:
+            self._bin = super(CachedTx, self).as_bin()
+        return self._bin
+
+    def hash(self, hash_type=None):
+        if hash_type:  # signature hashes are never memoized
+            return super(CachedTx, self).hash(hash_type=hash_type)
+        if self._hash is None:
+            self._hash = double_sha256(self.as_bin())
+        return self._hash
@@ -0,0 +1,303 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+"""Pluggable coin selection.
+
+Strategies run against a UtxoIndex, utxos sorted by value (descending)
+once with prefix sums of the values, so lookups like the smallest utxo
+covering a target or the number of largest utxos needed are binary
+searches and only the candidates near the target are looked at.
+
+Building the index sorts the utxos, so it pays off when kept across
+sends (see control.find_spendables <utxo_cache>). Once a tx is published
+updated() drops the spent and adds the received utxos without sorting
+again. Only dropping the largest utxos (largest_first) reuses the prefix
+sums, other updates rebuild them in one linear pass, so they stay linear
+in the number of utxos (with a small constant) rather than sublinear.
+
+Every strategy returns the selected positions in the index or None if
+the utxos can not cover the target. With <fee_per_input> set, utxos are
+valued at what they add after paying for their input (effective value)
+and utxos not worth their input are never selected.
+
+    largest_first: fewest inputs, the historic default.
+    branch_and_bound: exact match (within <cost_of_change>), no change.
+    knapsack: random subset search close to the target (bitcoin core).
+    fee_aware: branch_and_bound, else largest_first on effective values.
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import array
+import random
+try:
+    from itertools import accumulate
+except ImportError:  # python 2
+    accumulate = None
+from . import common
+from . import utxoset
+from . import exceptions
+
+
+LARGEST_FIRST = "largest_first"
+BRANCH_AND_BOUND = "branch_and_bound"
+KNAPSACK = "knapsack"
+FEE_AWARE = "fee_aware"
+
+
+BNB_MAX_TRIES = 100000
+KNAPSACK_ITERATIONS = 1000
+KNAPSACK_POOL_SIZE = 256
+
+
+class UtxoIndex(object):
+    """Utxos sorted by value descending with prefix sums, only differences
+    of the sums are used so they may start at any offset.
+    """
+
+    def __init__(self, utxos, presorted=False, sums=None):
+        self.utxos = utxos if presorted else utxos.sorted(reverse=True)
+        self.values = self.utxos.values
+        self.sums = _prefix_sums(self.values) if sums is None else sums
+
+    def __len__(self):
+        return len(self.values)
+
+    def count_above(self, threshold):
+        """Number of utxos with a value greater than <threshold>."""
+        return _count_above(self.values, threshold)
+
+    def effective_sum(self, begin, end, fee_per_input=0):
+        """Effective value of the utxos at positions <begin> to <end>."""
+        total = self.sums[end] - self.sums[begin]
+        return total - (end - begin) * fee_per_input
+
+    def spendables(self, positions):
+        return list(self.utxos.spendables(positions))
+
+    def updated(self, spent=(), received=()):
+        """Return a UtxoIndex without the utxos at the positions <spent>
+        and with the Spendables <received>, see the module docstring.
+        """
+        spent = sorted(spent)
+        count = len(spent)
+        if not received and spent == list(range(count)):
+            return UtxoIndex(self.utxos[count:], presorted=True,
+                             sums=self.sums[count:])
+        utxos = self.utxos.without(spent)
+        for spendable in received:
+            position = _count_above(utxos.values, spendable.coin_value - 1)
+            utxos.insert(position, spendable.tx_hash, spendable.tx_out_index,
+                         spendable.coin_value, spendable.script)
+        return UtxoIndex(utxos, presorted=True)
+
+
+def _prefix_sums(values):
+    sums = array.array(values.typecode, [0])
+    if accumulate is not None:
+        sums.extend(accumulate(values))
+        return sums
+    total = 0
+    for value in values:
+        total += value
+        sums.append(total)
+    return sums
+
+
+def _count_above(values, threshold):
+    # values are sorted descending
+    low, high = 0, len(values)
+    while low < high:
+        middle = (low + high) // 2
+        if values[middle] > threshold:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def largest_first(index, target, fee_per_input=0, **kwargs):
+    # fewest largest utxos covering the target, binary search on the sums
+    usable = index.count_above(fee_per_input)
+    if index.effective_sum(0, usable, fee_per_input) < target:
+        return None
+    low, high = 0, usable
+    while low < high:
+        middle = (low + high) // 2
+        if index.effective_sum(0, middle, fee_per_input) >= target:
+            high = middle
+        else:
+            low = middle + 1
+    return list(range(low))
+
+
+def branch_and_bound(index, target, fee_per_input=0,
+                     cost_of_change=common.DUST_LIMIT,
+                     max_tries=BNB_MAX_TRIES, **kwargs):
+    """Depth first search for a selection with an effective value in
+    [target, target + cost_of_change], preferring the smallest excess.
+    """
+    if target <= 0:
+        return []
+    upper = target + cost_of_change
+    begin = index.count_above(upper + fee_per_input)  # too large alone
+    end = index.count_above(fee_per_input)  # not worth their input
+    values = index.values
+
+    def effective(offset):
+        return values[begin + offset] - fee_per_input
+
+    available = index.effective_sum(begin, end, fee_per_input)
+    if available < target:
+        return None
+    selection = []  # included flag per candidate looked at
+    value = 0
+    best, best_excess = None, None
+    for tries in range(max_tries):
+        backtrack = False
+        if value + available < target or value > upper:
+            backtrack = True
+        elif value >= target:
+            backtrack = True
+            if best_excess is None or value - target < best_excess:
+                best, best_excess = list(selection), value - target
+                if best_excess == 0:
+                    break
+
+        if backtrack:  # exclude the last included candidate
+            while selection and not selection[-1]:
+                selection.pop()
+                available += effective(len(selection))
+            if not selection:
+                break  # search space exhausted
+            selection[-1] = False
+            value -= effective(len(selection) - 1)
+        else:
+            offset = len(selection)
+            candidate = effective(offset)
+            available -= candidate
+            if (selection and not selection[-1] and
+                    effective(offset - 1) == candidate):
+                selection.append(False)  # same as the excluded sibling
+            else:
+                selection.append(True)
+                value += candidate
+
+    if best is None:
+        return None
+    return [begin + offset for offset, included in enumerate(best)
+            if included]
+
+
+def _approximate_best_subset(values, target, iterations, rng):
+    """Bitcoin core's random subset search, returns (total, included)."""
+    best, best_total = [True] * len(values), sum(values)
+    for iteration in range(iterations):
+        if best_total == target:
+            break
+        included = [False] * len(values)
+        total = 0
+        reached = False
+        for npass in range(2):
+            if reached:
+                break
+            for i, value in enumerate(values):
+                pick = rng.random() < 0.5 if npass == 0 else not included[i]
+                if not pick:
+                    continue
+                total += value
+                included[i] = True
+                if total >= target:
+                    reached = True
+                    if total < best_total:
+                        best, best_total = list(included), total
+                    total -= value
+                    included[i] = False
+    return best_total, best
+
+
+def knapsack(index, target, fee_per_input=0,
+             min_change=common.DUST_LIMIT, iterations=KNAPSACK_ITERATIONS,
+             pool_size=KNAPSACK_POOL_SIZE, rng=random, **kwargs):
+    """Exact single match, else the subset of the largest utxos below
+    the target closest to it (or to target + <min_change>), unless the
+    smallest utxo covering target + <min_change> alone is better.
+    """
+    if target <= 0:
+        return []
+    f = fee_per_input
+    usable = index.count_above(f)
+
+    # exact single match
+    covering = index.count_above(target + f - 1)
+    if covering and index.values[covering - 1] - f == target:
+        return [covering - 1]
+
+    # smaller utxos, only the largest <pool_size> are searched
+    begin = index.count_above(target + min_change + f - 1)
+    lowest_larger = begin - 1 if begin else None
+    smaller = index.effective_sum(begin, usable, f)
+    if smaller == target:
+        return list(range(begin, usable))
+    if smaller < target:
+        return None if lowest_larger is None else [lowest_larger]
+
+    end = min(usable, begin + pool_size)
+    values = [index.values[p] - f for p in range(begin, end)]
+    if sum(values) < target:  # pool too small, take the fewest
+        return largest_first(index, target, fee_per_input=f)
+    total, included = _approximate_best_subset(values, target, iterations,
+                                               rng)
+    if total != target and sum(values) >= target + min_change:
+        total_change, included_change = _approximate_best_subset(
+            values, target + min_change, iterations, rng
+        )
+        if total_change - min_change < total - target:
+            total, included = total_change, included_change
+
+    if lowest_larger is not None and total != target:
+        if index.values[lowest_larger] - f <= total:
+            return [lowest_larger]
+    return [begin + i for i, flag in enumerate(included) if flag]
+
+
+def fee_aware(index, target, fee_per_input=0,
+              cost_of_change=common.DUST_LIMIT, **kwargs):
+    positions = branch_and_bound(index, target, fee_per_input=fee_per_input,
+                                 cost_of_change=cost_of_change)
+    if positions is None:
+        positions = largest_first(index, target, fee_per_input=fee_per_input)
+    return positions
+
+
+STRATEGIES = {
+    LARGEST_FIRST: largest_first,
+    BRANCH_AND_BOUND: branch_and_bound,
+    KNAPSACK: knapsack,
+    FEE_AWARE: fee_aware,
+}
+
+
+def select(index, target, strategy=LARGEST_FIRST, fee_per_input=0, **kwargs):
+    """Select utxos of <index> covering <target> with <strategy>. Returns
+    the positions or None if the funds are insufficient. A strategy
+    finding no solution falls back to largest_first.
+    """
+    if strategy not in STRATEGIES:
+        msg = "Unknown coin selection strategy '{0}'!".format(strategy)
+        raise exceptions.InvalidInput(msg)
+    positions = STRATEGIES[strategy](index, target,
+                                     fee_per_input=fee_per_input, **kwargs)
+    if positions is None and strategy != LARGEST_FIRST:
+        positions = largest_first(index, target, fee_per_input=fee_per_input)
+    return positions
+
+
+def index_utxos(spendables):
+    """Build a UtxoIndex from Spendables or a UtxoSet."""
+    if not isinstance(spendables, utxoset.UtxoSet):
+        spendables = utxoset.UtxoSet(spendables)
+    return UtxoIndex(spendables)
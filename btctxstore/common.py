@@ -5,7 +5,9 @@
 
 from __future__ import print_function
 from __future__ import unicode_literals
+import math
 import codecs
+import multiprocessing
 from pycoin.encoding import from_long
 from pycoin.encoding import to_long
 from pycoin.encoding import byte_to_int
@@ -41,3 +43,48 @@ def num_from_bytes(bytes_len, v):  # copied from pycoin.encoding.to_bytes_32
     if len(v) != bytes_len:
         raise ValueError("input to num_from_bytes is wrong length")
     return to_long(256, byte_to_int, v)[0]
+
+
+def pool_map(func, items, processes=None, chunksize=None):
+    """ Map func over items using a pool of worker processes.
+    Results are returned in order. Runs in the current process if only
+    a single worker would be used. Items are handed to the workers in
+    chunks so the ipc overhead does not eat the gain.
+
+    func must be a picklable module level function.
+    """
+    items = list(items)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(items))
+    if processes <= 1:
+        return list(map(func, items))
+    if chunksize is None:  # a few chunks per worker to balance the load
+        chunksize = int(math.ceil(len(items) / float(processes * 4)))
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(func, items, chunksize)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def pool_imap(func, items, processes=None, chunksize=1):
+    """ Like pool_map but yields the results in order as they become
+    available, so they do not all have to be kept in memory.
+    """
+    items = list(items)
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(items))
+    if processes <= 1:
+        for item in items:
+            yield func(item)
+        return
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap(func, items, chunksize):
+            yield result
+    finally:
+        pool.terminate()  # workers may still run if stopped early
+        pool.join()
@@ -0,0 +1,179 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+"""Optional compression of stored data.
+
+Compressed data starts with a 6 byte key and a codec byte, followed by
+the output of the codec that gave the smallest result, or the data itself
+(codec RAW) if no codec makes it smaller. Decompression
+output is bounded so a malicious blob can not exhaust memory.
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import zlib
+import struct
+import itertools
+import binascii
+from . import exceptions
+try:
+    import bz2
+except ImportError:  # optional in some python builds
+    bz2 = None
+try:
+    import lzma
+except ImportError:  # python 2
+    lzma = None
+
+
+COMPRESSED_KEY_VERSION_01 = 'c0e5a1d3b7f2'
+HEADER_BYTES = 6 + 1  # key + codec
+MAX_DECOMPRESSED_SIZE = 2 ** 20
+
+
+RAW = 0
+ZLIB = 1
+BZ2 = 2
+LZMA = 3
+
+
+def _bounded(decompressor):
+    """True if the decompressor supports max_length (python 3.5+)."""
+    try:
+        decompressor.decompress(b"", max_length=1)
+        return True
+    except TypeError:
+        return False
+
+
+class _RawDecompressor(object):
+    """Decompressor interface for data stored as is (codec RAW)."""
+
+    def __init__(self):
+        self.unconsumed_tail = b""
+
+    def decompress(self, data, max_length=0):
+        if not max_length:  # like zlib, 0 is unbounded
+            return data
+        self.unconsumed_tail = data[max_length:]
+        return data[:max_length]
+
+
+_errors = (zlib.error, IOError, EOFError)
+if lzma is not None:
+    _errors += (lzma.LZMAError,)
+
+
+_codecs = {ZLIB: (lambda data: zlib.compress(data, 9), zlib.decompressobj)}
+if bz2 is not None and _bounded(bz2.BZ2Decompressor()):
+    _codecs[BZ2] = (lambda data: bz2.compress(data, 9), bz2.BZ2Decompressor)
+if lzma is not None:
+    _codecs[LZMA] = (lambda data: lzma.compress(data, preset=9),
+                     lzma.LZMADecompressor)
+
+
+def available():
+    """Return the ids of the codecs usable on this system."""
+    return sorted(_codecs.keys())
+
+
+def _header(codec):
+    return binascii.unhexlify(COMPRESSED_KEY_VERSION_01) + struct.pack(
+        "B", codec
+    )
+
+
+def compress(data, codecs=None):
+    """Return <data> compressed with the codec (of <codecs>, default all
+    available) giving the smallest result, or <data> itself with a RAW
+    header if no codec makes it smaller.
+    """
+    result = _header(RAW) + data
+    for codec in (codecs or available()):
+        compress_func, decompressor = _codecs[codec]
+        compressed = _header(codec) + compress_func(data)
+        if len(compressed) < len(result):
+            result = compressed
+    return result
+
+
+def is_compressed(data):
+    return (len(data) >= HEADER_BYTES and
+            data[:6] == binascii.unhexlify(COMPRESSED_KEY_VERSION_01))
+
+
+def decompress_bounded(decompressor, data, max_size):
+    """Decompress <data> with <decompressor> (a zlib.decompressobj or
+    similar) producing at most <max_size> bytes. Raises
+    exceptions.MaxDecompressedSizeExceeded if the output is larger and
+    ValueError if the data is invalid or truncated.
+    """
+    try:
+        result = decompressor.decompress(data, max_size + 1)
+        if len(result) > max_size:
+            raise exceptions.MaxDecompressedSizeExceeded(max_size)
+        if not getattr(decompressor, "eof", True):  # python 2 zlib
+            raise ValueError("Truncated compressed data!")
+    except _errors as e:
+        raise ValueError("Invalid compressed data: {0}".format(e))
+    return result
+
+
+def _decompressor(data):
+    codec = struct.unpack("B", data[6:7])[0]
+    if codec == RAW:
+        return _RawDecompressor()
+    if codec not in _codecs:
+        raise ValueError("Unknown or unavailable codec {0}!".format(codec))
+    compress_func, decompressor = _codecs[codec]
+    return decompressor()
+
+
+def decompress(data, max_size=MAX_DECOMPRESSED_SIZE):
+    """Return decompressed <data>, <data> itself if not compressed.
+    Raises ValueError for an unknown codec or invalid data.
+    """
+    if not is_compressed(data):
+        return data
+    return decompress_bounded(_decompressor(data), data[HEADER_BYTES:],
+                              max_size)
+
+
+def iter_decompress(chunks, max_size=MAX_DECOMPRESSED_SIZE,
+                    block_size=2 ** 16):
+    """Incrementally decompress compressed data given as byte <chunks>,
+    yielding blocks of at most <block_size> bytes. Raises like decompress
+    and ValueError if the data is not compressed.
+    """
+    chunks = iter(chunks)
+    header = b""
+    for chunk in chunks:
+        header += chunk
+        if len(header) >= HEADER_BYTES:
+            break
+    if not is_compressed(header):
+        raise ValueError("Data not compressed!")
+    decompressor = _decompressor(header)
+    total = 0
+    try:
+        for data in itertools.chain([header[HEADER_BYTES:]], chunks):
+            while not getattr(decompressor, "eof", False):
+                block = decompressor.decompress(data, block_size)
+                total += len(block)
+                if total > max_size:
+                    raise exceptions.MaxDecompressedSizeExceeded(max_size)
+                if block:
+                    yield block
+                data = getattr(decompressor, "unconsumed_tail", b"")
+                buffered = not getattr(decompressor, "needs_input", True)
+                if not data and not buffered and len(block) < block_size:
+                    break  # more input needed
+            if getattr(decompressor, "eof", False):
+                break
+        if not getattr(decompressor, "eof", True):  # python 2 zlib
+            raise ValueError("Truncated compressed data!")
+    except _errors as e:
+        raise ValueError("Invalid compressed data: {0}".format(e))
@@ -6,13 +6,18 @@
 from __future__ import print_function
 from __future__ import unicode_literals
 import io
-import re
+import mmap
 import os
 import six
 import struct
 import ecdsa
 import math
+import itertools
 import zlib
+import hmac
+import hashlib
+import multiprocessing.pool
+import multiprocessing
 import binascii
 import pycoin
 from pycoin.key.BIP32Node import BIP32Node
@@ -20,7 +25,16 @@ from . import deserialize
 from . import serialize
 from . import exceptions
 from . import common
+from . import ecmath
+from . import backends
+from . import sighash
+from . import scripts
+from . import compression
+from . import cachedtx
+from . import utxoset
+from . import coinselect
 from pycoin.tx.script import tools
+from pycoin.tx.script import der
 
 
 SIZE_PREFIX_BYTES = 2
@@ -28,6 +42,13 @@ SIZE_PREFIX_BYTES = 2
 
 # 6 byte data type keys to reduce chance of collision with random data
 BROADCAST_MESSAGE_KEY_VERSON_01 = 'b220185f49e7'
+LARGE_BLOB_KEY_VERSON_01 = '4c9e2a01d7f3'
+
+
+# large blobs are split into segments stored as data blobs in a chain
+LARGE_BLOB_SEGMENT_SIZE = 2 ** 15
+LARGE_BLOB_SIZE_BYTES = 4
+LARGE_BLOB_HEADER_BYTES = 6 + 32 + LARGE_BLOB_SIZE_BYTES  # key + hash + size
 
 
 def _address_to_hash160(testnet, address):
@@ -60,12 +81,17 @@ def add_broadcast_message(testnet, tx, message, sender_key,
     return add_data_blob(tx, data, dust_limit=dust_limit)
 
 
-def get_broadcast_message(testnet, tx):
+def get_broadcast_message(testnet, tx,
+                          max_size=compression.MAX_DECOMPRESSED_SIZE):
+    """Return the broadcast message of <tx>, messages decompressing to
+    more than <max_size> bytes are rejected before being fully inflated.
+    """
 
     try:
-        data = get_data_blob(tx)
+        size, segments = _data_blob_segments(tx)
     except exceptions.NoDataBlob:
         raise exceptions.NoBroadcastMessage(tx)
+    data = b"".join(segments)
 
     min_data = 6 + 65 + 7 + 20 + 0  # key + sig + padding + hash160 + message
     if len(data) < min_data:  # not enough data
@@ -86,26 +112,40 @@ def get_broadcast_message(testnet, tx):
     # decompress before verification in case
     # implementations compress differently
     try:
-        msg_data = zlib.decompress(msg_data)
-    except zlib.error:
+        msg_data = compression.decompress_bounded(zlib.decompressobj(),
+                                                  msg_data, max_size)
+    except (ValueError, exceptions.MaxDecompressedSizeExceeded):
         raise exceptions.NoBroadcastMessage(tx)
 
     if not verify_signature(testnet, address, signature, msg_data):
         raise exceptions.NoBroadcastMessage(tx)  # invalid signature
 
+    try:
+        message = msg_data.decode('utf-8')
+    except UnicodeDecodeError:
+        raise exceptions.NoBroadcastMessage(tx)  # signed but not text
+
     return {
         "address": address,
-        "message": msg_data.decode('utf-8'),
+        "message": message,
         "signature": signature
     }
 
 
-def get_data_blob(tx):
+def _data_blob_outputs(tx):
+    """Return (size, nulldata_index, hash160_count) of the data blob, the
+    nulldata output at <nulldata_index> and the <hash160_count> pay to
+    pubkey hash outputs following it hold <size> bytes. Only the nulldata
+    payload is extracted, see _iter_data_blob_segments.
+    """
+
     # blob size and initial data stored in nulldata
-    try:
-        nulldata_index, nulldata = get_nulldata(tx)
-    except exceptions.NoNulldataOutput:  # no nulldata output
+    for nulldata_index, out in enumerate(tx.txs_out):
+        if scripts.is_nulldata(out.script):
+            break
+    else:  # no nulldata output
         raise exceptions.NoDataBlob(tx)
+    nulldata = scripts.get_nulldata(out.script)
 
     if len(nulldata) < SIZE_PREFIX_BYTES:  # no data size prefix
         raise exceptions.NoDataBlob(tx)
@@ -119,21 +159,84 @@ def get_data_blob(tx):
         raise exceptions.NoDataBlob(tx)
 
     if size == len(data):  # nulldata was sufficient
-        return data
+        return size, nulldata_index, 0
 
     required_bytes = (size - len(data))
     required_hash160_outputs = int(math.ceil(required_bytes / 20.0))
-    if (required_hash160_outputs + nulldata_index + 1) > len(tx.txs_out):
+    begin = nulldata_index + 1
+    outputs = itertools.islice(tx.txs_out, begin,
+                               begin + required_hash160_outputs)
+    found = 0
+    for out in outputs:
+        if not scripts.is_p2pkh(out.script):
+            break
+        found += 1
+    if found < required_hash160_outputs:
         raise exceptions.NoDataBlob(tx)  # not enough hash160 outputs for data
+    return size, nulldata_index, required_hash160_outputs
+
+
+def _iter_data_blob_segments(tx, size, nulldata_index, hash160_count):
+    """Yield the chunks of the data blob located by _data_blob_outputs,
+    extracted from the outputs one at a time and trimmed to <size> bytes
+    in total.
+    """
+    nulldata = scripts.get_nulldata(tx.txs_out[nulldata_index].script)
+    data = nulldata[SIZE_PREFIX_BYTES:]  # strip size prefix
+    yield data
+    remaining = size - len(data)
+    begin = nulldata_index + 1
+    for out in itertools.islice(tx.txs_out, begin, begin + hash160_count):
+        segment = scripts.get_hash160data(out.script)
+        if remaining < len(segment):  # trim padding of last hash160output
+            segment = segment[:remaining]
+        remaining -= len(segment)
+        yield segment
+
+
+def _data_blob_segments(tx):
+    """Return (size, segments) of the data blob, the segments are the
+    chunks stored in the outputs trimmed to <size> bytes in total.
+    """
+    size, nulldata_index, hash160_count = _data_blob_outputs(tx)
+    return size, list(_iter_data_blob_segments(tx, size, nulldata_index,
+                                               hash160_count))
 
-    for index in range(required_hash160_outputs):
-        hash160_index = index + nulldata_index + 1
-        data += get_hash160_data(tx, hash160_index)
 
-    return data[:size]  # trim padding of last hash160output
+def get_data_blob(tx, decompress=False,
+                  max_size=compression.MAX_DECOMPRESSED_SIZE):
+    """Return the data blob of <tx> as stored. If <decompress> is set,
+    blobs stored compressed are decompressed to at most <max_size> bytes.
+    """
+    size, segments = _data_blob_segments(tx)
+    data = b"".join(segments)  # single copy of the payload
+    if not decompress:
+        return data
+    try:
+        return compression.decompress(data, max_size=max_size)
+    except ValueError:
+        raise exceptions.NoDataBlob(tx)
 
 
-def add_data_blob(tx, data, dust_limit=common.DUST_LIMIT):
+def get_data_blob_into(tx, buffer):
+    """Write the data blob into the writable <buffer> and return its size,
+    for callers that reuse buffers.
+    """
+    size, segments = _data_blob_segments(tx)
+    view = memoryview(buffer)
+    if len(view) < size:
+        raise ValueError("Buffer too small for data blob!")
+    offset = 0
+    for segment in segments:
+        view[offset:offset + len(segment)] = segment
+        offset += len(segment)
+    return size
+
+
+def add_data_blob(tx, data, dust_limit=common.DUST_LIMIT, compress=False):
+
+    if compress:  # smallest of the available codecs, always with a header
+        data = compression.compress(data)
 
     max_data_size = 2 ** (SIZE_PREFIX_BYTES * 8)
     if len(data) > max_data_size:
@@ -144,32 +247,26 @@ def add_data_blob(tx, data, dust_limit=common.DUST_LIMIT):
 
     # nulldata is sufficient
     if len(data) <= common.MAX_NULLDATA:
-        nulldata_txout = deserialize.nulldata_txout(serialize.data(data))
-        add_nulldata_output(tx, nulldata_txout)
+        add_nulldata_output(tx, deserialize.nulldata_txout_bin(data))
         return tx
 
     # prefix and initial data stored in nulldata output
     nulldata = data[:common.MAX_NULLDATA]
-    nulldata_txout = deserialize.nulldata_txout(serialize.data(nulldata))
-    add_nulldata_output(tx, nulldata_txout)
+    add_nulldata_output(tx, deserialize.nulldata_txout_bin(nulldata))
 
     # remaining data stored in hash160data outputs
     for hash160data in common.chunks(data[common.MAX_NULLDATA:], 20):
-        hexdata = serialize.data(hash160data)
-        if len(hexdata) < 40:  # last entry needs padding
-            hexdata = hexdata + '0' * (40 - len(hexdata))
-        hash160data_txout = deserialize.hash160data_txout(hexdata, dust_limit)
+        if len(hash160data) < 20:  # last entry needs padding
+            hash160data = hash160data + b"\0" * (20 - len(hash160data))
+        hash160data_txout = deserialize.hash160data_txout_bin(hash160data,
+                                                              dust_limit)
         add_hash160data_output(tx, hash160data_txout)
 
     return tx
 
 
 def _get_nulldata_output(tx):
-    for index, out in enumerate(tx.txs_out):
-        disasm = pycoin.tx.script.tools.disassemble(out.script)
-        if re.match("^OP_RETURN", disasm):
-            return index, out
-    return None, None
+    return scripts.find_nulldata_output(tx)
 
 
 def add_nulldata_output(tx, nulldata_txout):
@@ -191,6 +288,8 @@ def add_hash160data_output(tx, hash160data_txout):
 
 def get_hash160_data(tx, output_index):
     out = tx.txs_out[output_index]
+    if scripts.is_p2pkh(out.script):
+        return scripts.get_hash160data(out.script)
     opcode, data, pc = tools.get_opcode(out.script, 0)
     opcode, data, pc = tools.get_opcode(out.script, pc)
     opcode, data, pc = tools.get_opcode(out.script, pc)
@@ -201,31 +300,126 @@ def get_nulldata(tx):
     index, out = _get_nulldata_output(tx)
     if not out:
         raise exceptions.NoNulldataOutput(tx)
-    opcode, data, pc = tools.get_opcode(out.script, 0)
-    opcode, data, pc = tools.get_opcode(out.script, pc)
-    return index, data
+    return index, scripts.get_nulldata(out.script)
 
 
 def create_tx(service, testnet, txins, txouts,
-              lock_time=0, keys=None, publish=False):
+              lock_time=0, keys=None, publish=False, prevouts=None):
     tx = pycoin.tx.Tx(1, txins, txouts, lock_time)
     if keys:
-        tx = sign_tx(service, testnet, tx, keys)
+        tx = sign_tx(service, testnet, tx, keys, prevouts=prevouts)
     if publish:
         service.send_tx(tx)
     return tx
 
 
-def sign_tx(service, testnet, tx, keys):
+def prevouts_from_spendables(spendables):
+    """Return {(previous_hash, previous_index): script} for spendables."""
+    return dict(((s.tx_hash, s.tx_out_index), s.script) for s in spendables)
+
+
+def _prevout_script(service, tx, txin_idx, prevouts):
+    txin = tx.txs_in[txin_idx]
+    script = prevouts.get((txin.previous_hash, txin.previous_index))
+    if script is not None:
+        return script
+    unspents = tx.unspents or []
+    if txin_idx < len(unspents) and unspents[txin_idx] is not None:
+        return unspents[txin_idx].script  # set by add_inputs
+    utxo_tx = service.get_tx(txin.previous_hash)
+    return utxo_tx.txs_out[txin.previous_index].script
+
+
+def _hash160_lookup(secretexponents, backend):
+    """Like pycoin.tx.pay_to.build_hash160_lookup but using <backend>."""
+    lookup = {}
+    for secret_exponent in secretexponents:
+        public_pair = backend.public_pair(secret_exponent)
+        for compressed in (True, False):
+            sec = pycoin.encoding.public_pair_to_sec(public_pair,
+                                                     compressed=compressed)
+            hash160 = pycoin.encoding.hash160(sec)
+            lookup[hash160] = (secret_exponent, public_pair, compressed)
+    return lookup
+
+
+def _sign_p2pkh(engine, lookup, txin_idx, script, backend):
+    """Return the scriptSig for a pay to pubkey hash input, the same
+    pycoin would create (low s, der + hashtype byte, sec pubkey).
+    """
+    result = lookup.get(script[3:23])
+    if result is None:
+        return None
+    secret_exponent, public_pair, compressed = result
+    e = engine.digest(txin_idx, script)
+    r, s, i = backend.sign(secret_exponent, e)
+    if s + s > ecmath.N:
+        s = ecmath.N - s
+    sig = der.sigencode_der(r, s)
+    sig += struct.pack("B", pycoin.tx.SIGHASH_ALL)
+    sec = pycoin.encoding.public_pair_to_sec(public_pair,
+                                             compressed=compressed)
+    return tools.bin_script([sig, sec])
+
+
+def _sign_tx_inputs(tx, secretexponents, inputs, netcode, backend):
+    """Sign the given (txin_idx, script) inputs and return their scripts."""
+    engine = sighash.SighashEngine(tx)
+    lookup = _hash160_lookup(secretexponents, backend)
+    script_sigs = []
+    for txin_idx, script in inputs:
+        script_sig = None
+        if scripts.is_p2pkh(script):
+            script_sig = _sign_p2pkh(engine, lookup, txin_idx,
+                                     script, backend)
+        if script_sig is None:  # let pycoin handle or fail
+            tx.sign_tx_in(lookup, txin_idx, script,
+                          pycoin.tx.SIGHASH_ALL, netcode=netcode)
+            script_sig = tx.txs_in[txin_idx].script
+        script_sigs.append((txin_idx, script_sig))
+    return script_sigs
+
+
+def _sign_tx_chunk(item):
+    rawtx, inputs, secretexponents, netcode, backend_name = item
+    tx = pycoin.tx.Tx.from_bin(rawtx)
+    backend = backends.select(backend_name)
+    return _sign_tx_inputs(tx, secretexponents, inputs, netcode, backend)
+
+
+def sign_tx(service, testnet, tx, keys, prevouts=None, processes=1,
+            backend=None):
+    """Sign tx inputs with keys. Previous output scripts are taken from
+    <prevouts> ({(previous_hash, previous_index): script}) or tx.unspents
+    if known, otherwise they are fetched from the service.
+
+    The inputs can be signed by a pool of <processes> worker processes
+    (the secrets are passed to them), the result is identical because
+    SIGHASH_ALL signatures do not cover other input scripts.
+    """
+    prevouts = prevouts or {}
+    backend = backend or backends.default()
     netcode = 'XTN' if testnet else 'BTC'
     secretexponents = list(map(lambda key: key.secret_exponent(), keys))
-    lookup = pycoin.tx.pay_to.build_hash160_lookup(secretexponents)
-    for txin_idx in range(len(tx.txs_in)):
-        txin = tx.txs_in[txin_idx]
-        utxo_tx = service.get_tx(txin.previous_hash)
-        script = utxo_tx.txs_out[txin.previous_index].script
-        tx.sign_tx_in(lookup, txin_idx, script,
-                      pycoin.tx.SIGHASH_ALL, netcode=netcode)
+    inputs = [(txin_idx, _prevout_script(service, tx, txin_idx, prevouts))
+              for txin_idx in range(len(tx.txs_in))]
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(inputs))
+    if processes <= 1:
+        results = [_sign_tx_inputs(tx, secretexponents, inputs,
+                                   netcode, backend)]
+    else:
+        # one item per worker, every worker parses the tx only once
+        rawtx = tx.as_bin()
+        size = int(math.ceil(len(inputs) / float(processes)))
+        items = [(rawtx, chunk, secretexponents, netcode, backend.name)
+                 for chunk in common.chunks(inputs, size)]
+        results = common.pool_map(_sign_tx_chunk, items,
+                                  processes=processes, chunksize=1)
+    for script_sigs in results:
+        for txin_idx, script in script_sigs:
+            tx.txs_in[txin_idx].script = script
     return tx
 
 
@@ -235,15 +429,87 @@ def retrieve_utxos(service, addresses):
     return spendables
 
 
+def retrieve_utxoset(service, addresses):
+    """Like retrieve_utxos but returns a compact utxoset.UtxoSet. Services
+    providing utxos_for_address fill it without Spendable objects.
+    """
+    if not hasattr(service, "utxos_for_address"):
+        utxos = utxoset.UtxoSet(service.spendables_for_addresses(addresses))
+    else:
+        utxos = utxoset.UtxoSet()
+        for address in addresses:
+            for utxo in service.utxos_for_address(address):
+                utxos.append(*utxo)
+    utxos.sort(reverse=True)  # in place, not copied
+    return utxos
+
+
+def _largest_first(spendables, amount, fee_per_input=0):
+    selected = []
+    effective = 0
+    for spendable in spendables:  # sorted by value descending
+        if spendable.coin_value <= fee_per_input:
+            break  # this and the following are not worth their input
+        effective += spendable.coin_value - fee_per_input
+        selected.append(spendable)
+        if effective >= amount:
+            return selected
+    return spendables  # insufficient funds
+
+
+def find_spendables(service, addresses, amount,
+                    strategy=coinselect.LARGEST_FIRST, fee_per_input=0,
+                    utxo_cache=None):
+    """Return (spendables, total) covering <amount> selected with the
+    coinselect <strategy>, all utxos if they are insufficient.
+
+    With a <utxo_cache> (cache.LRUCache) the coinselect.UtxoIndex of the
+    <addresses> is kept across calls. Selecting leaves it unchanged, it is
+    only updated by update_utxo_cache once a tx is published. Utxos from
+    other transactions are only seen once it is cleared.
+    """
+    key = tuple(sorted(addresses))
+    index = utxo_cache.get(key) if utxo_cache is not None else None
+    if index is None:
+        if utxo_cache is None and strategy == coinselect.LARGEST_FIRST:
+            # nothing to keep, a sort and scan is cheaper than an index
+            spendables = retrieve_utxos(service, addresses)
+            selected = _largest_first(spendables, amount, fee_per_input)
+            return selected, sum([s.coin_value for s in selected])
+        utxos = retrieve_utxoset(service, addresses)
+        index = coinselect.UtxoIndex(utxos, presorted=True)
+        if utxo_cache is not None:
+            utxo_cache.set(key, index)
+    positions = coinselect.select(index, amount, strategy=strategy,
+                                  fee_per_input=fee_per_input)
+    if positions is None:  # insufficient funds
+        positions = range(len(index))
+    selected = index.spendables(positions)
+    return selected, sum([s.coin_value for s in selected])
+
+
+def update_utxo_cache(utxo_cache, testnet, tx):
+    """Apply published <tx> to the indexes in <utxo_cache> (see
+    find_spendables): the utxos it spends are dropped and its outputs
+    paying the addresses of an index are added to it.
+    """
+    txid = tx.hash()
+    for addresses, index in utxo_cache.items():
+        spent = [index.utxos.find(txin.previous_hash, txin.previous_index)
+                 for txin in tx.txs_in]
+        spent = [position for position in spent if position is not None]
+        owned = set(scripts.p2pkh_script(_address_to_hash160(testnet, a))
+                    for a in addresses)
+        received = [pycoin.tx.Spendable(out.coin_value, out.script, txid, i)
+                    for i, out in enumerate(tx.txs_out)
+                    if out.script in owned]
+        if spent or received:
+            utxo_cache.set(addresses, index.updated(spent, received))
+
+
 def find_txins(service, addresses, amount):
-    spendables = retrieve_utxos(service, addresses)
-    txins = []
-    total = 0
-    for spendable in spendables:
-        total += spendable.coin_value
-        txins.append(pycoin.tx.TxIn(spendable.tx_hash, spendable.tx_out_index))
-        if total >= amount:
-            return txins, total
+    spendables, total = find_spendables(service, addresses, amount)
+    txins = [pycoin.tx.TxIn(s.tx_hash, s.tx_out_index) for s in spendables]
     return txins, total
 
 
@@ -253,6 +519,22 @@ def _public_pair_to_address(testnet, public_pair, compressed):
     return _hash160_to_address(testnet, hash160)
 
 
+def create_key(testnet, master_secret=b""):
+    """Return wif of the master key create_wallet would create, the
+    public key is not needed for this so it is never derived.
+    """
+    if not master_secret:
+        master_secret = os.urandom(256)
+    assert(isinstance(master_secret, bytes))
+    digest = hmac.new(b"Bitcoin seed", master_secret, hashlib.sha512).digest()
+    secret_exponent = pycoin.encoding.from_bytes_32(digest[:32])
+    if not 0 < secret_exponent < ecmath.N:
+        raise ValueError("Invalid master secret!")
+    prefix = b'\xef' if testnet else b'\x80'
+    return pycoin.encoding.secret_exponent_to_wif(secret_exponent,
+                                                  wif_prefix=prefix)
+
+
 def create_wallet(testnet, master_secret=b""):
     if not master_secret:
         master_secret = os.urandom(256)
@@ -267,11 +549,56 @@ def _encode_varint(value):
     return f.getvalue()
 
 
+def _bitcoin_message_hasher(length):
+    hasher = hashlib.sha256(b"\x18Bitcoin Signed Message:\n")
+    hasher.update(_encode_varint(length))
+    return hasher
+
+
+def _bitcoin_message_digest(hasher):
+    return common.bytestoint(hashlib.sha256(hasher.digest()).digest())
+
+
 def _bitcoin_message_hash(data):
-    prefix = b"\x18Bitcoin Signed Message:\n"
-    varint = _encode_varint(len(data))
-    digest = pycoin.encoding.double_sha256(prefix + varint + data)
-    return common.bytestoint(digest)
+    hasher = _bitcoin_message_hasher(len(data))
+    hasher.update(data)
+    return _bitcoin_message_digest(hasher)
+
+
+def _bitcoin_message_hash_stream(fileobj, length, blocksize=2 ** 16):
+    """Hash <length> bytes read from <fileobj> in blocks."""
+    hasher = _bitcoin_message_hasher(length)
+    buf = bytearray(min(blocksize, length))
+    view = memoryview(buf)
+    remaining = length
+    while remaining > 0:
+        size = min(len(buf), remaining)
+        if hasattr(fileobj, "readinto"):  # reuse buffer, avoid copies
+            size = fileobj.readinto(view[:size])
+            block = view[:size] if size else None
+        else:
+            block = fileobj.read(size)
+            size = len(block)
+        if not size:
+            raise ValueError("Unexpected end of stream!")
+        hasher.update(block)
+        remaining -= size
+    return _bitcoin_message_digest(hasher)
+
+
+def _bitcoin_message_hash_file(path):
+    """Hash file at <path> through a read only memory map."""
+    with open(path, "rb") as fileobj:
+        length = os.fstat(fileobj.fileno()).st_size
+        if length == 0:  # empty files cannot be mapped
+            return _bitcoin_message_hash(b"")
+        mapped = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            hasher = _bitcoin_message_hasher(length)
+            hasher.update(mapped)
+            return _bitcoin_message_digest(hasher)
+        finally:
+            mapped.close()
 
 
 def _add_recovery_params(i, compressed, sigdata):
@@ -281,51 +608,66 @@ def _add_recovery_params(i, compressed, sigdata):
     return struct.pack(b">B", params) + sigdata
 
 
-def sign_data(testnet, data, key):
-    address = key.address()
-    e = _bitcoin_message_hash(data)
-    secret_exponent = key.secret_exponent()
-    G = pycoin.ecdsa.generator_secp256k1
-
+def _sign_digest(secret_exponent, compressed, e, backend):
     # sign data
-    sig = pycoin.ecdsa.sign(G, secret_exponent, e)
-    sigdata = ecdsa.util.sigencode_string(sig[0], sig[1], G.order())
+    r, s, i = backend.sign(secret_exponent, e)
+    sigdata = ecdsa.util.sigencode_string(r, s, ecmath.N)
 
     # add recovery params
-    for i in range(4):
-        for compressed in [True, False]:
-            signature = _add_recovery_params(i, compressed, sigdata)
-            if verify_signature(testnet, address, signature, data):
-                return signature
-    raise Exception("Failed to serialize signature!")
-
-
-def _recover_public_key(G, order, r, s, i, e):
-    """Recover a public key from a signature.
-    See SEC 1: Elliptic Curve Cryptography, section 4.1.6, "Public
-    Key Recovery Operation".
-    http://www.secg.org/sec1-v2.pdf
-    """
+    return _add_recovery_params(i, compressed, sigdata)
 
-    c = G.curve()
 
-    # 1.1 Let x = r + jn
-    x = r + (i // 2) * order
+def _sign_data_item(item):
+    secret_exponent, compressed, data, backend_name = item
+    e = _bitcoin_message_hash(data)
+    backend = backends.select(backend_name)
+    return _sign_digest(secret_exponent, compressed, e, backend)
 
-    # 1.3 point from x
-    alpha = (x * x * x + c.a() * x + c.b()) % c.p()
-    beta = pycoin.ecdsa.numbertheory.modular_sqrt(alpha, c.p())
-    y = beta if (beta - i) % 2 == 0 else c.p() - beta
 
-    # 1.4 Check that nR is at infinity
-    R = pycoin.ecdsa.ellipticcurve.Point(c, x, y, order)
+def sign_data_many(secret_exponent, compressed, datas, processes=1,
+                   chunksize=None, backend=None):
+    """Sign every data in <datas> with the given key, signatures are
+    returned in order. The work can be spread over a pool of
+    <processes> worker processes (the secret is passed to them).
+    """
+    backend = backend or backends.default()
+    if processes == 1:
+        return [_sign_digest(secret_exponent, compressed,
+                             _bitcoin_message_hash(data), backend)
+                for data in datas]
+    items = [(secret_exponent, compressed, data, backend.name)
+             for data in datas]
+    return common.pool_map(_sign_data_item, items, processes=processes,
+                           chunksize=chunksize)
+
+
+def sign_digest(testnet, e, key, self_check=False, backend=None):
+    """Sign bitcoin message digest <e>, see _bitcoin_message_hash."""
+    backend = backend or backends.default()
+    compressed = len(key.sec()) == 33
+    signature = _sign_digest(key.secret_exponent(), compressed, e, backend)
+    if self_check and not verify_digest(testnet, key.address(), signature,
+                                        e, backend=backend):
+        raise Exception("Failed to serialize signature!")
+    return signature
+
+
+def sign_data(testnet, data, key, self_check=False, backend=None):
+    e = _bitcoin_message_hash(data)
+    return sign_digest(testnet, e, key, self_check=self_check,
+                       backend=backend)
+
 
-    rInv = pycoin.ecdsa.numbertheory.inverse_mod(r, order)  # r^-1
-    eNeg = -e % order  # -e
+def sign_stream(testnet, fileobj, length, key, backend=None):
+    """Sign <length> bytes read from <fileobj> without loading them."""
+    e = _bitcoin_message_hash_stream(fileobj, length)
+    return sign_digest(testnet, e, key, backend=backend)
 
-    # 1.6 compute Q = r^-1 (sR - eG)
-    Q = rInv * (s * R + eNeg * G)
-    return Q
+
+def sign_file(testnet, path, key, backend=None):
+    """Sign the content of the file at <path>."""
+    e = _bitcoin_message_hash_file(path)
+    return sign_digest(testnet, e, key, backend=backend)
 
 
 def _parse_signature(sig, order):
@@ -348,33 +690,99 @@ def _parse_signature(sig, order):
     return rsdata, r, s, i, compressed
 
 
-def verify_signature(testnet, address, sig, data):
-
+def _recover_address(testnet, sig, e, backend):
+    """Return recovered (public_pair, address) or None if sig is invalid."""
     try:
-        G = pycoin.ecdsa.generator_secp256k1
-
         # parse sig data
-        order = G.order()
-        rsdata, r, s, i, compressed = _parse_signature(sig, order)
-        e = _bitcoin_message_hash(data)
+        rsdata, r, s, i, compressed = _parse_signature(sig, ecmath.N)
 
         # recover public key
-        Q = _recover_public_key(G, order, r, s, i, e)
-        public_pair = [Q.x(), Q.y()]
+        public_pair = backend.recover(r, s, i, e)
 
         # verify signature
-        if not pycoin.ecdsa.verify(G, public_pair, e, [r, s]):
+        if not backend.verify(public_pair, e, r, s):
+            return None
+
+        return public_pair, _public_pair_to_address(testnet, public_pair,
+                                                    compressed)
+    except Exception:
+        return None
+
+
+_MISSING = object()
+
+
+def verify_digest(testnet, address, sig, e, backend=None, cache=None):
+    """Verify sig of bitcoin message digest <e> by address. If a cache is
+    given, recovered (public_pair, address) results are stored in it
+    keyed by (signature, message digest, network).
+    """
+
+    try:
+        backend = backend or backends.default()
+
+        if cache is None:
+            recovered = _recover_address(testnet, sig, e, backend)
+        else:
+            cache_key = (bytes(sig), e, testnet)
+            recovered = cache.get(cache_key, _MISSING)
+            if recovered is _MISSING:
+                recovered = _recover_address(testnet, sig, e, backend)
+                cache.set(cache_key, recovered)
+
+        if recovered is None:
             return False
 
         # validate that recovered address is correct
-        recoveredaddress = _public_pair_to_address(testnet, public_pair,
-                                                   compressed)
+        public_pair, recoveredaddress = recovered
         return address == recoveredaddress
 
     except Exception:
         return False
 
 
+def verify_signature(testnet, address, sig, data, backend=None, cache=None):
+    try:
+        e = _bitcoin_message_hash(data)
+    except Exception:
+        return False
+    return verify_digest(testnet, address, sig, e, backend=backend,
+                         cache=cache)
+
+
+def verify_stream(testnet, address, sig, fileobj, length, backend=None,
+                  cache=None):
+    """Verify sig of <length> bytes read from <fileobj> by address."""
+    e = _bitcoin_message_hash_stream(fileobj, length)
+    return verify_digest(testnet, address, sig, e, backend=backend,
+                         cache=cache)
+
+
+def verify_file(testnet, address, sig, path, backend=None, cache=None):
+    """Verify sig of the content of the file at <path> by address."""
+    e = _bitcoin_message_hash_file(path)
+    return verify_digest(testnet, address, sig, e, backend=backend,
+                         cache=cache)
+
+
+def _verify_signature_item(item):
+    testnet, address, sig, data, backend_name = item
+    backend = backends.select(backend_name) if backend_name else None
+    return verify_signature(testnet, address, sig, data, backend=backend)
+
+
+def verify_signatures(testnet, items, processes=None, chunksize=None,
+                      backend=None):
+    """Verify (address, sig, data) items, results are returned in order.
+    The work is spread over a pool of <processes> worker processes.
+    """
+    backend_name = backend.name if backend else None
+    items = [(testnet, address, sig, data, backend_name)
+             for address, sig, data in items]
+    return common.pool_map(_verify_signature_item, items,
+                           processes=processes, chunksize=chunksize)
+
+
 def _take_txins(spendables, limit, max_outputs, fee):
     maxinput = limit * max_outputs + fee
     inputs = []
@@ -383,8 +791,8 @@ def _take_txins(spendables, limit, max_outputs, fee):
         if inputs_total > maxinput or not spendables:
             break
         inputs.append(spendables.pop())
-    txins = deserialize.txins(serialize.utxos(inputs))
-    return txins, inputs_total
+    txins = [s.tx_in() for s in inputs]
+    return txins, inputs_total, prevouts_from_spendables(inputs)
 
 
 def _enough_to_split(spendables, fee, limit):
@@ -407,10 +815,11 @@ def _outputs(testnet, inputs_total, fee, max_outputs, limit, key):
         txouts_cnt = txouts_total // limit
     txout_amount = txouts_total // txouts_cnt
     rounded_amount = (txouts_total - txout_amount * txouts_cnt)
+    script = scripts.p2pkh_script(_address_to_hash160(testnet, key.address()))
     txouts = []
     for i in range(txouts_cnt):
         value = txout_amount + rounded_amount if i == 0 else txout_amount
-        txouts.append(deserialize.txout(testnet, key.address(), value))
+        txouts.append(pycoin.tx.TxOut(value, script))
     assert(txouts_total == sum(list(map(lambda o: o.coin_value, txouts))))
     return txouts
 
@@ -421,10 +830,14 @@ def split_utxos(service, testnet, key, spendables, limit,
     spendables = _filter_dust(spendables, fee, limit)
     if not _enough_to_split(spendables, fee, limit):
         return []
-    txins, inputs_total = _take_txins(spendables, limit, max_outputs, fee)
+    txins, inputs_total, prevouts = _take_txins(spendables, limit,
+                                                max_outputs, fee)
     txouts = _outputs(testnet, inputs_total, fee, max_outputs, limit, key)
-    tx = create_tx(service, testnet, txins, txouts,
-                   keys=[key], publish=publish)
+    tx = create_tx(service, testnet, txins, txouts, keys=[key],
+                   prevouts=prevouts)
+    tx = cachedtx.CachedTx.from_tx(tx)  # complete, send and txid share it
+    if publish:
+        service.send_tx(tx)
 
     # recurse for remaining spendables
     return [tx.hash()] + split_utxos(service, testnet, key, spendables, limit,
@@ -432,19 +845,158 @@ def split_utxos(service, testnet, key, spendables, limit,
                                      publish=publish)
 
 
-def add_inputs(service, testnet, tx, keys, change_address=None, fee=10000):
+def add_inputs(service, testnet, tx, keys, change_address=None, fee=10000,
+               strategy=coinselect.LARGEST_FIRST, fee_per_input=0,
+               utxo_cache=None):
+    """Add inputs of <keys> selected with the coinselect <strategy> and a
+    change output. Besides <fee>, <fee_per_input> is paid per added input.
+    Other strategies than largest_first add no change output below the
+    dust limit, it is left to the fee. See find_spendables for
+    <utxo_cache>.
+    """
 
     # add inputs
     required = sum([out.coin_value for out in tx.txs_out]) + fee
     addresses = [key.address() for key in keys]
-    txins, total = find_txins(service, addresses, required)
+    spendables, total = find_spendables(service, addresses, required,
+                                        strategy=strategy,
+                                        fee_per_input=fee_per_input,
+                                        utxo_cache=utxo_cache)
+    required += len(spendables) * fee_per_input
     if total < required:
         raise exceptions.InsufficientFunds(required, total)
-    tx.txs_in += txins
+    unspents = list(tx.unspents or [])
+    unspents += [None] * (len(tx.txs_in) - len(unspents))
+    tx.txs_in += [s.tx_in() for s in spendables]
+    tx.unspents = unspents + spendables  # so signing needs no service
 
     # add change output
+    change = total - required
+    if strategy != coinselect.LARGEST_FIRST and change < common.DUST_LIMIT:
+        return tx
     change_address = change_address if change_address else addresses[0]
-    changeout = deserialize.txout(testnet, change_address, total - required)
+    changeout = deserialize.txout(testnet, change_address, change)
     tx.txs_out.append(changeout)
 
     return tx
+
+
+def _data_blob_outputs_value(size, dust_limit):
+    """Value of the hash160 outputs needed for a data blob of <size>."""
+    size += SIZE_PREFIX_BYTES
+    if size <= common.MAX_NULLDATA:
+        return 0
+    outputs = int(math.ceil((size - common.MAX_NULLDATA) / 20.0))
+    return outputs * dust_limit
+
+
+def _large_blob_manifest(data, txids):
+    manifest = binascii.unhexlify(LARGE_BLOB_KEY_VERSON_01)
+    manifest += hashlib.sha256(data).digest()
+    manifest += common.num_to_bytes(LARGE_BLOB_SIZE_BYTES, len(data))
+    return manifest + b"".join(txids)
+
+
+def _parse_large_blob_manifest(tx):
+    try:
+        manifest_size, segments = _data_blob_segments(tx)  # never compressed
+    except exceptions.NoDataBlob:
+        raise exceptions.NoLargeBlob(tx)
+    manifest = b"".join(segments)
+    if len(manifest) < LARGE_BLOB_HEADER_BYTES:
+        raise exceptions.NoLargeBlob(tx)
+    if (len(manifest) - LARGE_BLOB_HEADER_BYTES) % 32:
+        raise exceptions.NoLargeBlob(tx)
+    if manifest[:6] != binascii.unhexlify(LARGE_BLOB_KEY_VERSON_01):
+        raise exceptions.NoLargeBlob(tx)
+    digest = manifest[6:38]
+    size = common.num_from_bytes(LARGE_BLOB_SIZE_BYTES,
+                                 manifest[38:LARGE_BLOB_HEADER_BYTES])
+    txids = common.chunks(manifest[LARGE_BLOB_HEADER_BYTES:], 32)
+    return digest, size, txids
+
+
+def create_large_blob_txs(service, testnet, data, keys, change_address=None,
+                          fee=10000, dust_limit=common.DUST_LIMIT,
+                          segment_size=LARGE_BLOB_SEGMENT_SIZE):
+    """Create the signed transactions storing <data> of any size, the
+    last one being the root with the manifest (content hash, size and
+    segment txids). Each tx funds the next one through its first output,
+    so the whole chain is built in one pass from the utxos of <keys>
+    and can be published at once in the returned order.
+    """
+    if not 0 < segment_size < 2 ** (SIZE_PREFIX_BYTES * 8):
+        raise exceptions.InvalidInput("Invalid segment size!")
+    segments = common.chunks(data, segment_size)
+    max_segments = ((2 ** (SIZE_PREFIX_BYTES * 8) - 1 -
+                     LARGE_BLOB_HEADER_BYTES) // 32)
+    max_size = min(max_segments * segment_size,
+                   2 ** (LARGE_BLOB_SIZE_BYTES * 8) - 1)
+    if len(data) > max_size:
+        raise exceptions.MaxDataBlobSizeExceeded(max_size, len(data))
+
+    # value each tx consumes, the chain carries the rest
+    manifest_size = LARGE_BLOB_HEADER_BYTES + 32 * len(segments)
+    costs = [_data_blob_outputs_value(len(segment), dust_limit) + fee
+             for segment in segments]
+    costs.append(_data_blob_outputs_value(manifest_size, dust_limit) + fee)
+    chain_script = scripts.p2pkh_script(
+        _address_to_hash160(testnet, keys[0].address())
+    )
+
+    txs = []
+    for index in range(len(costs)):
+        if index < len(segments):
+            blob = segments[index]
+        else:
+            blob = _large_blob_manifest(data, [tx.hash() for tx in txs])
+        tx = pycoin.tx.Tx(1, [], [])
+        chain_value = sum(costs[index + 1:])
+        if chain_value:
+            tx.txs_out.append(pycoin.tx.TxOut(chain_value, chain_script))
+        add_data_blob(tx, blob, dust_limit=dust_limit)
+        if not txs:  # fund the chain
+            add_inputs(service, testnet, tx, keys,
+                       change_address=change_address, fee=fee)
+            sign_tx(service, testnet, tx, keys)
+        else:
+            previous_hash = txs[-1].hash()
+            tx.txs_in.append(pycoin.tx.TxIn(previous_hash, 0))
+            prevouts = {(previous_hash, 0): chain_script}
+            sign_tx(service, testnet, tx, keys[:1], prevouts=prevouts)
+        txs.append(cachedtx.CachedTx.from_tx(tx))  # complete
+    return txs
+
+
+def get_large_blob(service, tx, threads=None):
+    """Return the large blob of manifest <tx>, segments are fetched
+    concurrently and checked against the manifest as they arrive.
+    """
+    digest, size, txids = _parse_large_blob_manifest(tx)
+    txid = serialize.txid(tx.hash())
+    hasher = hashlib.sha256()
+    segments = []
+    if txids:
+        threads = threads or min(len(txids), 8)
+        pool = multiprocessing.pool.ThreadPool(threads)
+        try:
+            for segment_txid, segment_tx in zip(
+                    txids, pool.imap(service.get_tx, txids)):
+                if segment_tx.hash() != segment_txid:
+                    raise exceptions.InvalidLargeBlob(txid, "segment txid!")
+                try:
+                    segment_size, chunks = _data_blob_segments(segment_tx)
+                except exceptions.NoDataBlob:
+                    raise exceptions.InvalidLargeBlob(txid, "no segment!")
+                segment = b"".join(chunks)
+                hasher.update(segment)
+                segments.append(segment)
+        finally:
+            pool.terminate()
+            pool.join()
+    data = b"".join(segments)
+    if len(data) != size:
+        raise exceptions.InvalidLargeBlob(txid, "size!")
+    if hasher.digest() != digest:
+        raise exceptions.InvalidLargeBlob(txid, "content hash!")
+    return data
@@ -10,16 +10,20 @@ from __future__ import unicode_literals
 import base64
 from pycoin.key import Key
 from pycoin.tx.Tx import Tx
-from pycoin.serialize import b2h, h2b, h2b_rev
-from pycoin.tx.script import tools
+from pycoin.serialize import h2b, h2b_rev
 from pycoin.encoding import bitcoin_address_to_hash160_sec
 from pycoin.encoding import wif_to_secret_exponent
+from pycoin.encoding import wif_to_tuple_of_secret_exponent_compressed
 from pycoin.tx.TxOut import TxOut
 from pycoin.tx.TxIn import TxIn
 from pycoin.key import validate
 
 from . import exceptions
 from . import common
+from . import ecmath
+from . import backends
+from . import scripts
+from . import lazytx as _lazytx
 
 
 # TODO decorator to validate all io json serializable
@@ -56,6 +60,11 @@ def unsignedtx(rawtx):
     return Tx.from_hex(rawtx)
 
 
+def lazytx(rawtx):
+    """Read-only view of <rawtx> for data extraction, see lazytx.LazyTx."""
+    return _lazytx.LazyTx(binary(rawtx))
+
+
 def binary(hexdata):
     if isinstance(hexdata, bytes):
         hexdata = hexdata.decode("ascii")
@@ -111,10 +120,8 @@ def txout(testnet, target_address, value):
     target_address = address(testnet, target_address)
     value = positive_integer(value)
     prefix = b'\x6f' if testnet else b"\0"
-    hash160 = b2h(bitcoin_address_to_hash160_sec(target_address, prefix))
-    script_text = "OP_DUP OP_HASH160 %s OP_EQUALVERIFY OP_CHECKSIG" % hash160
-    script_bin = tools.compile(script_text)
-    return TxOut(value, script_bin)
+    hash160 = bitcoin_address_to_hash160_sec(target_address, prefix)
+    return TxOut(value, scripts.p2pkh_script(hash160))
 
 
 def txins(data):
@@ -125,22 +132,35 @@ def txouts(testnet, data):
     return list(map(lambda x: txout(testnet, x['address'], x['value']), data))
 
 
+def prevouts(data):
+    """Return {(previous_hash, previous_index): script} for given prevouts.
+    <data>: [{"txid" : hexdata, "index" : integer, "script" : hexdata}, ...]
+    """
+    def reformat(prevout):
+        txhash = txid(prevout['txid'])
+        index = positive_integer(prevout['index'])
+        return (txhash, index), binary(prevout['script'])
+    return dict(map(reformat, data))
+
+
 def nulldata_txout(hexdata):
-    data = binary(hexdata)
+    return nulldata_txout_bin(binary(hexdata))
+
+
+def nulldata_txout_bin(data):
     if len(data) > common.MAX_NULLDATA:
         raise exceptions.MaxNulldataExceeded(len(data), common.MAX_NULLDATA)
-    script_text = "OP_RETURN %s" % b2h(data)
-    script_bin = tools.compile(script_text)
-    return TxOut(0, script_bin)
+    return TxOut(0, scripts.nulldata_script(data))
 
 
 def hash160data_txout(hexdata, dust_limit=common.DUST_LIMIT):
-    data = binary(hexdata)
+    return hash160data_txout_bin(binary(hexdata), dust_limit=dust_limit)
+
+
+def hash160data_txout_bin(data, dust_limit=common.DUST_LIMIT):
     if len(data) != 20:  # 160 bit
         raise exceptions.InvalidHash160DataSize(len(data))
-    script_text = "OP_DUP OP_HASH160 %s OP_EQUALVERIFY OP_CHECKSIG" % b2h(data)
-    script_bin = tools.compile(script_text)
-    return TxOut(dust_limit, script_bin)
+    return TxOut(dust_limit, scripts.p2pkh_script(data))
 
 
 def secret_exponents(testnet, wifs):
@@ -148,16 +168,39 @@ def secret_exponents(testnet, wifs):
     return list(map(lambda x: wif_to_secret_exponent(x, valid_prefixes), wifs))
 
 
-def key(testnet, wif):
+class BackendKey(Key):
+    """pycoin Key whose public pair was derived by a crypto backend,
+    pycoin would use its generic (slow) point multiplication.
+    """
+
+    def __init__(self, secret_exponent, public_pair, **kwargs):
+        super(BackendKey, self).__init__(public_pair=public_pair, **kwargs)
+        self._backend_secret_exponent = secret_exponent
+
+    def secret_exponent(self):
+        return self._backend_secret_exponent
+
+
+def key(testnet, wif, backend=None):
     wif = unicode_str(wif)
     netcode = 'XTN' if testnet else 'BTC'
     if not validate.is_wif_valid(wif, allowable_netcodes=[netcode]):
         raise exceptions.InvalidWif(wif)
-    return Key.from_text(wif)
+    prefixes = [b'\xef' if testnet else b'\x80']
+    secret_exponent, compressed = wif_to_tuple_of_secret_exponent_compressed(
+        wif, prefixes
+    )
+    if not 0 < secret_exponent < ecmath.N:
+        raise exceptions.InvalidWif(wif)
+
+    backend = backend or backends.default()
+    public_pair = backend.public_pair(secret_exponent)
+    return BackendKey(secret_exponent, public_pair,
+                      prefer_uncompressed=not compressed, netcode=netcode)
 
 
-def keys(testnet, wifs):
-    return list(map(lambda wif: key(testnet, wif), wifs))
+def keys(testnet, wifs, backend=None):
+    return list(map(lambda wif: key(testnet, wif, backend=backend), wifs))
 
 
 def wallet(testnet, hwif):
@@ -0,0 +1,312 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+"""secp256k1 point arithmetic in jacobian coordinates.
+
+Points are passed in and returned as affine (x, y) tuples, None being the
+point at infinity. Internally jacobian (X, Y, Z) coordinates are used so
+no modular inverse is needed per point addition, conversion back to
+affine coordinates happens only once at the end.
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import sys
+
+
+P = 0xfffffffffffffffffffffffffffffffffffffffffffffffffffffffefffffc2f
+N = 0xfffffffffffffffffffffffffffffffebaaedce6af48a03bbfd25e8cd0364141
+B = 7  # curve y^2 = x^3 + 7, a is 0
+G = (
+    0x79be667ef9dcbbac55a06295ce870b07029bfcdb2dce28d959f2815b16f81798,
+    0x483ada7726a3c4655da4fbfc0e1108a8fd17b448a68554199c47d08ffb10d4b8
+)
+
+
+_JACOBIAN_INFINITY = (0, 1, 0)
+
+
+WINDOW_BITS = 4
+_WINDOW_MASK = (1 << WINDOW_BITS) - 1
+_WINDOWS = (N.bit_length() + WINDOW_BITS - 1) // WINDOW_BITS
+
+
+# precomputed multiples of G, built lazily see _generator_table
+_generator_table_cache = None
+
+
+def inverse_mod(a, m):
+    """Modular inverse for prime modulus m (fermat's little theorem)."""
+    return pow(a, m - 2, m)
+
+
+def _to_jacobian(point):
+    if point is None:
+        return _JACOBIAN_INFINITY
+    return (point[0], point[1], 1)
+
+
+def _to_affine(point):
+    X, Y, Z = point
+    if Z == 0:
+        return None
+    z_inv = inverse_mod(Z, P)
+    z_inv2 = (z_inv * z_inv) % P
+    return ((X * z_inv2) % P, (Y * z_inv2 * z_inv) % P)
+
+
+def _batch_to_affine(points):
+    """Convert jacobian points (none at infinity) to affine coordinates
+    with a single modular inverse (montgomery's trick).
+    """
+    products = []
+    product = 1
+    for point in points:
+        product = (product * point[2]) % P
+        products.append(product)
+    inverse = inverse_mod(product, P)
+    results = [None] * len(points)
+    for index in range(len(points) - 1, -1, -1):
+        X, Y, Z = points[index]
+        previous = products[index - 1] if index > 0 else 1
+        z_inv = (inverse * previous) % P
+        inverse = (inverse * Z) % P
+        z_inv2 = (z_inv * z_inv) % P
+        results[index] = ((X * z_inv2) % P, (Y * z_inv2 * z_inv) % P)
+    return results
+
+
+def _double(point):
+    X, Y, Z = point
+    if Y == 0 or Z == 0:
+        return _JACOBIAN_INFINITY
+    XX = (X * X) % P
+    YY = (Y * Y) % P
+    YYYY = (YY * YY) % P
+    S = (4 * X * YY) % P
+    M = (3 * XX) % P
+    X3 = (M * M - 2 * S) % P
+    Y3 = (M * (S - X3) - 8 * YYYY) % P
+    Z3 = (2 * Y * Z) % P
+    return (X3, Y3, Z3)
+
+
+def _add(p1, p2):
+    X1, Y1, Z1 = p1
+    X2, Y2, Z2 = p2
+    if Z1 == 0:
+        return p2
+    if Z2 == 0:
+        return p1
+    Z1Z1 = (Z1 * Z1) % P
+    Z2Z2 = (Z2 * Z2) % P
+    U1 = (X1 * Z2Z2) % P
+    U2 = (X2 * Z1Z1) % P
+    S1 = (Y1 * Z2 * Z2Z2) % P
+    S2 = (Y2 * Z1 * Z1Z1) % P
+    if U1 == U2:
+        if S1 != S2:
+            return _JACOBIAN_INFINITY
+        return _double(p1)
+    H = (U2 - U1) % P
+    R = (S2 - S1) % P
+    HH = (H * H) % P
+    HHH = (H * HH) % P
+    V = (U1 * HH) % P
+    X3 = (R * R - HHH - 2 * V) % P
+    Y3 = (R * (V - X3) - S1 * HHH) % P
+    Z3 = (H * Z1 * Z2) % P
+    return (X3, Y3, Z3)
+
+
+def _add_affine(p1, p2):
+    """Mixed addition of jacobian point p1 and affine point p2 (Z2 = 1)."""
+    X1, Y1, Z1 = p1
+    if Z1 == 0:
+        return (p2[0], p2[1], 1)
+    x2, y2 = p2
+    Z1Z1 = (Z1 * Z1) % P
+    U2 = (x2 * Z1Z1) % P
+    S2 = (y2 * Z1 * Z1Z1) % P
+    if X1 == U2:
+        if Y1 != S2:
+            return _JACOBIAN_INFINITY
+        return _double(p1)
+    H = (U2 - X1) % P
+    R = (S2 - Y1) % P
+    HH = (H * H) % P
+    HHH = (H * HH) % P
+    V = (X1 * HH) % P
+    X3 = (R * R - HHH - 2 * V) % P
+    Y3 = (R * (V - X3) - Y1 * HHH) % P
+    Z3 = (H * Z1) % P
+    return (X3, Y3, Z3)
+
+
+def is_on_curve(point):
+    x, y = point
+    return 0 <= x < P and 0 <= y < P and (y * y - x * x * x - B) % P == 0
+
+
+def _window_table(point):
+    """Return [None, 1 * point, 2 * point, ... 15 * point] in affine."""
+    multiples = [_to_jacobian(point)]
+    for index in range(_WINDOW_MASK - 1):
+        multiples.append(_add_affine(multiples[-1], point))
+    return [None] + _batch_to_affine(multiples)
+
+
+def _multiply_jacobian(k, point):
+    """Fixed window multiplication, returns k * point in jacobian."""
+    table = _window_table(point)
+    result = _JACOBIAN_INFINITY
+    for window in range(_WINDOWS - 1, -1, -1):
+        for index in range(WINDOW_BITS):
+            result = _double(result)
+        digit = (k >> (window * WINDOW_BITS)) & _WINDOW_MASK
+        if digit:
+            result = _add_affine(result, table[digit])
+    return result
+
+
+def _generator_table():
+    """Precomputed table with row i holding j * 2^(4 * i) * G for every
+    4 bit digit j, so multiplying G only needs one addition per digit
+    and no doublings. Built once per process on first use.
+    """
+    global _generator_table_cache
+    if _generator_table_cache is None:
+        points = []
+        base = _to_jacobian(G)
+        for window in range(_WINDOWS):
+            point = base
+            for digit in range(_WINDOW_MASK):
+                points.append(point)
+                point = _add(point, base)
+            base = point  # 16 * base
+        points = _batch_to_affine(points)
+        table = []
+        for window in range(_WINDOWS):
+            begin = window * _WINDOW_MASK
+            table.append([None] + points[begin:begin + _WINDOW_MASK])
+        _generator_table_cache = table
+    return _generator_table_cache
+
+
+def precompute_generator_table():
+    """Build the generator table now instead of on first use, call at
+    import or server start to keep the build cost off the first request.
+    """
+    _generator_table()
+
+
+def generator_table_size():
+    """Approximate memory footprint of the generator table in bytes,
+    0 if it was not built yet.
+    """
+    table = _generator_table_cache
+    if table is None:
+        return 0
+    size = sys.getsizeof(table)
+    for row in table:
+        size += sys.getsizeof(row)
+        for point in row[1:]:
+            size += sys.getsizeof(point)
+            size += sys.getsizeof(point[0]) + sys.getsizeof(point[1])
+    return size
+
+
+def _multiply_generator_jacobian(k):
+    result = _JACOBIAN_INFINITY
+    for row in _generator_table():
+        digit = k & _WINDOW_MASK
+        if digit:
+            result = _add_affine(result, row[digit])
+        k >>= WINDOW_BITS
+    return result
+
+
+def multiply_generator(k):
+    """Return k * G using the precomputed generator table."""
+    k = k % N
+    if k == 0:
+        return None
+    return _to_affine(_multiply_generator_jacobian(k))
+
+
+def multiply(k, point):
+    """Return k * point."""
+    k = k % N
+    if k == 0 or point is None:
+        return None
+    return _to_affine(_multiply_jacobian(k, point))
+
+
+def multiply_add(u1, u2, point):
+    """Return u1 * G + u2 * point. The G part comes from the generator
+    table and needs no doublings, so only the windowed multiplication
+    of point pays for a doubling chain.
+    """
+    u1 = u1 % N
+    u2 = u2 % N
+    result = _multiply_generator_jacobian(u1)
+    if u2:
+        result = _add(result, _multiply_jacobian(u2, point))
+    return _to_affine(result)
+
+
+def recovery_point(r, i):
+    """Return the point R for signature value r and recovery parameter i.
+    See SEC 1: Elliptic Curve Cryptography, section 4.1.6, "Public
+    Key Recovery Operation", steps 1.1 to 1.4.
+    http://www.secg.org/sec1-v2.pdf
+    """
+
+    # 1.1 Let x = r + jn
+    x = r + (i // 2) * N
+    if x >= P:
+        raise ValueError("Invalid recovery parameter!")
+
+    # 1.3 point from x, p = 3 mod 4 so the square root is a single pow
+    alpha = (x * x * x + B) % P
+    beta = pow(alpha, (P + 1) // 4, P)
+    if (beta * beta) % P != alpha:
+        raise ValueError("Invalid signature r value!")
+    y = beta if (beta - i) % 2 == 0 else P - beta
+
+    # 1.4 nR is at infinity for every point, secp256k1 has cofactor 1
+    return (x, y)
+
+
+def recover_public_pair(r, s, i, e):
+    """Recover a public key from a signature.
+    See SEC 1: Elliptic Curve Cryptography, section 4.1.6, "Public
+    Key Recovery Operation".
+    http://www.secg.org/sec1-v2.pdf
+    """
+    R = recovery_point(r, i)
+
+    # 1.6 compute Q = r^-1 (sR - eG) = (-e * r^-1) G + (s * r^-1) R
+    r_inv = inverse_mod(r, N)
+    Q = multiply_add(-e * r_inv, s * r_inv, R)
+    if Q is None:
+        raise ValueError("Recovered public key at infinity!")
+    return Q
+
+
+def verify(public_pair, e, r, s):
+    """Verify ecdsa signature (r, s) of e for the given public pair."""
+    if r < 1 or r > N - 1:
+        return False
+    if s < 1 or s > N - 1:
+        return False
+    if not is_on_curve(public_pair):
+        return False
+    w = inverse_mod(s, N)
+    point = multiply_add(e * w, r * w, public_pair)
+    if point is None:
+        return False
+    return point[0] % N == r
@@ -87,8 +87,29 @@ class MaxDataBlobSizeExceeded(Exception):
         super(MaxDataBlobSizeExceeded, self).__init__(msg)
 
 
+class MaxDecompressedSizeExceeded(Exception):
+
+    def __init__(self, max_size):
+        msg = "Max decompressed size of '{0}' bytes exceeded!"
+        super(MaxDecompressedSizeExceeded, self).__init__(msg.format(max_size))
+
+
 class NoBroadcastMessage(Exception):
     
     def __init__(self, tx):
         msg = "No broadcast message stored in tx '%s'!" % tx.as_hex()
         super(NoBroadcastMessage, self).__init__(msg)
+
+
+class NoLargeBlob(Exception):
+
+    def __init__(self, tx):
+        msg = "No large blob manifest stored in tx '%s'!" % tx.as_hex()
+        super(NoLargeBlob, self).__init__(msg)
+
+
+class InvalidLargeBlob(Exception):
+
+    def __init__(self, txid, reason):
+        msg = "Invalid large blob '%s': %s" % (txid, reason)
+        super(InvalidLargeBlob, self).__init__(msg)
@@ -0,0 +1,221 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+"""Persistent local index of stored payloads.
+
+Payloads found by the scanner or retrieved over the network are recorded
+in an SQLite database, so they can be looked up by txid, content hash,
+data type prefix or sender address without going back to the chain.
+Queries iterate over database cursors, so memory stays bounded no matter
+how many rows are stored. An index holds the payloads of one network,
+it is bound to the first network used with it.
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import sqlite3
+import hashlib
+import itertools
+from . import scanner
+from . import exceptions
+from . import compression
+
+
+PREFIX_BYTES = 6  # size of the data type keys
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS payloads (
+    txid TEXT NOT NULL,
+    output_begin INTEGER NOT NULL,
+    output_end INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    hash BLOB NOT NULL,
+    prefix BLOB NOT NULL,
+    address TEXT,
+    signature BLOB,
+    height INTEGER,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (txid, output_begin, kind)
+);
+CREATE INDEX IF NOT EXISTS payloads_hash ON payloads (hash);
+CREATE INDEX IF NOT EXISTS payloads_prefix ON payloads (prefix, kind);
+CREATE INDEX IF NOT EXISTS payloads_address ON payloads (address);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+_COLUMNS = ("txid", "output_begin", "output_end", "kind", "hash", "prefix",
+            "address", "signature", "height", "payload")
+
+
+def _prefix_upper_bound(prefix):
+    """Smallest value greater than every value starting with <prefix>,
+    None if there is none (prefix is all 0xff).
+    """
+    values = bytearray(prefix)
+    while values and values[-1] == 0xff:
+        values.pop()
+    if not values:
+        return None
+    values[-1] += 1
+    return bytes(values)
+
+
+def _network(testnet):
+    return "testnet" if testnet else "mainnet"
+
+
+def _entry(result, height):
+    """Entry for add_many from a decode_tx result."""
+    txid, output_begin, output_end, kind, payload = result
+    if kind == scanner.BROADCAST:
+        return (txid, output_begin, output_end, kind,
+                payload["message"].encode("utf-8"), payload["address"],
+                payload["signature"], height)
+    return (txid, output_begin, output_end, kind, payload, None, None,
+            height)
+
+
+class PayloadIndex(object):
+
+    def __init__(self, path=":memory:", testnet=None):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+        sql = "SELECT value FROM meta WHERE key = 'network'"
+        row = self.connection.execute(sql).fetchone()
+        self.testnet = None if row is None else row[0] == _network(True)
+        if testnet is not None:
+            self.use_network(testnet)
+
+    def use_network(self, testnet):
+        """Bind the index to the network of <testnet> if not bound yet.
+        Raises exceptions.InvalidInput if it holds the other network.
+        """
+        testnet = bool(testnet)
+        if self.testnet is None:
+            sql = "INSERT INTO meta VALUES ('network', ?)"
+            with self.connection:
+                self.connection.execute(sql, [_network(testnet)])
+            self.testnet = testnet
+        elif self.testnet != testnet:
+            raise exceptions.InvalidInput("Index holds {0} payloads!".format(
+                _network(self.testnet)
+            ))
+
+    def close(self):
+        self.connection.close()
+
+    def _row(self, txid, output_begin, output_end, kind, payload,
+             address=None, signature=None, height=None):
+        return (txid, output_begin, output_end, kind,
+                sqlite3.Binary(hashlib.sha256(payload).digest()),
+                sqlite3.Binary(payload[:PREFIX_BYTES]), address,
+                None if signature is None else sqlite3.Binary(signature),
+                height, sqlite3.Binary(payload))
+
+    def add_many(self, entries, batch_size=10000):
+        """Add (txid, output_begin, output_end, kind, payload, address,
+        signature, height) entries, inserted in transactions of
+        <batch_size> rows. Existing entries are kept. Returns the number
+        of entries processed.
+        """
+        sql = "INSERT OR IGNORE INTO payloads VALUES ({0})".format(
+            ", ".join("?" * len(_COLUMNS))
+        )
+        entries = iter(entries)
+        count = 0
+        while True:
+            batch = [self._row(*entry)
+                     for entry in itertools.islice(entries, batch_size)]
+            if not batch:
+                return count
+            with self.connection:  # one transaction per batch
+                self.connection.executemany(sql, batch)
+            count += len(batch)
+
+    def add(self, txid, output_begin, output_end, kind, payload,
+            address=None, signature=None, height=None):
+        self.add_many([(txid, output_begin, output_end, kind, payload,
+                        address, signature, height)])
+
+    def add_tx(self, testnet, tx, height=None, kinds=scanner.KINDS,
+               max_message_size=compression.MAX_DECOMPRESSED_SIZE):
+        """Add the payloads of <tx>, returns the number of them."""
+        self.use_network(testnet)
+        results = scanner.decode_tx(testnet, tx, kinds=kinds,
+                                    max_message_size=max_message_size)
+        return self.add_many(_entry(result, height) for result in results)
+
+    def add_scan_results(self, results, heights=None, batch_size=10000,
+                         testnet=None):
+        """Add (block_hash, txid, output_begin, output_end, kind, payload)
+        results of the scanner. <heights> maps block hashes to heights
+        (for example from the block index of the node), payloads of blocks
+        not in it are added without a height. If <testnet> is given the
+        index is bound to the scanned network, see use_network.
+        """
+        if testnet is not None:
+            self.use_network(testnet)
+        heights = heights or {}
+        entries = (_entry(result[1:], heights.get(result[0]))
+                   for result in results)
+        return self.add_many(entries, batch_size=batch_size)
+
+    def _query(self, where, args):
+        sql = "SELECT {0} FROM payloads WHERE {1} ORDER BY txid, " \
+              "output_begin".format(", ".join(_COLUMNS), where)
+        for row in self.connection.execute(sql, args):
+            entry = dict(zip(_COLUMNS, row))
+            for column in ("hash", "prefix", "signature", "payload"):
+                if entry[column] is not None:
+                    entry[column] = bytes(entry[column])
+            yield entry
+
+    def _kind_filter(self, where, args, kind):
+        if kind is None:
+            return where, args
+        return where + " AND kind = ?", args + [kind]
+
+    def by_txid(self, txid, kind=None):
+        """Iterate over the entries of <txid> (hex)."""
+        return self._query(*self._kind_filter("txid = ?", [txid], kind))
+
+    def by_hash(self, payload_hash, kind=None):
+        """Iterate over the entries with the sha256 <payload_hash>."""
+        where, args = "hash = ?", [sqlite3.Binary(payload_hash)]
+        return self._query(*self._kind_filter(where, args, kind))
+
+    def by_prefix(self, prefix, kind=None):
+        """Iterate over the entries whose payload starts with <prefix>
+        (at most PREFIX_BYTES long), for example a data type key.
+        """
+        if len(prefix) > PREFIX_BYTES:
+            raise exceptions.InvalidInput("Prefix too long!")
+        where, args = "prefix >= ?", [sqlite3.Binary(prefix)]
+        upper = _prefix_upper_bound(prefix)
+        if upper is not None:
+            where, args = where + " AND prefix < ?", args + [
+                sqlite3.Binary(upper)]
+        return self._query(*self._kind_filter(where, args, kind))
+
+    def by_address(self, address):
+        """Iterate over the broadcast messages sent by <address>."""
+        return self._query("address = ?", [address])
+
+    def get(self, txid, kind):
+        """Return the first entry of <txid> with <kind> or None."""
+        for entry in self.by_txid(txid, kind=kind):
+            return entry
+        return None
+
+    def count(self):
+        sql = "SELECT COUNT(*) FROM payloads"
+        return self.connection.execute(sql).fetchone()[0]
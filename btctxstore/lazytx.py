@@ -0,0 +1,162 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+"""Lazy read-only transaction view.
+
+Reading stored data only looks at the outputs of a tx, but Tx.from_hex
+parses every input script and sequence first. LazyTx wraps the raw bytes,
+indexes the input and output boundaries on first access and only builds
+TxOut objects for the outputs that are requested. It can be given to the
+read paths of control (get_nulldata, get_data_blob, ...) in place of a Tx.
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import struct
+import binascii
+import pycoin
+from pycoin.encoding import double_sha256
+
+
+def read_varint(data, pos):
+    """Return (value, next position) of the varint at <pos>."""
+    prefix = data[pos]
+    if not isinstance(prefix, int):  # python 2 buffers give bytes
+        prefix = ord(prefix)
+    if prefix < 0xfd:
+        return prefix, pos + 1
+    fmt, size = {0xfd: ("<H", 2), 0xfe: ("<L", 4), 0xff: ("<Q", 8)}[prefix]
+    return struct.unpack(fmt, data[pos + 1:pos + 1 + size])[0], pos + 1 + size
+
+
+class _LazyOutputs(object):
+    """Sequence of the outputs of a LazyTx, built on access."""
+
+    def __init__(self, tx, boundaries):
+        self._tx = tx
+        self._boundaries = boundaries
+        self._outputs = {}
+
+    def __len__(self):
+        return len(self._boundaries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Output index out of range!")
+        out = self._outputs.get(index)
+        if out is None:
+            begin, end = self._boundaries[index]
+            out = self._tx._txout(begin, end)
+            self._outputs[index] = out
+        return out
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class LazyTx(object):
+
+    def __init__(self, data):
+        self._data = data
+        self._view = memoryview(data)
+        self._inputs = None  # (begin, end) of every input
+        self._outputs = None  # (begin, end) of every output
+        self._segments = None  # (begin, end) of the tx without witness data
+        self._txs_out = None
+        self._hash = None
+
+    def _parse(self, segwit):
+        """Return (inputs, outputs, segments) or raise ValueError."""
+        view = self._view
+        try:
+            pos = 6 if segwit else 4  # version, marker and flag
+            body = pos
+            inputs = []
+            count, pos = read_varint(view, pos)
+            for index in range(count):
+                begin = pos
+                size, pos = read_varint(view, pos + 36)  # prev hash, index
+                pos += size + 4  # script and sequence
+                inputs.append((begin, pos))
+            outputs = []
+            count, pos = read_varint(view, pos)
+            for index in range(count):
+                begin = pos
+                size, pos = read_varint(view, pos + 8)  # value
+                pos += size
+                outputs.append((begin, pos))
+            body_end = pos
+            if segwit:
+                for index in range(len(inputs)):  # one witness per input
+                    items, pos = read_varint(view, pos)
+                    for item in range(items):
+                        size, pos = read_varint(view, pos)
+                        pos += size
+        except (IndexError, KeyError, struct.error):
+            raise ValueError("Invalid transaction!")
+        if pos + 4 != len(view):
+            raise ValueError("Invalid transaction!")
+        if segwit:
+            segments = [(0, 4), (body, body_end), (pos, pos + 4)]
+        else:
+            segments = [(0, len(view))]
+        return inputs, outputs, segments
+
+    def _index(self):
+        if self._outputs is not None:
+            return
+        try:
+            result = self._parse(False)
+        except ValueError:
+            # a tx without inputs also starts with 0x00 0x01 after the
+            # version, so the witness format is only tried second
+            if self._view[4:6].tobytes() != b"\x00\x01":
+                raise
+            result = self._parse(True)
+        self._inputs, self._outputs, self._segments = result
+
+    def _txout(self, begin, end):
+        coin_value = struct.unpack("<Q", self._view[begin:begin + 8])[0]
+        size, pos = read_varint(self._view, begin + 8)
+        return pycoin.tx.TxOut(coin_value, self._view[pos:end].tobytes())
+
+    @property
+    def txs_out(self):
+        if self._txs_out is None:
+            self._index()
+            self._txs_out = _LazyOutputs(self, self._outputs)
+        return self._txs_out
+
+    def input_count(self):
+        self._index()
+        return len(self._inputs)
+
+    def as_bin(self):
+        return self._view.tobytes()
+
+    def as_hex(self):
+        return binascii.hexlify(self.as_bin()).decode("ascii")
+
+    def hash(self):
+        if self._hash is None:
+            self._index()
+            self._hash = double_sha256(b"".join(
+                self._view[begin:end].tobytes()
+                for begin, end in self._segments
+            ))
+        return self._hash
+
+    def id(self):
+        return binascii.hexlify(self.hash()[::-1]).decode("ascii")
+
+    def to_tx(self):
+        """Fully parse into a pycoin Tx."""
+        return pycoin.tx.Tx.from_bin(self.as_bin())
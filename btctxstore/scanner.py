@@ -0,0 +1,222 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+"""Offline scanner for payloads stored in raw block files.
+
+Reads Bitcoin Core blk*.dat files (or any buffer of raw block records)
+through mmap. Transactions are only located and their output scripts
+looked at, a tx with a nulldata output is decoded as a LazyTx (inputs are
+skipped) and broadcast messages are only decoded (signature check) if the
+data blob starts with the broadcast message key.
+
+Block files are not ordered by height, so results carry the hash of their
+block, heights can be looked up from it (see PayloadIndex.add_scan_results).
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import io
+import os
+import mmap
+import struct
+import binascii
+from pycoin.encoding import double_sha256
+from pycoin.serialize import b2h_rev
+from . import common
+from . import control
+from . import serialize
+from . import exceptions
+from . import lazytx
+from . import compression
+
+
+MAGIC_MAINNET = binascii.unhexlify("f9beb4d9")
+MAGIC_TESTNET = binascii.unhexlify("0b110907")
+BLOCK_HEADER_BYTES = 80
+
+
+NULLDATA = "nulldata"
+BLOB = "blob"
+BROADCAST = "broadcast"
+KINDS = (NULLDATA, BLOB, BROADCAST)
+
+
+_read_varint = lazytx.read_varint
+
+
+def _locate_tx(data, pos):
+    """Locate the tx at <pos> without parsing it. Returns (end, segments,
+    has_nulldata) with segments being the (begin, end) ranges forming the
+    tx without witness data, the end being the start of the next tx.
+    """
+    begin = pos
+    pos += 4  # version
+    segwit = data[pos:pos + 2] == b"\x00\x01"  # marker and flag
+    if segwit:
+        pos += 2
+    body = pos
+    count, pos = _read_varint(data, pos)
+    for index in range(count):
+        pos += 36  # previous hash and index
+        size, pos = _read_varint(data, pos)
+        pos += size + 4  # script and sequence
+    count, pos = _read_varint(data, pos)
+    has_nulldata = False
+    for index in range(count):
+        pos += 8  # value
+        size, pos = _read_varint(data, pos)
+        if size and data[pos:pos + 1] == b"\x6a":  # OP_RETURN
+            has_nulldata = True
+        pos += size
+    if not segwit:
+        return pos + 4, [(begin, pos + 4)], has_nulldata
+    body_end = pos
+    count = _read_varint(data, body)[0]  # one witness per input
+    for index in range(count):
+        items, pos = _read_varint(data, pos)
+        for item in range(items):
+            size, pos = _read_varint(data, pos)
+            pos += size
+    segments = [(begin, begin + 4), (body, body_end), (pos, pos + 4)]
+    return pos + 4, segments, has_nulldata
+
+
+def iter_blocks(data, magic=MAGIC_MAINNET):
+    """Yield (begin, end) of every block in a buffer of block records
+    (magic, size, block). Stops at zero padding or a truncated record.
+    """
+    pos = 0
+    while pos + 8 <= len(data):
+        if data[pos:pos + 4] != magic:
+            break  # preallocated zeros at the end of blk files
+        size = struct.unpack("<L", data[pos + 4:pos + 8])[0]
+        if pos + 8 + size > len(data):
+            break
+        yield pos + 8, pos + 8 + size
+        pos += 8 + size
+
+
+def block_hash(data, begin):
+    """Hash (hex) of the block whose header starts at <begin>."""
+    header = data[begin:begin + BLOCK_HEADER_BYTES]
+    return b2h_rev(double_sha256(bytes(header)))
+
+
+def iter_candidate_txs(data, magic=MAGIC_MAINNET):
+    """Yield (block_hash, rawtx) with the bytes (without witness data) of
+    every tx with a nulldata output, other transactions are skipped
+    without being parsed.
+    """
+    view = memoryview(data)
+    try:
+        for begin, end in iter_blocks(data, magic=magic):
+            count, pos = _read_varint(view, begin + BLOCK_HEADER_BYTES)
+            blockhash = None  # only hashed if the block has payloads
+            for index in range(count):
+                pos, segments, has_nulldata = _locate_tx(view, pos)
+                if has_nulldata:
+                    if blockhash is None:
+                        blockhash = block_hash(view, begin)
+                    yield blockhash, b"".join(view[a:b].tobytes()
+                                              for a, b in segments)
+    finally:
+        if hasattr(view, "release"):  # so a mmap can be closed, python 3
+            view.release()
+
+
+def decode_tx(testnet, tx, kinds=KINDS,
+              max_message_size=compression.MAX_DECOMPRESSED_SIZE):
+    """Yield (txid, output_begin, output_end, kind, payload) for the
+    payloads of <tx>, using the decoders in control. Payloads are stored
+    in the outputs <output_begin> to <output_end> (exclusive). Broadcast
+    messages decompressing to more than <max_message_size> bytes are
+    skipped.
+    """
+    try:
+        index, nulldata = control.get_nulldata(tx)
+    except (exceptions.NoNulldataOutput, ValueError):
+        return
+    txid = serialize.txid(tx.hash())
+    if NULLDATA in kinds:
+        yield txid, index, index + 1, NULLDATA, nulldata
+    if BLOB not in kinds and BROADCAST not in kinds:
+        return
+    try:
+        size, segments = control._data_blob_segments(tx)
+    except exceptions.NoDataBlob:
+        return
+    blob = b"".join(segments)
+    end = index + len(segments)  # first segment is in the nulldata
+    if BLOB in kinds:
+        yield txid, index, end, BLOB, blob
+    key = binascii.unhexlify(control.BROADCAST_MESSAGE_KEY_VERSON_01)
+    if BROADCAST in kinds and blob[:len(key)] == key:  # prefilter
+        try:
+            message = control.get_broadcast_message(
+                testnet, tx, max_size=max_message_size
+            )
+        except exceptions.NoBroadcastMessage:
+            return
+        yield txid, index, end, BROADCAST, message
+
+
+def scan(data, testnet=False, magic=None, kinds=KINDS,
+         max_message_size=compression.MAX_DECOMPRESSED_SIZE):
+    """Yield (block_hash, txid, output_begin, output_end, kind, payload)
+    for every nulldata, data blob and valid broadcast message in a buffer
+    of block records, see decode_tx.
+    """
+    magic = magic or (MAGIC_TESTNET if testnet else MAGIC_MAINNET)
+    candidates = iter_candidate_txs(data, magic=magic)
+    try:
+        for blockhash, rawtx in candidates:
+            tx = lazytx.LazyTx(rawtx)
+            for result in decode_tx(testnet, tx, kinds=kinds,
+                                    max_message_size=max_message_size):
+                yield (blockhash,) + result
+    finally:
+        candidates.close()
+
+
+def scan_file(path, testnet=False, magic=None, kinds=KINDS,
+              max_message_size=compression.MAX_DECOMPRESSED_SIZE):
+    """Scan a blk*.dat file, see scan."""
+    with io.open(path, "rb") as fileobj:
+        if os.fstat(fileobj.fileno()).st_size == 0:
+            return
+        data = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        results = scan(data, testnet=testnet, magic=magic, kinds=kinds,
+                       max_message_size=max_message_size)
+        try:
+            for result in results:
+                yield result
+        finally:
+            results.close()
+            data.close()
+
+
+def _scan_file_item(item):
+    path, testnet, magic, kinds, max_message_size = item
+    return list(scan_file(path, testnet=testnet, magic=magic, kinds=kinds,
+                          max_message_size=max_message_size))
+
+
+def scan_files(paths, testnet=False, magic=None, kinds=KINDS,
+               processes=None,
+               max_message_size=compression.MAX_DECOMPRESSED_SIZE):
+    """Scan blk*.dat files with a pool of <processes> worker processes,
+    one file per task. Results are yielded in file order as the files
+    are done, so only the results of files not yet consumed are kept.
+    """
+    items = [(path, testnet, magic, kinds, max_message_size)
+             for path in paths]
+    results = common.pool_imap(_scan_file_item, items, processes=processes)
+    try:
+        for file_results in results:
+            for result in file_results:
+                yield result
+    finally:
+        results.close()
@@ -0,0 +1,142 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+"""Byte level creation and inspection of the output scripts used.
+
+Scripts are built from precompiled template bytes and inspected
+directly instead of going through text (tools.compile/disassemble),
+which is the dominant cost when encoding or decoding many transactions.
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import struct
+import six
+
+
+OP_0 = 0x00
+OP_PUSHDATA1 = 0x4c
+OP_PUSHDATA2 = 0x4d
+OP_PUSHDATA4 = 0x4e
+OP_1 = 0x51
+OP_16 = 0x60
+OP_RETURN = 0x6a
+OP_DUP = 0x76
+OP_EQUALVERIFY = 0x88
+OP_HASH160 = 0xa9
+OP_CHECKSIG = 0xac
+
+
+_P2PKH_PREFIX = struct.pack("BBB", OP_DUP, OP_HASH160, 20)
+_P2PKH_SUFFIX = struct.pack("BB", OP_EQUALVERIFY, OP_CHECKSIG)
+
+
+def push_data(data):
+    """Return the script bytes pushing <data>, the same as pycoin's
+    tools.bin_script([data]).
+    """
+    size = len(data)
+    if size == 0:
+        return struct.pack("B", OP_0)
+    if size == 1 and six.indexbytes(data, 0) <= 16:
+        value = six.indexbytes(data, 0)
+        return struct.pack("B", OP_1 + value - 1 if value else OP_0)
+    if size < OP_PUSHDATA1:
+        return struct.pack("B", size) + data
+    if size <= 0xff:
+        return struct.pack("<BB", OP_PUSHDATA1, size) + data
+    if size <= 0xffff:
+        return struct.pack("<BH", OP_PUSHDATA2, size) + data
+    return struct.pack("<BL", OP_PUSHDATA4, size) + data
+
+
+def p2pkh_script(hash160):
+    """Return the pay to pubkey hash script for the 20 byte <hash160>."""
+    assert(len(hash160) == 20)
+    return _P2PKH_PREFIX + hash160 + _P2PKH_SUFFIX
+
+
+def nulldata_script(data):
+    """Return an OP_RETURN script pushing <data>, nothing is pushed for
+    empty data.
+    """
+    script = struct.pack("B", OP_RETURN)
+    return script + push_data(data) if data else script
+
+
+def get_push_data(script, pc):
+    """Return (data, pc) for the push opcode at <pc>, data is None if the
+    opcode does not push data. OP_1 to OP_16 give their single byte
+    value as written by pycoin's write_push_data.
+    """
+    opcode = six.indexbytes(script, pc)
+    pc += 1
+    if OP_1 <= opcode <= OP_16:
+        return struct.pack("B", opcode - OP_1 + 1), pc
+    if opcode > OP_PUSHDATA4:
+        return None, pc
+    if opcode < OP_PUSHDATA1:
+        size = opcode
+    else:
+        fmt = {OP_PUSHDATA1: "<B", OP_PUSHDATA2: "<H", OP_PUSHDATA4: "<L"}
+        length = struct.calcsize(fmt[opcode])
+        if len(script) < pc + length:
+            raise ValueError("Unexpected end of script data!")
+        size, = struct.unpack(fmt[opcode], script[pc:pc + length])
+        pc += length
+    data = script[pc:pc + size]
+    if len(data) < size:
+        raise ValueError("Unexpected end of script data!")
+    return data, pc + size
+
+
+def is_nulldata(script):
+    return script[:1] == struct.pack("B", OP_RETURN)
+
+
+def is_p2pkh(script):
+    return (len(script) == 25 and script[:3] == _P2PKH_PREFIX and
+            script[23:] == _P2PKH_SUFFIX)
+
+
+def get_nulldata(script):
+    """Return the data pushed after OP_RETURN, b"" if nothing is pushed."""
+    if len(script) == 1:
+        return b""
+    data, pc = get_push_data(script, 1)
+    return b"" if data is None else data
+
+
+def get_hash160data(script):
+    """Return the 20 byte hash160 of a pay to pubkey hash script."""
+    return script[3:23]
+
+
+def find_nulldata_output(tx):
+    """Return (index, output) of the first nulldata output or (None, None)."""
+    for index, out in enumerate(tx.txs_out):
+        if is_nulldata(out.script):
+            return index, out
+    return None, None
+
+
+def find_data_outputs(tx):
+    """Return (nulldata_index, nulldata, hash160datas) in one pass, with
+    hash160datas being the payloads of the consecutive pay to pubkey
+    hash outputs directly following the nulldata output.
+    (None, None, []) if the tx has no nulldata output.
+    """
+    nulldata_index, nulldata, hash160datas = None, None, []
+    for index, out in enumerate(tx.txs_out):
+        if nulldata_index is None:
+            if is_nulldata(out.script):
+                nulldata_index = index
+                nulldata = get_nulldata(out.script)
+        elif is_p2pkh(out.script):
+            hash160datas.append(get_hash160data(out.script))
+        else:
+            break
+    return nulldata_index, nulldata, hash160datas
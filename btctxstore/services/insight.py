@@ -1,6 +1,5 @@
 import json
 import logging
-import io
 from future.moves.urllib.parse import urlencode
 from future.moves.urllib.request import urlopen
 from future.moves.urllib.error import HTTPError
@@ -8,7 +7,7 @@ from pycoin.block import BlockHeader
 from pycoin.convention import btc_to_satoshi
 from pycoin.encoding import double_sha256
 from pycoin.merkle import merkle
-from pycoin.serialize import b2h, b2h_rev, h2b, h2b_rev
+from pycoin.serialize import b2h_rev, h2b, h2b_rev
 from pycoin.tx import Spendable, Tx
 from btctxstore.services.interface import BlockchainService
 
@@ -82,15 +81,17 @@ class Insight(BlockchainService):
             else:
                 raise ex
 
-    def spendables_for_address(self, bitcoin_address):
+    def utxos_for_address(self, bitcoin_address):
         url = "{0}/addr/{1}/utxo".format(self.base_url, bitcoin_address)
         result = json.loads(urlopen(url).read().decode("utf8"))
+        return ((h2b_rev(utxo["txid"]), utxo["vout"],
+                 btc_to_satoshi(str(utxo["amount"])),
+                 h2b(utxo["scriptPubKey"])) for utxo in result)
+
+    def spendables_for_address(self, bitcoin_address):
         spendables = []
-        for utxo in result:
-            value = btc_to_satoshi(str(utxo["amount"]))
-            prev_index = utxo["vout"]
-            prev_hash = h2b_rev(utxo["txid"])
-            script = h2b(utxo["scriptPubKey"])
+        for prev_hash, prev_index, value, script in \
+                self.utxos_for_address(bitcoin_address):
             spendable = Spendable(value, script, prev_hash, prev_index)
             spendables.append(spendable)
         return spendables
@@ -107,9 +108,7 @@ class Insight(BlockchainService):
         if self.dryrun:
             return
         # TODO: make this handle errors better
-        s = io.BytesIO()
-        tx.stream(s)
-        tx_as_hex = b2h(s.getvalue())
+        tx_as_hex = tx.as_hex()  # memoized for CachedTx
         data = urlencode(dict(rawtx=tx_as_hex)).encode("utf8")
         url = "%s/tx/send" % self.base_url
         try:
@@ -42,6 +42,15 @@ class BlockchainService(object):
         """TODO doc string"""
         raise NotImplementedError()
 
+    def utxos_for_address(self, bitcoin_address):
+        """Retrieve the utxos of <bitcoin_address> and return an iterator
+        over their (tx_hash, tx_out_index, coin_value, script) tuples, so
+        they can be collected without a Spendable per utxo.
+        """
+        spendables = self.spendables_for_address(bitcoin_address)
+        return ((s.tx_hash, s.tx_out_index, s.coin_value, s.script)
+                for s in spendables)
+
     def spendables_for_addresses(self, bitcoin_addresses):
         spendables = []
         for addr in bitcoin_addresses:
@@ -0,0 +1,92 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+"""Legacy (pre segwit) signature hashes without reserializing the tx.
+
+pycoin's Tx.signature_hash builds and serializes a copy of the whole
+transaction for every input, so signing n inputs costs O(n^2) python
+object work. The preimages of all inputs only differ in the script of
+the input being signed, so the shared segments are serialized once and
+every preimage is hashed from them.
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import io
+import struct
+import hashlib
+from pycoin.encoding import from_bytes_32
+from pycoin.serialize.bitcoin_streamer import stream_struct
+from pycoin.tx.script import tools
+from pycoin.tx.script import opcodes
+
+
+SIGHASH_ALL = 1
+
+
+def _stream_bytes(fmt, *args):
+    f = io.BytesIO()
+    stream_struct(fmt, f, *args)
+    return f.getvalue()
+
+
+class SighashEngine(object):
+    """SIGHASH_ALL signature hashes for the inputs of a transaction.
+
+    Only the input scripts may change after creation, they are blanked
+    in every preimage anyway.
+    """
+
+    def __init__(self, tx):
+        self.tx = tx
+        self._prefix = _stream_bytes("LI", tx.version, len(tx.txs_in))
+        blanks = []
+        self._offsets = [0]
+        for txin in tx.txs_in:
+            blanks.append(_stream_bytes("#LSL", txin.previous_hash,
+                                        txin.previous_index, b'',
+                                        txin.sequence))
+            self._offsets.append(self._offsets[-1] + len(blanks[-1]))
+        self._blanks = memoryview(b"".join(blanks))
+        outputs = io.BytesIO()
+        stream_struct("I", outputs, len(tx.txs_out))
+        for txout in tx.txs_out:
+            txout.stream(outputs)
+        stream_struct("L", outputs, tx.lock_time)
+        self._suffix = outputs.getvalue()
+        self._prefix_hasher = hashlib.sha256(self._prefix)
+
+    def _signed_input(self, index, script):
+        txin = self.tx.txs_in[index]
+        script = tools.delete_subscript(
+            script, struct.pack("B", opcodes.OP_CODESEPARATOR)
+        )
+        return _stream_bytes("#LSL", txin.previous_hash, txin.previous_index,
+                             script, txin.sequence)
+
+    def preimage(self, index, script, hash_type=SIGHASH_ALL):
+        """Return the serialized preimage for input <index>."""
+        begin, end = self._offsets[index], self._offsets[index + 1]
+        return b"".join([
+            self._prefix, self._blanks[:begin].tobytes(),
+            self._signed_input(index, script), self._blanks[end:].tobytes(),
+            self._suffix, struct.pack("<L", hash_type)
+        ])
+
+    def digest(self, index, script, hash_type=SIGHASH_ALL):
+        """Return the signature hash of input <index> as integer, equal
+        to tx.signature_hash(script, index, hash_type).
+        """
+        if hash_type != SIGHASH_ALL:
+            return self.tx.signature_hash(script, index, hash_type)
+        begin, end = self._offsets[index], self._offsets[index + 1]
+        hasher = self._prefix_hasher.copy()
+        hasher.update(self._blanks[:begin])
+        hasher.update(self._signed_input(index, script))
+        hasher.update(self._blanks[end:])
+        hasher.update(self._suffix)
+        hasher.update(struct.pack("<L", hash_type))
+        return from_bytes_32(hashlib.sha256(hasher.digest()).digest())
@@ -0,0 +1,56 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+from btctxstore import serialize
+from btctxstore import deserialize
+from btctxstore import control
+from btctxstore import backends
+
+
+class Signer(object):
+    """Sign many messages with one private key. The wif is parsed and the
+    address, compression flag and secret exponent derived only once.
+    Use BtcTxStore.create_signer to create.
+    """
+
+    def __init__(self, testnet, wif, backend=None):
+        self.testnet = deserialize.flag(testnet)
+        self.backend = backend or backends.default()
+        key = deserialize.key(self.testnet, wif, backend=self.backend)
+        self.address = key.address()
+        self.compressed = len(key.sec()) == 33
+        self._secret_exponent = key.secret_exponent()
+
+    def get_address(self):
+        """Return bitcoin address of the signing key."""
+        return self.address
+
+    def sign_data(self, hexdata):
+        """Signing <hexdata>, same as BtcTxStore.sign_data."""
+        data = deserialize.binary(hexdata)
+        return self._sign([data], 1)[0]
+
+    def sign_unicode(self, message):
+        """Signing <unicode>, same as BtcTxStore.sign_unicode."""
+        return self.sign_many([message], processes=1)[0]
+
+    def sign_many(self, messages, processes=1):
+        """Signing list of <unicode> messages, returns signatures in the
+        same order. If <processes> is not 1 the work is spread over a
+        pool of worker processes, None for one per cpu.
+        """
+        datas = [deserialize.unicode_str(m).encode("utf-8") for m in messages]
+        return self._sign(datas, processes)
+
+    def _sign(self, datas, processes):
+        if processes is not None:
+            processes = deserialize.positive_integer(processes)
+        sigdatas = control.sign_data_many(
+            self._secret_exponent, self.compressed, datas,
+            processes=processes, backend=self.backend
+        )
+        return list(map(serialize.signature, sigdatas))
@@ -0,0 +1,219 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+"""Memory compact set of unspent outputs.
+
+Values and output indexes are kept in array columns, txids in one packed
+buffer and scripts are interned, so wallets with 100k+ utxos (mostly paying
+the same few addresses) do not need a Spendable object per utxo. Sorting,
+selection and slicing work on the columns, Spendable objects and json
+dicts are only built on demand.
+
+Memory per utxo for 100k utxos of one address (examples/utxoset_memory.py,
+python 3.10 64bit): about 49 bytes for a UtxoSet, about 265 bytes for a
+list of pycoin Spendables and about 450 bytes for their json dicts.
+"""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import array
+from pycoin.tx.Spendable import Spendable
+from pycoin.serialize import b2h, b2h_rev
+
+
+TXID_BYTES = 32
+
+
+def _typecode(candidates, itemsize):
+    for typecode in candidates:
+        try:
+            if array.array(typecode).itemsize >= itemsize:
+                return typecode
+        except ValueError:  # "q" and "Q" missing in python 2
+            continue
+    raise ValueError("No array typecode with {0} bytes!".format(itemsize))
+
+
+_VALUE = _typecode(["q", "l"], 8)  # satoshis
+_INDEX = _typecode(["I", "L"], 4)  # output index and script id
+
+
+def _take_txids(txids, positions):
+    """Packed txids of <positions>, copied without per utxo objects."""
+    source = memoryview(txids)
+    result = bytearray(len(positions) * TXID_BYTES)
+    begin = 0
+    for position in positions:
+        offset = position * TXID_BYTES
+        result[begin:begin + TXID_BYTES] = source[offset:offset + TXID_BYTES]
+        begin += TXID_BYTES
+    return result
+
+
+class UtxoSet(object):
+    """Utxos as columns, indexing gives a Spendable and slicing a UtxoSet."""
+
+    def __init__(self, spendables=None, scripts=None):
+        self.values = array.array(_VALUE)
+        self.indexes = array.array(_INDEX)
+        self.script_ids = array.array(_INDEX)
+        self.txids = bytearray()
+        # interned scripts, may be shared with sets taken from this one
+        self.scripts, self._script_ids = scripts or ([], {})
+        for spendable in (spendables or []):
+            self.append(spendable.tx_hash, spendable.tx_out_index,
+                        spendable.coin_value, spendable.script)
+
+    def _intern(self, script):
+        script_id = self._script_ids.get(script)
+        if script_id is None:
+            script_id = len(self.scripts)
+            self.scripts.append(script)
+            self._script_ids[script] = script_id
+        return script_id
+
+    def _empty(self):
+        return UtxoSet(scripts=(self.scripts, self._script_ids))
+
+    def append(self, tx_hash, tx_out_index, coin_value, script):
+        if len(tx_hash) != TXID_BYTES:
+            raise ValueError("Invalid txid size!")
+        self.values.append(coin_value)
+        self.indexes.append(tx_out_index)
+        self.script_ids.append(self._intern(script))
+        self.txids.extend(tx_hash)
+
+    def insert(self, position, tx_hash, tx_out_index, coin_value, script):
+        if len(tx_hash) != TXID_BYTES:
+            raise ValueError("Invalid txid size!")
+        self.values.insert(position, coin_value)
+        self.indexes.insert(position, tx_out_index)
+        self.script_ids.insert(position, self._intern(script))
+        begin = position * TXID_BYTES
+        self.txids[begin:begin] = tx_hash
+
+    def find(self, tx_hash, tx_out_index):
+        """Position of the utxo <tx_hash>:<tx_out_index> or None, the
+        packed txids are searched as one buffer.
+        """
+        begin = self.txids.find(tx_hash)
+        while begin != -1:
+            position = begin // TXID_BYTES
+            if (begin % TXID_BYTES == 0 and
+                    self.indexes[position] == tx_out_index):
+                return position
+            begin = self.txids.find(tx_hash, begin + 1)
+        return None
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return self.take(range(start, stop, step))
+            result = self._empty()
+            result.values = self.values[start:stop]
+            result.indexes = self.indexes[start:stop]
+            result.script_ids = self.script_ids[start:stop]
+            result.txids = self.txids[start * TXID_BYTES:stop * TXID_BYTES]
+            return result
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("Utxo index out of range!")
+        return self.spendable(key)
+
+    def __iter__(self):
+        return self.spendables()
+
+    def tx_hash(self, position):
+        begin = position * TXID_BYTES
+        return bytes(self.txids[begin:begin + TXID_BYTES])
+
+    def script(self, position):
+        return self.scripts[self.script_ids[position]]
+
+    def total(self):
+        return sum(self.values)
+
+    def spendable(self, position):
+        return Spendable(self.values[position], self.script(position),
+                         self.tx_hash(position), self.indexes[position])
+
+    def spendables(self, positions=None):
+        """Iterate over Spendables of <positions> (default all)."""
+        positions = range(len(self)) if positions is None else positions
+        for position in positions:
+            yield self.spendable(position)
+
+    def dicts(self):
+        """Iterate over the utxos in the format of serialize.utxos."""
+        for position in range(len(self)):
+            yield {
+                "txid": b2h_rev(self.tx_hash(position)),
+                "index": self.indexes[position],
+                "value": self.values[position],
+                "script": b2h(self.script(position))
+            }
+
+    def take(self, positions):
+        """Return a UtxoSet of the utxos at <positions> in that order."""
+        positions = list(positions)
+        result = self._empty()
+        result.values = array.array(_VALUE,
+                                    map(self.values.__getitem__, positions))
+        result.indexes = array.array(_INDEX,
+                                     map(self.indexes.__getitem__, positions))
+        result.script_ids = array.array(
+            _INDEX, map(self.script_ids.__getitem__, positions)
+        )
+        result.txids = _take_txids(self.txids, positions)
+        return result
+
+    def without(self, positions):
+        """Return a UtxoSet without the utxos at <positions>, the others
+        keep their order and are copied in runs between the positions.
+        """
+        result = self._empty()
+        begin = 0
+        for end in sorted(set(positions)) + [len(self)]:
+            result.values.extend(self.values[begin:end])
+            result.indexes.extend(self.indexes[begin:end])
+            result.script_ids.extend(self.script_ids[begin:end])
+            result.txids.extend(self.txids[begin * TXID_BYTES:
+                                           end * TXID_BYTES])
+            begin = end + 1
+        return result
+
+    def order(self, reverse=False):
+        """Positions (array) sorted by value, ties keep their order."""
+        return array.array(_INDEX, sorted(range(len(self)),
+                                          key=self.values.__getitem__,
+                                          reverse=reverse))
+
+    def sorted(self, reverse=False):
+        """Return a UtxoSet sorted by value."""
+        return self.take(self.order(reverse=reverse))
+
+    def sort(self, reverse=False):
+        """Sort by value in place like sorted, the columns are replaced one
+        at a time so the set is never held twice.
+        """
+        order = self.order(reverse=reverse)
+        self.values = array.array(_VALUE, map(self.values.__getitem__, order))
+        self.indexes = array.array(_INDEX,
+                                   map(self.indexes.__getitem__, order))
+        self.script_ids = array.array(_INDEX,
+                                      map(self.script_ids.__getitem__, order))
+        self.txids = _take_txids(self.txids, order)
+
+    def select(self, predicate):
+        """Positions (array) of the utxos whose value matches <predicate>."""
+        return array.array(_INDEX, (position for position, value
+                                    in enumerate(self.values)
+                                    if predicate(value)))
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import time
+import random
+from pycoin.tx import Tx
+from pycoin.tx import TxOut
+from pycoin.tx.Spendable import Spendable
+from btctxstore import BtcTxStore
+from btctxstore import cache
+from btctxstore import coinselect
+from btctxstore import control
+from btctxstore import deserialize
+from btctxstore import scripts
+
+
+class Service(object):  # utxos in memory, like a service that was queried
+
+    def __init__(self, spendables):
+        self.spendables = spendables
+
+    def spendables_for_addresses(self, addresses):
+        return list(self.spendables)
+
+
+api = BtcTxStore(testnet=True)
+key = deserialize.key(True, api.create_key())
+script = scripts.p2pkh_script(control._address_to_hash160(True,
+                                                          key.address()))
+rng = random.Random(0)
+max_rounds = 10
+
+
+def send(service, target, strategy, utxo_cache=None):
+    """Time control.add_inputs as used by every send, with a cache the
+    send is also applied to it as publishing would.
+    """
+    tx = Tx(1, [], [TxOut(target, script)])
+    begin = time.time()
+    control.add_inputs(service, True, tx, [key], fee=10000,
+                       strategy=strategy, fee_per_input=150,
+                       utxo_cache=utxo_cache)
+    if utxo_cache is not None:
+        control.update_utxo_cache(utxo_cache, True, tx)
+    return time.time() - begin, len(tx.txs_in)
+
+
+for count in [10, 1000, 100000]:
+    spendables = [Spendable(rng.randint(1000, 10 ** 7), script,
+                            os.urandom(32), 0) for i in range(count)]
+    service = Service(spendables)
+    total = sum(s.coin_value for s in spendables)
+    rounds = min(max_rounds, count // 2)  # cached sends spend the utxos
+    targets = [rng.randint(10 ** 4, min(5 * 10 ** 7, total // (4 * rounds)))
+               for i in range(rounds)]  # typical payments, funds to spare
+
+    print("utxos:", count)
+    for strategy in sorted(coinselect.STRATEGIES):
+        elapsed = inputs = 0
+        for target in targets:  # utxos retrieved and selected every send
+            seconds, added = send(service, target, strategy)
+            elapsed, inputs = elapsed + seconds, inputs + added
+        print("  {0}: {1:.6f}s per send, {2:.1f} inputs".format(
+            strategy, elapsed / rounds, float(inputs) / rounds
+        ))
+
+        utxo_cache = cache.LRUCache(1)  # index kept across sends
+        first, added = send(service, targets[0], strategy, utxo_cache)
+        elapsed, inputs = 0, added
+        for target in targets[1:]:
+            seconds, added = send(service, target, strategy, utxo_cache)
+            elapsed, inputs = elapsed + seconds, inputs + added
+        print("  {0} cached: {1:.6f}s first send, {2:.6f}s per later send, "
+              "{3:.1f} inputs".format(strategy, first,
+                                      elapsed / (rounds - 1),
+                                      float(inputs) / rounds))
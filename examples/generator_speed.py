@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import time
+from pycoin.encoding import from_bytes_32
+from btctxstore import ecmath
+
+
+scalars = [from_bytes_32(os.urandom(32)) for i in range(100)]
+
+begin = time.time()
+ecmath.precompute_generator_table()  # usually done at import/server start
+print("table build:", time.time() - begin)
+print("table size:", ecmath.generator_table_size(), "bytes")
+
+begin = time.time()
+plain = [ecmath.multiply(k, ecmath.G) for k in scalars]
+plain_time = time.time() - begin
+
+begin = time.time()
+table = [ecmath.multiply_generator(k) for k in scalars]
+table_time = time.time() - begin
+
+assert(plain == table)
+print("plain:", plain_time)
+print("table:", table_time)
+print("speedup:", plain_time / table_time)
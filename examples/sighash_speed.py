@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import time
+import struct
+import pycoin
+from pycoin.tx import Tx
+from pycoin.tx import TxIn
+from pycoin.tx import TxOut
+from pycoin.serialize import h2b
+from btctxstore import sighash
+
+
+script = h2b("76a914f4131906b10615a61af347c56f1223ddc214f95c88ac")
+
+
+for inputs in [10, 100, 1000]:
+    txins = [TxIn(struct.pack(">I", i) * 8, i) for i in range(inputs)]
+    tx = Tx(1, txins, [TxOut(100000, script)], 0)
+
+    begin = time.time()
+    legacy = [tx.signature_hash(script, i, pycoin.tx.SIGHASH_ALL)
+              for i in range(inputs)]
+    legacy_time = time.time() - begin
+
+    begin = time.time()
+    engine = sighash.SighashEngine(tx)
+    cached = [engine.digest(i, script) for i in range(inputs)]
+    engine_time = time.time() - begin
+
+    assert(legacy == cached)
+    print("inputs:", inputs)
+    print("  signature_hash:", legacy_time, legacy_time / inputs, "per input")
+    print("  engine:", engine_time, engine_time / inputs, "per input")
+    print("  speedup:", legacy_time / engine_time)
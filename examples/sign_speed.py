@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import time
+import base64
+import pycoin
+import ecdsa
+from btctxstore import BtcTxStore
+from btctxstore import control
+from btctxstore import deserialize
+
+
+def legacy_sign_data(testnet, data, key):
+    """Previous implementation, trial verifies all recovery params."""
+    address = key.address()
+    e = control._bitcoin_message_hash(data)
+    G = pycoin.ecdsa.generator_secp256k1
+    sig = pycoin.ecdsa.sign(G, key.secret_exponent(), e)
+    sigdata = ecdsa.util.sigencode_string(sig[0], sig[1], G.order())
+    for i in range(4):
+        for compressed in [True, False]:
+            signature = control._add_recovery_params(i, compressed, sigdata)
+            if control.verify_signature(testnet, address, signature, data):
+                return signature
+    raise Exception("Failed to serialize signature!")
+
+
+api = BtcTxStore(testnet=True, dryrun=True)  # use testing setup for example
+wif = api.create_key()  # create new private key
+key = deserialize.key(api.testnet, wif)
+message = "Signed ünicöde message."
+data = message.encode("utf-8")
+rounds = 10
+
+begin = time.time()
+for i in range(rounds):
+    legacy = legacy_sign_data(api.testnet, data, key)
+legacy_time = time.time() - begin
+
+begin = time.time()
+for i in range(rounds):
+    signature = api.sign_unicode(wif, message)
+sign_unicode_time = time.time() - begin
+
+assert(base64.b64decode(signature) == legacy)
+print("legacy:", legacy_time)
+print("sign_unicode:", sign_unicode_time)
+print("speedup:", legacy_time / sign_unicode_time)
@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import time
+from btctxstore import BtcTxStore
+
+
+api = BtcTxStore(testnet=True, dryrun=True)  # use testing setup for example
+wif = api.create_key()  # create new private key
+messages = ["Signed ünicöde message {0}.".format(i) for i in range(1000)]
+
+begin = time.time()
+expected = [api.sign_unicode(wif, message) for message in messages]
+per_call = time.time() - begin
+print("sign_unicode: {0:.0f} msg/s".format(len(messages) / per_call))
+
+signer = api.create_signer(wif)
+for processes in [1, None]:  # single process, one worker per cpu
+    begin = time.time()
+    signatures = signer.sign_many(messages, processes=processes)
+    elapsed = time.time() - begin
+    assert(signatures == expected)
+    print("sign_many(processes={0}): {1:.0f} msg/s".format(
+        processes, len(messages) / elapsed
+    ))
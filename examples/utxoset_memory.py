@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import gc
+import time
+import struct
+import tracemalloc
+from pycoin.tx.Spendable import Spendable
+from pycoin.serialize import h2b
+from btctxstore import control
+from btctxstore import serialize
+from btctxstore import utxoset
+from btctxstore.services.interface import BlockchainService
+
+
+script = h2b("76a914f4131906b10615a61af347c56f1223ddc214f95c88ac")
+count = 100000
+
+
+def measure(name, build):
+    gc.collect()
+    begin = time.time()
+    build()
+    elapsed = time.time() - begin  # tracemalloc slows allocations down
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print("{0}: {1:.0f} bytes per utxo, {2:.3f}s".format(
+        name, float(size) / count, elapsed
+    ))
+    return result
+
+
+class Service(BlockchainService):  # utxos as decoded from a service reply
+
+    def __init__(self, replies):
+        super(Service, self).__init__(testnet=True)
+        self.replies = replies
+
+    def spendables_for_address(self, bitcoin_address):
+        return [Spendable(value, script, tx_hash, index)
+                for tx_hash, index, value in self.replies[bitcoin_address]]
+
+    def utxos_for_address(self, bitcoin_address):
+        return ((tx_hash, index, value, script)
+                for tx_hash, index, value in self.replies[bitcoin_address])
+
+
+def measure_peak(name, retrieve):
+    gc.collect()
+    tracemalloc.start()
+    result = retrieve()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{0}: {1:.0f} bytes per utxo, peak {2:.0f}".format(
+        name, float(size) / count, float(peak) / count
+    ))
+    return result
+
+
+values = [struct.unpack("<L", os.urandom(4))[0] for i in range(count)]
+spendables = measure("spendables", lambda: [
+    Spendable(value, script, os.urandom(32), i % 4)
+    for i, value in enumerate(values)
+])
+measure("json dicts", lambda: serialize.utxos(spendables))
+utxos = measure("utxoset", lambda: utxoset.UtxoSet(spendables))
+measure("sorted spendables", lambda: sorted(
+    spendables, key=lambda s: s.coin_value, reverse=True
+))
+measure("sorted utxoset", lambda: utxos.sorted(reverse=True))
+
+addresses = ["a", "b", "c", "d"]
+replies = dict((address, [(os.urandom(32), i, values[i])
+                          for i in range(n, count, len(addresses))])
+               for n, address in enumerate(addresses))
+service = Service(replies)
+measure_peak("retrieve_utxos", lambda: control.retrieve_utxos(
+    service, addresses
+))
+measure_peak("retrieve_utxoset", lambda: control.retrieve_utxoset(
+    service, addresses
+))
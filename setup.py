@@ -32,6 +32,7 @@ setup(
     test_suite="tests",
     install_requires=open("requirements.txt").readlines(),
     tests_require=[],  # use `pip install -r test_requirements.txt`
+    extras_require={"native": ["coincurve"]},
     zip_safe=False,
     classifiers=[
         # "Development Status :: 1 - Planning",
@@ -7,3 +7,7 @@ from . import get_key  # NOQA
 from . import validate_wallet  # NOQA
 from . import verify_signature  # NOQA
 from . import other  # NOQA
+from . import sign_stream  # NOQA
+from . import create_signer  # NOQA
+from . import large_blob  # NOQA
+from . import open_data_blob  # NOQA
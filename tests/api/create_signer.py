@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import json
+import binascii
+import unittest
+from btctxstore import BtcTxStore
+from btctxstore import exceptions
+fixtures = json.load(open("tests/fixtures.json"))
+
+
+class TestCreateSigner(unittest.TestCase):
+
+    def setUp(self):
+        self.api = BtcTxStore(dryrun=True, testnet=True)
+        self.wif = fixtures["wallet"]["wif"]
+        self.signer = self.api.create_signer(self.wif)
+        self.messages = [u"üöä", u"testmessage", u"", u"f483"]
+
+    def test_address(self):
+        self.assertEqual(self.signer.get_address(),
+                         fixtures["wallet"]["address"])
+
+    def test_sign_data(self):
+        data = binascii.hexlify(b"testmessage")
+        self.assertEqual(self.signer.sign_data(data),
+                         self.api.sign_data(self.wif, data))
+
+    def test_sign_many(self):
+        expected = [self.api.sign_unicode(self.wif, m) for m in self.messages]
+        for processes in [1, 2]:
+            result = self.signer.sign_many(self.messages, processes=processes)
+            self.assertEqual(result, expected)
+
+    def test_invalid_wif(self):
+        mainnet_wif = BtcTxStore(dryrun=True).create_key()
+        self.assertRaises(exceptions.InvalidWif, self.api.create_signer,
+                          mainnet_wif)
+
+
+if __name__ == '__main__':
+    unittest.main()
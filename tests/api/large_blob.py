@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import binascii
+import unittest
+from btctxstore import BtcTxStore
+from btctxstore import exceptions
+from btctxstore import compression
+from btctxstore import deserialize
+from btctxstore import control
+from .. import helpers
+
+
+class TestLargeBlob(unittest.TestCase):
+
+    def setUp(self):
+        self.api = BtcTxStore(testnet=True)
+        self.wif = helpers.WALLET_WIF
+        self.api.service = helpers.Service(helpers.make_spendables([10 ** 8]))
+
+    def test_store_retrieve(self):
+        hexdata = binascii.hexlify(os.urandom(1000)).decode("ascii")
+        txid = self.api.store_large_blob(hexdata, [self.wif],
+                                         segment_size=300)
+        self.assertEqual(len(self.api.service.txs), 5)  # 4 segments + root
+        self.assertEqual(self.api.retrieve_large_blob(txid), hexdata)
+        self.assertEqual(self.api.retrieve_large_blob(txid, threads=1),
+                         hexdata)
+
+    def test_data_like_compressed(self):
+        data = compression._header(compression.ZLIB) + os.urandom(600)
+        hexdata = binascii.hexlify(data).decode("ascii")
+        txid = self.api.store_large_blob(hexdata, [self.wif],
+                                         segment_size=300)
+        self.assertEqual(self.api.retrieve_large_blob(txid), hexdata)
+
+    def test_chain_is_funded(self):
+        data = os.urandom(500)
+        key = deserialize.key(True, self.wif)
+        txs = control.create_large_blob_txs(self.api.service, True, data,
+                                            [key], segment_size=200)
+        for previous, tx in zip(txs, txs[1:]):
+            self.assertEqual(tx.txs_in[0].previous_hash, previous.hash())
+            tx.set_unspents([previous.txs_out[0]])
+            self.assertEqual(tx.bad_signature_count(), 0)
+            self.assertEqual(tx.fee(), 10000)
+
+    def test_empty(self):
+        txid = self.api.store_large_blob("", [self.wif])
+        self.assertEqual(self.api.retrieve_large_blob(txid), "")
+
+    def test_not_a_large_blob(self):
+        txid = self.api.store_data_blob("f483", [self.wif])
+        self.assertRaises(exceptions.NoLargeBlob,
+                          self.api.retrieve_large_blob, txid)
+
+    def test_tampered_segment(self):
+        hexdata = binascii.hexlify(os.urandom(100)).decode("ascii")
+        txid = self.api.store_large_blob(hexdata, [self.wif],
+                                         segment_size=50)
+        txs = self.api.service.txs
+        segment_hash = [h for h in txs if h != deserialize.txid(txid)][0]
+        tampered = deserialize.tx(txs[segment_hash].as_hex())
+        tampered.txs_out[0].coin_value += 1
+        txs[segment_hash] = tampered
+        self.assertRaises(exceptions.InvalidLargeBlob,
+                          self.api.retrieve_large_blob, txid)
+
+
+if __name__ == '__main__':
+    unittest.main()
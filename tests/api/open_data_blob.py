@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import io
+import os
+import shutil
+import hashlib
+import unittest
+from pycoin.tx import TxOut
+from btctxstore import BtcTxStore
+from btctxstore import exceptions
+from btctxstore import control
+from btctxstore import blobio
+from btctxstore import serialize
+from .. import helpers
+
+
+class TestOpenDataBlob(unittest.TestCase):
+
+    def setUp(self):
+        self.api = BtcTxStore(dryrun=True, testnet=True)
+
+    def test_read(self):
+        for size in [0, 1, 38, 39, 100, 2 ** 16 - 1]:
+            data = os.urandom(size)
+            tx = helpers.make_blob_tx(data)
+            self.api.service = helpers.Service(txs=[tx])
+            fileobj = self.api.open_data_blob(serialize.txid(tx.hash()))
+            self.assertEqual(fileobj.read(), data)
+            self.assertEqual(fileobj.read(), b"")
+
+    def test_read_chunks(self):
+        data = os.urandom(5000)
+        fileobj = blobio.DataBlobReader(helpers.make_blob_tx(data))
+        hasher = hashlib.sha256()
+        while True:
+            chunk = fileobj.read(7)
+            if not chunk:
+                break
+            hasher.update(chunk)
+        self.assertEqual(hasher.digest(), hashlib.sha256(data).digest())
+        self.assertEqual(fileobj.tell(), len(data))
+
+    def test_extracted_on_read(self):
+        data = os.urandom(5000)
+        tx = helpers.make_blob_tx(data)
+        fileobj = blobio.DataBlobReader(tx)
+        self.assertEqual(fileobj.read(100), data[:100])
+        tx.txs_out[-1] = TxOut(1000, helpers.wallet_script())  # not read yet
+        rest = fileobj.read()
+        self.assertEqual(rest[:-20], data[100:-20])
+        self.assertNotEqual(rest[-20:], data[-20:])
+
+    def test_copyfileobj(self):
+        data = os.urandom(3000)
+        fileobj = blobio.DataBlobReader(helpers.make_blob_tx(data))
+        output = io.BytesIO()
+        shutil.copyfileobj(fileobj, output, 512)
+        self.assertEqual(output.getvalue(), data)
+
+    def test_no_data_blob(self):
+        tx = helpers.make_tx()
+        self.assertRaises(exceptions.NoDataBlob, blobio.DataBlobReader, tx)
+        tx = helpers.make_blob_tx(os.urandom(100))
+        del tx.txs_out[-1]
+        self.assertRaises(exceptions.NoDataBlob, blobio.DataBlobReader, tx)
+
+    def test_same_validation_as_get_data_blob(self):
+        data = os.urandom(100)
+        tx = helpers.make_blob_tx(data)
+        tx.txs_out.insert(2, TxOut(1000, b"\x51"))  # breaks the p2pkh run
+        tx.txs_out.append(TxOut(1000, tx.txs_out[3].script))
+        self.assertRaises(exceptions.NoDataBlob, control.get_data_blob, tx)
+        self.assertRaises(exceptions.NoDataBlob, blobio.DataBlobReader, tx)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,9 +8,14 @@ from __future__ import print_function
 from __future__ import unicode_literals
 import json
 import binascii
+import struct
 import unittest
+from pycoin.tx.Spendable import Spendable
 from btctxstore import BtcTxStore
 from btctxstore import exceptions
+from btctxstore import deserialize
+from btctxstore import control
+from .. import helpers
 fixtures = json.load(open("tests/fixtures.json"))
 
 
@@ -64,6 +69,16 @@ class TestIO(unittest.TestCase):
         data_out = self.api.get_data_blob(rawtx)
         self.assertEqual(data_in, data_out)
 
+    def test_get_data_blob_into(self):
+        data = binascii.unhexlify("f483" * 30 + "beef" * 31)
+        tx = control.add_data_blob(deserialize.tx(self.api.create_tx()), data)
+        buffer = bytearray(len(data) + 10)
+        size = control.get_data_blob_into(tx, buffer)
+        self.assertEqual(size, len(data))
+        self.assertEqual(bytes(buffer[:size]), data)
+        self.assertRaises(ValueError, control.get_data_blob_into,
+                          tx, bytearray(len(data) - 1))
+
     def test_readwrite_broadcast_message(self):
         message = u"Ünicode test massage"
         sender_wif = fixtures["wallet"]["wif"]
@@ -90,6 +105,19 @@ class TestIO(unittest.TestCase):
                                                     hex_message)
         self.assertTrue(valid_signature)
 
+    def test_broadcast_message_size_limit(self):
+        message = u"Ünicode test massage " * 100
+        sender_wif = fixtures["wallet"]["wif"]
+        rawtx = self.api.create_tx()
+        rawtx = self.api.add_broadcast_message(rawtx, message, sender_wif)
+        size = len(message.encode("utf-8"))
+        api = BtcTxStore(dryrun=True, testnet=True, max_message_size=size)
+        self.assertEqual(api.get_broadcast_message(rawtx)["message"], message)
+        api = BtcTxStore(dryrun=True, testnet=True,
+                         max_message_size=size - 1)
+        self.assertRaises(exceptions.NoBroadcastMessage,
+                          api.get_broadcast_message, rawtx)
+
     def test_only_one_nulldata_output(self):
         def callback():
             rawtx = self.api.create_tx()
@@ -156,6 +184,64 @@ class TestSignTx(unittest.TestCase):
         result = self.api.sign_tx(rawtx, wifs)
         self.assertEqual(result, expected)
 
+    def test_sign_tx_prevouts(self):
+        txins = fixtures["sign_tx"]["txins"]
+        txouts = fixtures["sign_tx"]["txouts"]
+        wifs = fixtures["sign_tx"]["wifs"]
+        expected = fixtures["sign_tx"]["expected"]
+        prevouts = [{
+            "txid": txins[0]["txid"], "index": txins[0]["index"],
+            "script": "76a914f4131906b10615a61af347c56f1223ddc214f95c88ac"
+        }]
+        rawtx = self.api.create_tx(txins, txouts)
+        rawtx = self.api.add_nulldata(rawtx, "f483")
+        self.api.service = helpers.Service([])
+        result = self.api.sign_tx(rawtx, wifs, prevouts=prevouts)
+        self.assertEqual(result, expected)
+
+    def test_add_inputs_signs_offline(self):
+        key = deserialize.key(True, fixtures["sign_tx"]["wifs"][0])
+        script = binascii.unhexlify(
+            "76a914f4131906b10615a61af347c56f1223ddc214f95c88ac"
+        )
+        spendables = [
+            Spendable(100000, script, struct.pack(">I", i) * 8, i)
+            for i in range(100)
+        ]
+        service = helpers.Service(spendables)
+        address = fixtures["sign_tx"]["txouts"][0]["address"]
+        txouts = [deserialize.txout(True, address, 100000 * 99)]
+        tx = control.create_tx(service, True, [], txouts)
+        tx = control.add_inputs(service, True, tx, [key])
+        tx = control.sign_tx(service, True, tx, [key])
+        self.assertEqual(len(tx.txs_in), 100)
+        self.assertEqual(service.get_tx_calls, 0)
+        self.assertEqual(tx.bad_signature_count(), 0)
+
+    def test_sign_tx_parallel(self):
+        key = deserialize.key(True, fixtures["sign_tx"]["wifs"][0])
+        script = binascii.unhexlify(
+            "76a914f4131906b10615a61af347c56f1223ddc214f95c88ac"
+        )
+        spendables = [
+            Spendable(100000, script, struct.pack(">I", i) * 8, i)
+            for i in range(20)
+        ]
+        service = helpers.Service(spendables)
+        address = fixtures["sign_tx"]["txouts"][0]["address"]
+        txouts = [deserialize.txout(True, address, 100000 * 19)]
+        tx = control.create_tx(service, True, [], txouts)
+        tx = control.add_inputs(service, True, tx, [key])
+        rawtx = tx.as_hex()
+        prevouts = control.prevouts_from_spendables(spendables)
+        sequential = control.sign_tx(service, True, deserialize.tx(rawtx),
+                                     [key], prevouts=prevouts)
+        parallel = control.sign_tx(service, True, deserialize.tx(rawtx),
+                                   [key], prevouts=prevouts, processes=4)
+        self.assertEqual(sequential.as_hex(), parallel.as_hex())
+        parallel.set_unspents(spendables)
+        self.assertEqual(parallel.bad_signature_count(), 0)
+
 
 class TestStoreNulldata(unittest.TestCase):
 
@@ -237,6 +323,24 @@ class TestSignData(unittest.TestCase):
         valid = self.api.verify_signature(address, sig, data)
         self.assertEqual(valid, True)
 
+    def test_sign_deterministic(self):
+        # signatures created with the previous trial verify implementation
+        data = binascii.hexlify(b"testmessage")
+        uncompressed_wif = fixtures["wallet"]["wif"]
+        sig = self.api.sign_data(uncompressed_wif, data)
+        self.assertEqual(sig, (b"Gz9GIIDkBdmmc9iof0k5AkabYFiW4/Rb78/fA6I8+a2t"
+                               b"efzvkg9YdaY4VYti/OkQo6ZUUVLMYMkFD2Uyd9lSS0w="))
+        compressed_wif = "cSuT2J14dYbe1zvB5z5WTXeRcMbj4tnoKssAK1ZQbnX5HtHfW3bi"
+        sig = self.api.sign_data(compressed_wif, data)
+        self.assertEqual(sig, (b"IJ4U5nQPmi/Xh+arMm/kNYyMdzYfWlpdoD1YesWCGAqs"
+                               b"Z4YszcBGPWgNLH48Gziser6lgWusUk9yGFHuLBl2cC0="))
+
+    def test_sign_self_check(self):
+        wif = fixtures["wallet"]["wif"]
+        key = deserialize.key(True, wif)
+        sig = control.sign_data(True, b"testmessage", key, self_check=True)
+        self.assertEqual(sig, control.sign_data(True, b"testmessage", key))
+
 
 class TestSignUnicode(unittest.TestCase):
 
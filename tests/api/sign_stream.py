@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import io
+import os
+import json
+import binascii
+import tempfile
+import unittest
+from btctxstore import BtcTxStore
+fixtures = json.load(open("tests/fixtures.json"))
+
+
+class TestSignStream(unittest.TestCase):
+
+    def setUp(self):
+        self.api = BtcTxStore(dryrun=True, testnet=True)
+        self.wif = fixtures["wallet"]["wif"]
+        self.address = fixtures["wallet"]["address"]
+        self.data = os.urandom(2 ** 17 + 3)  # spans multiple blocks
+
+    def test_matches_sign_data(self):
+        fileobj = io.BytesIO(self.data + b"trailing")
+        sig = self.api.sign_stream(self.wif, fileobj, len(self.data))
+        expected = self.api.sign_data(self.wif, binascii.hexlify(self.data))
+        self.assertEqual(sig, expected)
+        self.assertEqual(fileobj.read(), b"trailing")
+
+    def test_verify_stream(self):
+        sig = self.api.sign_data(self.wif, binascii.hexlify(self.data))
+        fileobj = io.BytesIO(self.data)
+        self.assertTrue(self.api.verify_stream(self.address, sig, fileobj,
+                                               len(self.data)))
+        fileobj = io.BytesIO(self.data[:-1] + b"x")
+        self.assertFalse(self.api.verify_stream(self.address, sig, fileobj,
+                                                len(self.data)))
+
+    def test_verify_malformed(self):
+        sig = self.api.sign_data(self.wif, binascii.hexlify(self.data))
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            for address, signature in [(self.address, "invalid"),
+                                       (self.address, sig[:-8]),
+                                       ("invalid", sig)]:
+                fileobj = io.BytesIO(self.data)
+                self.assertFalse(self.api.verify_stream(
+                    address, signature, fileobj, len(self.data)
+                ))
+                self.assertFalse(self.api.verify_file(address, signature,
+                                                      path))
+        finally:
+            os.remove(path)
+
+    def test_short_stream(self):
+        def callback():
+            fileobj = io.BytesIO(self.data)
+            self.api.sign_stream(self.wif, fileobj, len(self.data) + 1)
+        self.assertRaises(ValueError, callback)
+
+    def test_file(self):
+        for data in [self.data, b""]:
+            fd, path = tempfile.mkstemp()
+            try:
+                with os.fdopen(fd, "wb") as fileobj:
+                    fileobj.write(data)
+                sig = self.api.sign_file(self.wif, path)
+                hexdata = binascii.hexlify(data)
+                self.assertEqual(sig, self.api.sign_data(self.wif, hexdata))
+                self.assertTrue(self.api.verify_file(self.address, sig, path))
+            finally:
+                os.remove(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -59,5 +59,99 @@ class TestVerifySignature(unittest.TestCase):
         self.assertFalse(self.api.verify_signature(address, sig, data))
 
 
+class TestVerifySignatures(unittest.TestCase):
+
+    def setUp(self):
+        self.api = BtcTxStore(dryrun=True, testnet=True)
+        data = binascii.hexlify(b"testmessage")
+        self.items = []
+        for name in ["positive", "incorrect_address",
+                     "incorrect_signature", "incorrect_data"]:
+            _fixtures = fixtures["verify_signature"][name]
+            item_data = data + b"65" if name == "incorrect_data" else data
+            self.items.append((_fixtures["address"],
+                               _fixtures["signature"], item_data))
+
+    def test_matches_single(self):
+        expected = [self.api.verify_signature(*item) for item in self.items]
+        self.assertEqual(expected, [True, False, False, False])
+        for processes in [1, 2]:
+            result = self.api.verify_signatures(self.items * 2,
+                                                processes=processes)
+            self.assertEqual(result, expected * 2)
+
+    def test_malformed(self):
+        address, signature, data = self.items[0]
+        items = [
+            (address, signature, data),
+            ("invalidaddress", signature, data),
+            (address, "invalidsignature", data),
+            (address, signature, "nothex"),
+            None,
+        ]
+        result = self.api.verify_signatures(items, processes=2)
+        self.assertEqual(result, [True, False, False, False, False])
+
+    def test_malformed_matches_single(self):
+        address, signature, data = self.items[0]
+        items = [
+            ("invalidaddress", signature, data),
+            (address, "invalidsignature", data),
+            (address, signature, "nothex"),
+            (address, signature, "f48"),
+        ]
+        expected = [self.api.verify_signature(*item) for item in items]
+        self.assertEqual(expected, [False] * len(items))
+        self.assertEqual(self.api.verify_signatures(items, processes=1),
+                         expected)
+
+
+class TestVerifyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.api = BtcTxStore(dryrun=True, testnet=True, verify_cache_size=2)
+        _fixtures = fixtures["verify_signature"]["positive"]
+        self.address = _fixtures["address"]
+        self.signature = _fixtures["signature"]
+        self.data = binascii.hexlify(b"testmessage")
+
+    def test_disabled(self):
+        api = BtcTxStore(dryrun=True, testnet=True)
+        self.assertIsNone(api.get_verify_cache_info())
+
+    def test_hits(self):
+        for i in range(3):
+            self.assertTrue(self.api.verify_signature(
+                self.address, self.signature, self.data
+            ))
+        info = self.api.get_verify_cache_info()
+        self.assertEqual(info, {"hits": 2, "misses": 1,
+                                "size": 1, "maxsize": 2})
+
+        # cached recovery is checked against the given address
+        _fixtures = fixtures["verify_signature"]["incorrect_address"]
+        self.assertFalse(self.api.verify_signature(
+            _fixtures["address"], self.signature, self.data
+        ))
+
+    def test_invalid_cached(self):
+        _fixtures = fixtures["verify_signature"]["incorrect_signature"]
+        for i in range(2):
+            self.assertFalse(self.api.verify_signature(
+                _fixtures["address"], _fixtures["signature"], self.data
+            ))
+        self.assertEqual(self.api.get_verify_cache_info()["hits"], 1)
+
+    def test_eviction_and_clear(self):
+        for message in [b"a", b"b", b"c"]:
+            self.api.verify_signature(self.address, self.signature,
+                                      binascii.hexlify(message))
+        self.assertEqual(self.api.get_verify_cache_info()["size"], 2)
+        self.api.clear_verify_cache()
+        info = self.api.get_verify_cache_info()
+        self.assertEqual(info, {"hits": 0, "misses": 0,
+                                "size": 0, "maxsize": 2})
+
+
 if __name__ == '__main__':
     unittest.main()
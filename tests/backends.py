@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import random
+import unittest
+from btctxstore import backends
+from btctxstore import ecmath
+from btctxstore import BtcTxStore
+
+
+class BackendConformance(object):
+    """Checks a backend gives the same results as the python reference."""
+
+    name = None
+
+    def setUp(self):
+        if self.name not in backends.available():
+            self.skipTest("Crypto backend {0} not available!".format(
+                self.name
+            ))
+        self.backend = backends.select(self.name)
+        self.reference = backends.select("python")
+        rand = random.Random(self.name)
+        self.vectors = []
+        for i in range(8):
+            secret_exponent = rand.randrange(1, ecmath.N)
+            e = rand.randrange(2 ** 256)
+            self.vectors.append((secret_exponent, e))
+
+    def test_public_pair(self):
+        for secret_exponent, e in self.vectors:
+            self.assertEqual(self.backend.public_pair(secret_exponent),
+                             self.reference.public_pair(secret_exponent))
+
+    def test_sign(self):
+        for secret_exponent, e in self.vectors:
+            self.assertEqual(self.backend.sign(secret_exponent, e),
+                             self.reference.sign(secret_exponent, e))
+
+    def test_verify(self):
+        for secret_exponent, e in self.vectors:
+            public_pair = self.reference.public_pair(secret_exponent)
+            r, s, i = self.reference.sign(secret_exponent, e)
+            self.assertTrue(self.backend.verify(public_pair, e, r, s))
+            self.assertTrue(self.backend.verify(public_pair, e, r,
+                                                ecmath.N - s))
+            self.assertFalse(self.backend.verify(public_pair, e + 1, r, s))
+            self.assertFalse(self.backend.verify(public_pair, e, r, 0))
+            self.assertFalse(self.backend.verify((1, 1), e, r, s))
+
+    def test_recover(self):
+        for secret_exponent, e in self.vectors:
+            public_pair = self.reference.public_pair(secret_exponent)
+            r, s, i = self.reference.sign(secret_exponent, e)
+            self.assertEqual(self.backend.recover(r, s, i, e), public_pair)
+            self.assertEqual(self.backend.recover(r, s, i ^ 1, e),
+                             self.reference.recover(r, s, i ^ 1, e))
+
+
+class TestPython(BackendConformance, unittest.TestCase):
+    name = "python"
+
+
+class TestOpenSSL(BackendConformance, unittest.TestCase):
+    name = "openssl"
+
+
+class TestLibSecp256k1(BackendConformance, unittest.TestCase):
+    name = "libsecp256k1"
+
+
+class TestSelect(unittest.TestCase):
+
+    def test_python_always_available(self):
+        self.assertIn("python", backends.available())
+
+    def test_automatic(self):
+        backend = backends.select("automatic")
+        self.assertEqual(backend.name, backends.available()[0])
+
+    def test_unknown(self):
+        self.assertRaises(Exception, backends.select, "unknown")
+
+    def test_api(self):
+        api = BtcTxStore(dryrun=True, testnet=True, crypto_backend="python")
+        self.assertEqual(api.get_crypto_backend(), "python")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import json
+import binascii
+import unittest
+import pycoin
+from btctxstore import BtcTxStore
+from btctxstore import builder
+from btctxstore import cachedtx
+from btctxstore import control
+from btctxstore import serialize
+from btctxstore import deserialize
+from . import helpers
+fixtures = json.load(open("tests/fixtures.json"))
+
+
+def count_streams(tx):
+    calls = []
+    stream = tx.stream
+
+    def counting_stream(*args, **kwargs):
+        calls.append(1)
+        return stream(*args, **kwargs)
+    tx.stream = counting_stream
+    return calls
+
+
+class TestTxBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.wif = helpers.WALLET_WIF
+        self.key = deserialize.key(True, self.wif)
+        self.service = helpers.Service(helpers.make_spendables([10 ** 8]))
+        self.api = BtcTxStore(testnet=True)
+        self.api.service = self.service
+
+    def test_matches_hex_api(self):
+        data = os.urandom(100)
+        hexdata = binascii.hexlify(data).decode("ascii")
+        rawtx = self.api.create_tx()
+        rawtx = self.api.add_hash160data(rawtx, hexdata[:40])
+        rawtx = self.api.add_data_blob(rawtx, hexdata)
+
+        txbuilder = builder.TxBuilder.create(self.service, True)
+        txbuilder.add_hash160data(data[:20]).add_data_blob(data)
+        self.assertEqual(serialize.tx(txbuilder.tx), rawtx)
+        self.assertEqual(txbuilder.as_bin(), binascii.unhexlify(rawtx))
+
+    def test_pipeline(self):
+        data = os.urandom(100)
+        txbuilder = builder.TxBuilder.create(self.service, True)
+        txbuilder.add_data_blob(data).add_inputs([self.key])
+        txid = txbuilder.publish()
+        self.assertEqual(len(self.service.sent), 1)
+        tx = self.service.sent[0]
+        self.assertEqual(txid, tx.hash())
+        self.assertEqual(control.get_data_blob(tx), data)
+        self.assertEqual(tx.bad_signature_count(), 0)
+
+    def test_dryrun(self):
+        txbuilder = builder.TxBuilder.create(self.service, True)
+        txbuilder.add_nulldata(b"f483").add_inputs([self.key])
+        txid = txbuilder.publish(dryrun=True)
+        self.assertEqual(self.service.sent, [])
+        self.assertEqual(txid, txbuilder.tx.hash())
+
+    def test_from_bin(self):
+        rawtx = self.api.add_nulldata(self.api.create_tx(), "f483")
+        txbuilder = builder.TxBuilder.from_bin(self.service, True,
+                                               binascii.unhexlify(rawtx))
+        self.assertEqual(serialize.tx(txbuilder.tx), rawtx)
+
+    def test_store_data_blob(self):
+        hexdata = binascii.hexlify(os.urandom(100)).decode("ascii")
+        txid = self.api.store_data_blob(hexdata, [self.wif])
+        self.assertEqual(len(self.service.sent), 1)
+        tx = self.service.sent[0]
+        self.assertEqual(txid, serialize.txid(tx.hash()))
+        self.assertEqual(serialize.data(control.get_data_blob(tx)), hexdata)
+
+    def test_publish_serializes_once(self):
+        txbuilder = builder.TxBuilder.create(self.service, True)
+        txbuilder.add_data_blob(os.urandom(100)).add_inputs([self.key])
+        calls = count_streams(txbuilder.tx)
+        txid = txbuilder.publish()
+        self.assertEqual(txid, txbuilder.tx.hash())
+        self.assertEqual(len(calls), 1)
+
+    def test_split_utxos_serializes_once(self):
+        spendables = self.service.spendables
+        streams = []
+        send_tx = self.service.send_tx
+
+        def counting_send_tx(tx):
+            streams.append(count_streams(tx))
+            send_tx(tx)
+        self.service.send_tx = counting_send_tx
+        txids = control.split_utxos(self.service, True, self.key,
+                                    spendables, 10 ** 6, max_outputs=10)
+        self.assertEqual(len(txids), len(self.service.sent))
+        self.assertEqual(txids, [tx.hash() for tx in self.service.sent])
+        self.assertTrue(all(len(calls) == 1 for calls in streams))
+
+
+class TestCachedTx(unittest.TestCase):
+
+    def test_control_returns_plain_tx(self):
+        tx = control.create_tx(None, True, [], [])
+        txid = tx.hash()
+        control.add_nulldata_output(tx, deserialize.nulldata_txout("f483"))
+        self.assertNotEqual(tx.hash(), txid)
+        self.assertEqual(tx.hash(),
+                         pycoin.tx.Tx.from_bin(tx.as_bin()).hash())
+
+    def test_builder_multiprocess_sign(self):
+        key = deserialize.key(True, helpers.WALLET_WIF)
+        service = helpers.Service(helpers.make_spendables([10 ** 6] * 4))
+        txbuilder = builder.TxBuilder.create(service, True)
+        txbuilder.add_nulldata(b"f483").add_inputs([key], sign=False)
+        unsigned = txbuilder.as_bin()
+        txbuilder.sign([key], processes=2)
+        self.assertNotEqual(txbuilder.as_bin(), unsigned)
+        self.assertEqual(txbuilder.tx.bad_signature_count(), 0)
+        signed = pycoin.tx.Tx.from_bin(txbuilder.as_bin())
+        self.assertEqual(txbuilder.tx.hash(), signed.hash())
+
+    def test_memoized_until_changed(self):
+        tx = cachedtx.CachedTx(1, [], [])
+        control.add_nulldata_output(tx, deserialize.nulldata_txout("f483"))
+        calls = count_streams(tx)
+        rawtx = tx.as_bin()
+        self.assertEqual(tx.hash(), tx.hash())
+        self.assertIs(tx.as_bin(), rawtx)
+        self.assertEqual(len(calls), 1)
+
+        control.add_hash160data_output(
+            tx, deserialize.hash160data_txout(10 * "f483")
+        )
+        self.assertIs(tx.as_bin(), rawtx)  # stale until changed
+        tx.changed()
+        self.assertNotEqual(tx.as_bin(), rawtx)
+        self.assertEqual(tx.hash(), pycoin.tx.Tx.from_bin(tx.as_bin()).hash())
+        self.assertEqual(len(calls), 2)
+
+    def test_from_tx(self):
+        tx = deserialize.tx(fixtures["sign_tx"]["expected"])
+        wrapped = cachedtx.CachedTx.from_tx(tx)
+        self.assertEqual(wrapped.as_hex(), tx.as_hex())
+        self.assertEqual(wrapped.hash(), tx.hash())
+        self.assertIs(cachedtx.CachedTx.from_tx(wrapped), wrapped)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import random
+import unittest
+import pycoin.tx
+from pycoin.tx import Tx
+from btctxstore import BtcTxStore
+from btctxstore import cache
+from btctxstore import control
+from btctxstore import scripts
+from btctxstore import coinselect
+from btctxstore import exceptions
+from btctxstore import deserialize
+from . import helpers
+
+
+SCRIPT = scripts.p2pkh_script(b"\0" * 20)
+
+
+def make_index(values):
+    return coinselect.index_utxos(helpers.make_spendables(values, SCRIPT))
+
+
+def selected_values(index, positions):
+    return sorted([index.values[p] for p in positions])
+
+
+class TestCoinSelect(unittest.TestCase):
+
+    def test_index(self):
+        index = make_index([5, 1, 9, 3])
+        self.assertEqual(list(index.values), [9, 5, 3, 1])
+        self.assertEqual(list(index.sums), [0, 9, 14, 17, 18])
+        self.assertEqual(index.count_above(4), 2)
+        self.assertEqual(index.count_above(9), 0)
+        self.assertEqual(index.count_above(0), 4)
+
+    def test_largest_first_matches_greedy(self):
+        rng = random.Random(0)
+        for i in range(20):
+            values = [rng.randint(1, 10 ** 6) for i in range(50)]
+            target = rng.randint(1, sum(values))
+            greedy, total = [], 0
+            for value in sorted(values, reverse=True):
+                if total >= target:
+                    break
+                greedy.append(value)
+                total += value
+            index = make_index(values)
+            positions = coinselect.largest_first(index, target)
+            self.assertEqual(selected_values(index, positions),
+                             sorted(greedy))
+
+    def test_updated(self):
+        index = make_index([5, 1, 9, 3])
+        rest = index.updated([0, 1])  # largest first
+        self.assertEqual(list(rest.values), [3, 1])
+        self.assertEqual(rest.effective_sum(0, 2), 4)
+        self.assertEqual(coinselect.largest_first(rest, 4), [0, 1])
+        rest = index.updated([2, 0])
+        self.assertEqual(list(rest.values), [5, 1])
+        self.assertEqual(list(rest.sums), [0, 5, 6])
+        received = helpers.make_spendables([4, 0, 20], SCRIPT)
+        rest = index.updated([1], received)
+        self.assertEqual(list(rest.values), [20, 9, 4, 3, 1, 0])
+        self.assertEqual(list(rest.sums), [0, 20, 29, 33, 36, 37, 37])
+        self.assertEqual(rest.spendables([2])[0].tx_hash, received[0].tx_hash)
+        self.assertEqual(list(index.values), [9, 5, 3, 1])  # unchanged
+
+    def test_find_spendables_without_index(self):
+        rng = random.Random(2)
+        values = [rng.randint(1, 10 ** 6) for i in range(100)]
+        spendables = helpers.make_spendables(values, SCRIPT)
+        service = helpers.Service(spendables)
+        index = coinselect.index_utxos(spendables)
+        for i in range(10):
+            target = rng.randint(1, 10 ** 7)
+            selected, total = control.find_spendables(service, [], target,
+                                                      fee_per_input=5000)
+            positions = coinselect.largest_first(index, target,
+                                                 fee_per_input=5000)
+            if positions is None:
+                positions = range(len(index))
+            self.assertEqual(sorted([s.coin_value for s in selected]),
+                             selected_values(index, positions))
+
+    def test_utxo_cache(self):
+        spendables = helpers.make_spendables([10, 20, 30, 40])
+        service = helpers.Service(spendables)
+        addresses = [helpers.WALLET_ADDRESS]
+        key = (helpers.WALLET_ADDRESS,)
+        utxo_cache = cache.LRUCache(1)
+        for i in range(2):
+            selected, total = control.find_spendables(
+                service, addresses, 35, utxo_cache=utxo_cache,
+                strategy=coinselect.KNAPSACK
+            )
+            self.assertGreaterEqual(total, 35)
+            self.assertEqual(len(utxo_cache.get(key)), 4)  # not hidden
+        self.assertEqual(service.spendables_calls, 1)  # index kept
+
+        # published: spent utxos dropped, change added
+        spent = [spendables[1], spendables[3]]
+        tx = helpers.make_tx(txouts=[
+            pycoin.tx.TxOut(25, helpers.wallet_script()),
+            pycoin.tx.TxOut(30, SCRIPT),
+        ])
+        tx.txs_in = [pycoin.tx.TxIn(s.tx_hash, s.tx_out_index)
+                     for s in spent]
+        control.update_utxo_cache(utxo_cache, True, tx)
+        index = utxo_cache.get(key)
+        self.assertEqual(list(index.values), [30, 25, 10])
+        self.assertEqual(index.spendables([1])[0].tx_hash, tx.hash())
+        selected, total = control.find_spendables(service, addresses, 1000,
+                                                  utxo_cache=utxo_cache)
+        self.assertEqual(total, 65)  # insufficient, index kept
+        self.assertEqual(service.spendables_calls, 1)
+        utxo_cache.clear()
+        selected, total = control.find_spendables(service, addresses, 1000,
+                                                  utxo_cache=utxo_cache)
+        self.assertEqual(total, 100)
+        self.assertEqual(service.spendables_calls, 2)
+
+    def test_api_utxo_cache(self):
+        service = helpers.Service(helpers.make_spendables([10 ** 6] * 3))
+        api = BtcTxStore(testnet=True, utxo_cache_size=1)
+        api.service = service
+        unsent = api.add_inputs(api.add_nulldata(api.create_tx(), "f483"),
+                                [helpers.WALLET_WIF], dont_sign=True)
+        txins = set()
+        for i in range(2):
+            api.store_nulldata("f483", [helpers.WALLET_WIF], fee=10000)
+            txins.update((i.previous_hash, i.previous_index)
+                         for i in service.sent[-1].txs_in)
+        self.assertEqual(len(txins), 2)  # spent utxos not selected again
+        unsent = deserialize.tx(unsent)
+        self.assertIn((unsent.txs_in[0].previous_hash,
+                       unsent.txs_in[0].previous_index), txins)  # not hidden
+        self.assertEqual(service.spendables_calls, 1)
+
+        # change of the published txs is spendable
+        api.store_nulldata("f483", [helpers.WALLET_WIF], fee=10000)
+        api.store_nulldata("f483", [helpers.WALLET_WIF], fee=10000)
+        txin = service.sent[-1].txs_in[0]
+        changes = [(tx.hash(), 1) for tx in service.sent[:3]]
+        self.assertIn((txin.previous_hash, txin.previous_index), changes)
+        self.assertEqual(service.spendables_calls, 1)
+
+        dryrun = BtcTxStore(testnet=True, dryrun=True, utxo_cache_size=1)
+        dryrun.service = helpers.Service(helpers.make_spendables([10 ** 6]))
+        for i in range(2):  # not published, funds not hidden
+            dryrun.store_nulldata("f483", [helpers.WALLET_WIF], fee=10000)
+
+    def test_branch_and_bound_exact(self):
+        index = make_index([1, 2, 5, 10, 20, 40])
+        positions = coinselect.branch_and_bound(index, 17, cost_of_change=0)
+        self.assertEqual(selected_values(index, positions), [2, 5, 10])
+
+    def test_branch_and_bound_no_match(self):
+        index = make_index([5, 10])
+        self.assertIsNone(coinselect.branch_and_bound(index, 4,
+                                                      cost_of_change=0))
+        positions = coinselect.select(index, 4, cost_of_change=0,
+                                      strategy=coinselect.BRANCH_AND_BOUND)
+        self.assertEqual(selected_values(index, positions), [10])
+
+    def test_knapsack(self):
+        index = make_index([3, 7, 11, 50000])
+        self.assertEqual(coinselect.knapsack(index, 11), [1])  # single match
+        positions = coinselect.knapsack(index, 14, min_change=1000,
+                                        rng=random.Random(0))
+        self.assertEqual(selected_values(index, positions), [3, 11])
+        positions = coinselect.knapsack(index, 30, min_change=1000,
+                                        rng=random.Random(0))
+        self.assertEqual(selected_values(index, positions), [50000])
+
+    def test_fee_aware_skips_uneconomic(self):
+        index = make_index([100, 150, 50000, 60000])
+        positions = coinselect.fee_aware(index, 59700, fee_per_input=200)
+        self.assertEqual(selected_values(index, positions), [60000])
+        positions = coinselect.fee_aware(index, 100000, fee_per_input=200)
+        self.assertEqual(selected_values(index, positions), [50000, 60000])
+        self.assertIsNone(coinselect.fee_aware(index, 109700,
+                                               fee_per_input=200))
+
+    def test_strategies_cover_target(self):
+        rng = random.Random(1)
+        values = [rng.randint(1, 10 ** 7) for i in range(1000)]
+        index = make_index(values)
+        for strategy in coinselect.STRATEGIES:
+            for i in range(3):
+                target = rng.randint(1, sum(values) // 2)
+                positions = coinselect.select(index, target,
+                                              strategy=strategy,
+                                              fee_per_input=100)
+                self.assertEqual(len(set(positions)), len(positions))
+                effective = sum(index.values[p] - 100 for p in positions)
+                self.assertGreaterEqual(effective, target)
+
+    def test_insufficient(self):
+        index = make_index([1, 2])
+        for strategy in coinselect.STRATEGIES:
+            self.assertIsNone(coinselect.select(index, 4, strategy=strategy))
+
+    def test_unknown_strategy(self):
+        self.assertRaises(exceptions.InvalidInput, coinselect.select,
+                          make_index([1]), 1, strategy="unknown")
+
+    def test_add_inputs_without_change(self):
+        key = deserialize.key(True, helpers.WALLET_WIF)
+        values = [30000, 20000, 15000, 100000]
+        service = helpers.Service(helpers.make_spendables(values))
+        tx = Tx(1, [], [])
+        control.add_nulldata_output(tx, deserialize.nulldata_txout("f483"))
+        control.add_inputs(service, True, tx, [key], fee=35000,
+                           strategy=coinselect.BRANCH_AND_BOUND)
+        self.assertEqual(len(tx.txs_out), 1)  # no change output
+        self.assertEqual(sorted([u.coin_value for u in tx.unspents]),
+                         [15000, 20000])
+
+        tx = Tx(1, [], [])
+        control.add_inputs(service, True, tx, [key], fee=35000)
+        self.assertEqual(len(tx.txs_out), 1)  # change output
+        self.assertEqual(tx.txs_out[0].coin_value, 65000)
+
+
+if __name__ == '__main__':
+    unittest.main()
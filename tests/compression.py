@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import zlib
+import unittest
+from pycoin.tx import Tx
+from btctxstore import blobio
+from btctxstore import compression
+from btctxstore import exceptions
+from btctxstore import control
+
+
+class TestCompression(unittest.TestCase):
+
+    def test_roundtrip(self):
+        data = b"compressible data " * 100
+        for codec in compression.available():
+            compressed = compression.compress(data, codecs=[codec])
+            self.assertTrue(compression.is_compressed(compressed))
+            self.assertLess(len(compressed), len(data))
+            self.assertEqual(compression.decompress(compressed), data)
+
+    def test_picks_smallest(self):
+        data = b"compressible data " * 100
+        compressed = compression.compress(data)
+        for codec in compression.available():
+            other = compression.compress(data, codecs=[codec])
+            self.assertLessEqual(len(compressed), len(other))
+
+    def test_incompressible(self):
+        data = os.urandom(100)
+        compressed = compression.compress(data)
+        self.assertEqual(compressed, compression._header(compression.RAW) +
+                         data)
+        self.assertEqual(compression.decompress(compressed), data)
+        self.assertEqual(compression.decompress(data), data)
+        self.assertRaises(exceptions.MaxDecompressedSizeExceeded,
+                          compression.decompress, compressed, max_size=99)
+
+    def test_bounded(self):
+        data = b"\0" * (2 ** 20)
+        for codec in compression.available():
+            compressed = compression.compress(data, codecs=[codec])
+            self.assertRaises(exceptions.MaxDecompressedSizeExceeded,
+                              compression.decompress, compressed,
+                              max_size=2 ** 20 - 1)
+            self.assertEqual(compression.decompress(compressed,
+                                                    max_size=2 ** 20), data)
+
+    def test_invalid(self):
+        header = compression.compress(b"\0" * 100)[:compression.HEADER_BYTES]
+        self.assertRaises(ValueError, compression.decompress,
+                          header + b"invalid")
+        truncated = compression.compress(b"a" * 1000, codecs=[
+            compression.ZLIB])[:-4]
+        self.assertRaises(ValueError, compression.decompress, truncated)
+
+
+class TestCompressedDataBlob(unittest.TestCase):
+
+    def test_fewer_outputs(self):
+        data = b"stored document text " * 50
+        plain = control.add_data_blob(Tx(1, [], []), data)
+        compressed = control.add_data_blob(Tx(1, [], []), data,
+                                           compress=True)
+        self.assertLess(len(compressed.txs_out), len(plain.txs_out))
+        self.assertEqual(control.get_data_blob(compressed, decompress=True),
+                         data)
+        self.assertEqual(control.get_data_blob(plain, decompress=True), data)
+        self.assertNotEqual(control.get_data_blob(compressed), data)
+
+    def test_bomb(self):
+        bomb = compression.compress(b"\0" * (2 ** 24), [compression.ZLIB])
+        tx = control.add_data_blob(Tx(1, [], []), bomb)
+        self.assertRaises(exceptions.MaxDecompressedSizeExceeded,
+                          control.get_data_blob, tx, decompress=True)
+        reader = blobio.DataBlobReader(tx, decompress=True)
+        self.assertRaises(exceptions.NoDataBlob, reader.read)
+
+    def test_zlib_without_header(self):
+        data = zlib.compress(b"a" * 100)  # not transparently decompressed
+        tx = control.add_data_blob(Tx(1, [], []), data)
+        self.assertEqual(control.get_data_blob(tx), data)
+
+    def test_raw_by_default(self):
+        # uncompressed data that happens to start like a compressed blob
+        data = compression._header(compression.ZLIB) + b"not zlib data"
+        tx = control.add_data_blob(Tx(1, [], []), data)
+        self.assertEqual(control.get_data_blob(tx), data)
+        self.assertEqual(blobio.DataBlobReader(tx).read(), data)
+        self.assertRaises(exceptions.NoDataBlob, control.get_data_blob, tx,
+                          decompress=True)
+        reader = blobio.DataBlobReader(tx, decompress=True)
+        self.assertRaises(exceptions.NoDataBlob, reader.read)
+
+    def test_incompressible_with_key(self):
+        # data that starts like a compressed blob but does not compress
+        data = compression._header(compression.ZLIB) + os.urandom(500)
+        tx = control.add_data_blob(Tx(1, [], []), data, compress=True)
+        self.assertEqual(control.get_data_blob(tx, decompress=True), data)
+        reader = blobio.DataBlobReader(tx, decompress=True)
+        self.assertTrue(reader.compressed)
+        self.assertEqual(reader.read(7), data[:7])
+        self.assertEqual(reader.read(), data[7:])
+
+    def test_reader_decompresses(self):
+        data = b"stored document text " * 500
+        tx = control.add_data_blob(Tx(1, [], []), data, compress=True)
+        reader = blobio.DataBlobReader(tx, decompress=True)
+        self.assertTrue(reader.compressed)
+        self.assertEqual(reader.read(7), data[:7])
+        self.assertEqual(reader.read(), data[7:])
+        self.assertEqual(blobio.DataBlobReader(tx).read(),
+                         control.get_data_blob(tx))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,9 +6,12 @@
 
 from __future__ import print_function
 from __future__ import unicode_literals
+import json
 import unittest
+from btctxstore import backends
 from btctxstore import deserialize
 from btctxstore import exceptions
+fixtures = json.load(open("tests/fixtures.json"))
 
 
 class TestNulldataTxOut(unittest.TestCase):
@@ -131,3 +134,26 @@ class TestAddress(unittest.TestCase):
         def callback():
             deserialize.address(True, "garbage")
         self.assertRaises(exceptions.InvalidAddress, callback)
+
+
+class CountingBackend(backends.Python):
+
+    def __init__(self):
+        self.calls = 0
+
+    def public_pair(self, secret_exponent):
+        self.calls += 1
+        return super(CountingBackend, self).public_pair(secret_exponent)
+
+
+class TestKey(unittest.TestCase):
+
+    def test_uses_given_backend(self):
+        wif = fixtures["wallet"]["wif"]
+        backend = CountingBackend()
+        key = deserialize.key(True, wif, backend=backend)
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(key.address(), fixtures["wallet"]["address"])
+        self.assertEqual(key.wif(), wif)
+        self.assertEqual(key.secret_exponent(),
+                         deserialize.secret_exponents(True, [wif])[0])
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import random
+import unittest
+import pycoin
+from btctxstore import ecmath
+
+
+G = pycoin.ecdsa.generator_secp256k1
+
+
+class TestMultiply(unittest.TestCase):
+
+    def test_multiply(self):
+        rand = random.Random(0)
+        for k in [1, 2, 3, ecmath.N - 1] + [rand.randrange(ecmath.N)
+                                              for i in range(10)]:
+            expected = (k * G).pair()
+            self.assertEqual(ecmath.multiply(k, ecmath.G), expected)
+
+    def test_multiply_generator(self):
+        rand = random.Random(3)
+        for k in [1, 15, 16, 2 ** 255, ecmath.N - 1] + [
+                rand.randrange(ecmath.N) for i in range(10)]:
+            expected = ecmath.multiply(k, ecmath.G)
+            self.assertEqual(ecmath.multiply_generator(k), expected)
+        self.assertIsNone(ecmath.multiply_generator(ecmath.N))
+
+    def test_generator_table_size(self):
+        ecmath.precompute_generator_table()
+        self.assertGreater(ecmath.generator_table_size(), 0)
+
+    def test_multiply_infinity(self):
+        self.assertIsNone(ecmath.multiply(0, ecmath.G))
+        self.assertIsNone(ecmath.multiply(ecmath.N, ecmath.G))
+
+    def test_multiply_add(self):
+        rand = random.Random(1)
+        for i in range(10):
+            u1 = rand.randrange(ecmath.N)
+            u2 = rand.randrange(ecmath.N)
+            q = rand.randrange(1, ecmath.N)
+            Q = (q * G).pair()
+            expected = (u1 * G + u2 * (q * G)).pair()
+            self.assertEqual(ecmath.multiply_add(u1, u2, Q), expected)
+
+    def test_multiply_add_cancel(self):
+        Q = ecmath.multiply(5, ecmath.G)
+        self.assertIsNone(ecmath.multiply_add(ecmath.N - 5, 1, Q))
+        self.assertEqual(ecmath.multiply_add(5, 0, Q), Q)
+        self.assertEqual(ecmath.multiply_add(5, 1, Q),
+                         ecmath.multiply(10, ecmath.G))
+
+
+class TestSignatures(unittest.TestCase):
+
+    def test_verify_and_recover(self):
+        rand = random.Random(2)
+        for i in range(5):
+            secret_exponent = rand.randrange(1, ecmath.N)
+            e = rand.randrange(2 ** 256)
+            public_pair = ecmath.multiply(secret_exponent, ecmath.G)
+            r, s = pycoin.ecdsa.sign(G, secret_exponent, e)
+            self.assertTrue(ecmath.verify(public_pair, e, r, s))
+            self.assertFalse(ecmath.verify(public_pair, e + 1, r, s))
+            recovered = [ecmath.recover_public_pair(r, s, j, e)
+                         for j in range(2)]
+            self.assertIn(public_pair, recovered)
+
+    def test_verify_out_of_range(self):
+        public_pair = ecmath.multiply(7, ecmath.G)
+        self.assertFalse(ecmath.verify(public_pair, 1, 0, 1))
+        self.assertFalse(ecmath.verify(public_pair, 1, 1, ecmath.N))
+        self.assertFalse(ecmath.verify((1, 1), 1, 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+"""Fake service and transactions shared by the tests."""
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import json
+import struct
+from pycoin.tx import Tx
+from pycoin.tx import TxIn
+from pycoin.tx.Spendable import Spendable
+from btctxstore import control
+from btctxstore import scripts
+from btctxstore import deserialize
+fixtures = json.load(open("tests/fixtures.json"))
+
+
+WALLET_WIF = fixtures["wallet"]["wif"]
+WALLET_ADDRESS = fixtures["wallet"]["address"]
+
+
+class Service(object):
+    """Offline service with fixed utxos and known transactions, sent
+    transactions are kept in <sent> and can be fetched again.
+    """
+
+    def __init__(self, spendables=None, txs=None):
+        self.spendables = list(spendables or [])
+        self.txs = dict((tx.hash(), tx) for tx in (txs or []))
+        self.sent = []
+        self.spendables_calls = 0
+        self.get_tx_calls = 0
+
+    def spendables_for_addresses(self, addresses):
+        self.spendables_calls += 1
+        return list(self.spendables)
+
+    def get_tx(self, txhash):
+        self.get_tx_calls += 1
+        if txhash not in self.txs:
+            raise Exception("Offline!")
+        return Tx.from_bin(self.txs[txhash].as_bin())  # like a download
+
+    def send_tx(self, tx):
+        tx.as_hex()  # like the insight service
+        self.sent.append(tx)
+        self.txs[tx.hash()] = tx
+
+
+def wallet_script():
+    """Output script paying the fixtures wallet."""
+    return scripts.p2pkh_script(
+        control._address_to_hash160(True, WALLET_ADDRESS)
+    )
+
+
+def make_spendables(values, script=None):
+    """Spendables of <values> paying <script> (default the wallet)."""
+    script = wallet_script() if script is None else script
+    return [Spendable(value, script, os.urandom(32), i)
+            for i, value in enumerate(values)]
+
+
+def make_tx(number=0, inputs=1, txouts=None, script_sig=b"", lock_time=0):
+    """Tx with <inputs> inputs spending made up outputs (distinct for each
+    <number>) and <txouts>, by default one output paying the wallet.
+    """
+    txins = [TxIn(struct.pack(">I", number + i) * 8, number + i, script_sig,
+                  i) for i in range(inputs)]
+    if txouts is None:
+        txouts = [deserialize.txout(True, WALLET_ADDRESS, 10000)]
+    return Tx(1, txins, txouts, lock_time)
+
+
+def make_blob_tx(data, **kwargs):
+    """Tx of make_tx with the data blob <data>."""
+    return control.add_data_blob(make_tx(**kwargs), data)
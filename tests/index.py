@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import json
+import shutil
+import struct
+import hashlib
+import tempfile
+import unittest
+from btctxstore import BtcTxStore
+from btctxstore import index
+from btctxstore import scanner
+from btctxstore import control
+from btctxstore import serialize
+from btctxstore import exceptions
+from btctxstore import deserialize
+from . import helpers
+fixtures = json.load(open("tests/fixtures.json"))
+
+
+ADDRESS = fixtures["wallet"]["address"]
+
+
+class TestPayloadIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, "payloads.db")
+        self.index = index.PayloadIndex(self.path)
+        key = deserialize.key(True, fixtures["wallet"]["wif"])
+        self.blob_data = b"\xf4\x83" + os.urandom(98)
+        self.blob = control.add_data_blob(helpers.make_tx(1), self.blob_data)
+        self.broadcast = control.add_broadcast_message(
+            True, helpers.make_tx(2), "ünicode", key
+        )
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tempdir)
+
+    def test_add_tx(self):
+        self.assertEqual(self.index.add_tx(True, self.blob, height=7), 2)
+        self.assertEqual(self.index.add_tx(True, self.blob, height=7), 2)
+        self.assertEqual(self.index.count(), 2)  # no duplicates
+        txid = serialize.txid(self.blob.hash())
+        entry = self.index.get(txid, scanner.BLOB)
+        self.assertEqual(entry["payload"], self.blob_data)
+        self.assertEqual(entry["output_begin"], 1)
+        self.assertEqual(entry["output_end"], len(self.blob.txs_out))
+        self.assertEqual(entry["height"], 7)
+        digest = hashlib.sha256(self.blob_data).digest()
+        self.assertEqual([e["txid"] for e in self.index.by_hash(digest)],
+                         [txid])
+
+    def test_prefix_and_address(self):
+        self.index.add_tx(True, self.blob)
+        self.index.add_tx(True, self.broadcast)
+        entries = list(self.index.by_prefix(b"\xf4", kind=scanner.BLOB))
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["payload"], self.blob_data)
+        self.assertEqual(list(self.index.by_prefix(b"\xf5")), [])
+        entries = list(self.index.by_address(ADDRESS))
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]["kind"], scanner.BROADCAST)
+        self.assertEqual(entries[0]["payload"], "ünicode".encode("utf-8"))
+
+    def test_prefix_upper_bound(self):
+        self.assertEqual(index._prefix_upper_bound(b"\x01\xff"), b"\x02")
+        self.assertIsNone(index._prefix_upper_bound(b"\xff\xff"))
+
+    def test_bulk(self):
+        entries = (("%064x" % i, 0, 1, scanner.NULLDATA,
+                    struct.pack(">I", i), None, None, i)
+                   for i in range(2500))
+        self.assertEqual(self.index.add_many(entries, batch_size=1000), 2500)
+        self.index.close()
+        self.index = index.PayloadIndex(self.path)  # persisted
+        self.assertEqual(self.index.count(), 2500)
+
+    def test_network(self):
+        self.assertIsNone(self.index.testnet)
+        self.index.add_tx(True, self.blob)
+        self.assertTrue(self.index.testnet)
+        self.assertRaises(exceptions.InvalidInput, self.index.add_tx, False,
+                          self.blob)
+        self.assertRaises(exceptions.InvalidInput, BtcTxStore,
+                          dryrun=True, testnet=False, index=self.index)
+        self.index.close()
+        self.index = index.PayloadIndex(self.path)  # persisted
+        self.assertTrue(self.index.testnet)
+        self.assertRaises(exceptions.InvalidInput, BtcTxStore,
+                          dryrun=True, testnet=False, index=self.path)
+        api = BtcTxStore(dryrun=True, testnet=True, index=self.path)
+        self.assertTrue(api.index.testnet)
+        api.index.close()
+
+    def test_add_scan_results(self):
+        blob = list(scanner.decode_tx(True, self.blob))
+        broadcast = list(scanner.decode_tx(True, self.broadcast))
+        results = ([("aa" * 32,) + result for result in blob] +
+                   [("bb" * 32,) + result for result in broadcast])
+        heights = {"aa" * 32: 7}
+        self.assertEqual(self.index.add_scan_results(results, heights,
+                                                     testnet=True), 5)
+        self.assertTrue(self.index.testnet)
+        txid = serialize.txid(self.blob.hash())
+        entry = self.index.get(txid, scanner.BLOB)
+        self.assertEqual(entry["output_end"], len(self.blob.txs_out))
+        self.assertEqual(entry["height"], 7)
+        self.assertEqual(self.index.get(txid, scanner.NULLDATA)["output_end"],
+                         2)
+        txid = serialize.txid(self.broadcast.hash())
+        entry = self.index.get(txid, scanner.BROADCAST)
+        self.assertEqual(entry["output_end"], len(self.broadcast.txs_out))
+        self.assertIsNone(entry["height"])
+
+    def test_api_retrieves_once(self):
+        tx = control.add_nulldata_output(helpers.make_tx(3),
+                                         deserialize.nulldata_txout("f483"))
+        service = helpers.Service(txs=[tx])
+        api = BtcTxStore(dryrun=True, testnet=True, index=self.index)
+        api.service = service
+        txid = serialize.txid(tx.hash())
+        self.assertRaises(exceptions.NoDataBlob, api.retrieve_data_blob,
+                          txid)
+        self.assertEqual(service.get_tx_calls, 1)
+        self.assertEqual(api.retrieve_nulldata(txid), "f483")
+        self.assertEqual(service.get_tx_calls, 1)
+
+    def test_api_serves_from_index(self):
+        service = helpers.Service(txs=[self.blob, self.broadcast])
+        api = BtcTxStore(dryrun=True, testnet=True, index=self.index)
+        api.service = service
+        txid = serialize.txid(self.broadcast.hash())
+        expected = api.get_broadcast_message(serialize.tx(self.broadcast))
+        self.assertEqual(api.retrieve_broadcast_message(txid), expected)
+        self.assertEqual(api.retrieve_broadcast_message(txid), expected)
+        txid = serialize.txid(self.blob.hash())
+        hexdata = serialize.data(self.blob_data)
+        self.assertEqual(api.retrieve_data_blob(txid), hexdata)
+        self.assertEqual(api.retrieve_data_blob(txid), hexdata)
+        self.assertEqual(service.get_tx_calls, 2)  # once per tx
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import json
+import unittest
+from pycoin.tx import Tx
+from btctxstore import BtcTxStore
+from btctxstore import control
+from btctxstore import lazytx
+from btctxstore import serialize
+from btctxstore import deserialize
+from . import helpers
+fixtures = json.load(open("tests/fixtures.json"))
+
+
+def make_tx(data, inputs=200):
+    return helpers.make_blob_tx(data, inputs=inputs,
+                                script_sig=os.urandom(107))
+
+
+class TestLazyTx(unittest.TestCase):
+
+    def test_matches_tx(self):
+        tx = make_tx(os.urandom(200))
+        view = lazytx.LazyTx(tx.as_bin())
+        self.assertEqual(view.hash(), tx.hash())
+        self.assertEqual(view.id(), tx.id())
+        self.assertEqual(view.as_hex(), tx.as_hex())
+        self.assertEqual(view.input_count(), len(tx.txs_in))
+        self.assertEqual(len(view.txs_out), len(tx.txs_out))
+        for lazy_out, out in zip(view.txs_out, tx.txs_out):
+            self.assertEqual(lazy_out.coin_value, out.coin_value)
+            self.assertEqual(lazy_out.script, out.script)
+        self.assertEqual(view.txs_out[-1].script, tx.txs_out[-1].script)
+
+    def test_outputs_built_on_access(self):
+        view = lazytx.LazyTx(make_tx(os.urandom(200)).as_bin())
+        self.assertEqual(view.txs_out._outputs, {})
+        out = view.txs_out[3]
+        self.assertEqual(list(view.txs_out._outputs.keys()), [3])
+        self.assertIs(view.txs_out[3], out)
+
+    def test_read_paths(self):
+        data = os.urandom(300)
+        tx = make_tx(data)
+        view = deserialize.lazytx(tx.as_hex())
+        self.assertEqual(control.get_data_blob(view), data)
+        self.assertEqual(control.get_nulldata(view),
+                         control.get_nulldata(tx))
+
+    def test_no_inputs(self):
+        tx = Tx(1, [], [])
+        control.add_data_blob(tx, b"f483")
+        view = lazytx.LazyTx(tx.as_bin())
+        self.assertEqual(view.hash(), tx.hash())
+        self.assertEqual(control.get_data_blob(view), b"f483")
+
+    def test_witness_is_excluded_from_hash(self):
+        tx = make_tx(b"f483", inputs=1)
+        rawtx = tx.as_bin()
+        witness = b"\x01\x02\xab\xcd"  # one item of two bytes
+        segwit = rawtx[:4] + b"\x00\x01" + rawtx[4:-4] + witness + rawtx[-4:]
+        view = lazytx.LazyTx(segwit)
+        self.assertEqual(view.hash(), tx.hash())
+        self.assertEqual(control.get_data_blob(view), b"f483")
+
+    def test_invalid(self):
+        rawtx = make_tx(b"f483").as_bin()
+        for data in [rawtx[:-1], rawtx + b"\0", b""]:
+            view = lazytx.LazyTx(data)
+            self.assertRaises(ValueError, view.hash)
+
+    def test_api_read_paths(self):
+        api = BtcTxStore(testnet=True)
+        rawtx = api.add_data_blob(api.create_tx(), "f483")
+        self.assertEqual(api.get_data_blob(rawtx), "f483")
+        self.assertEqual(serialize.txid(deserialize.lazytx(rawtx).hash()),
+                         serialize.txid(deserialize.tx(rawtx).hash()))
+
+
+if __name__ == '__main__':
+    unittest.main()
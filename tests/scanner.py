@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import json
+import shutil
+import zlib
+import struct
+import binascii
+import tempfile
+import unittest
+from pycoin.encoding import double_sha256
+from pycoin.serialize import b2h_rev
+from btctxstore import scanner
+from btctxstore import control
+from btctxstore import serialize
+from btctxstore import deserialize
+from btctxstore import exceptions
+from . import helpers
+fixtures = json.load(open("tests/fixtures.json"))
+
+
+ADDRESS = fixtures["wallet"]["address"]
+
+
+def txid(tx):
+    return serialize.txid(tx.hash())
+
+
+def segwit_bin(tx):
+    """Serialize <tx> with marker, flag and a witness for each input."""
+    rawtx = tx.as_bin()
+    witness = b"\x02\x03abc\x01x" * len(tx.txs_in)
+    return rawtx[:4] + b"\x00\x01" + rawtx[4:-4] + witness + rawtx[-4:]
+
+
+def block_record(rawtxs, nonce=0):
+    """Returns (block_hash, record) of a block with <rawtxs>."""
+    header = struct.pack("<I", nonce) * (scanner.BLOCK_HEADER_BYTES // 4)
+    block = header + struct.pack("B", len(rawtxs)) + b"".join(rawtxs)
+    record = scanner.MAGIC_TESTNET + struct.pack("<L", len(block)) + block
+    return b2h_rev(double_sha256(header)), record
+
+
+class TestScanner(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        key = deserialize.key(True, fixtures["wallet"]["wif"])
+
+        self.plain = helpers.make_tx(0)
+        self.nulldata = helpers.make_tx(1)
+        control.add_nulldata_output(self.nulldata,
+                                    deserialize.nulldata_txout("f483"))
+        self.segwit = helpers.make_tx(2)
+        control.add_nulldata_output(self.segwit,
+                                    deserialize.nulldata_txout("beef"))
+        self.blob = helpers.make_tx(3)
+        self.blob_data = os.urandom(100)
+        control.add_data_blob(self.blob, self.blob_data)
+        self.broadcast = helpers.make_tx(4)
+        control.add_broadcast_message(True, self.broadcast, "ünicode", key)
+
+        self.path_a = os.path.join(self.tempdir, "blk00000.dat")
+        self.hash_a, record_a = block_record([self.plain.as_bin(),
+                                              self.nulldata.as_bin()], 1)
+        self.hash_b, record_b = block_record([segwit_bin(self.segwit),
+                                              self.blob.as_bin()], 2)
+        with open(self.path_a, "wb") as fileobj:
+            fileobj.write(record_a)
+            fileobj.write(record_b)
+            fileobj.write(b"\0" * 100)  # preallocated space
+        self.path_b = os.path.join(self.tempdir, "blk00001.dat")
+        with open(self.path_b, "wb") as fileobj:
+            fileobj.write(block_record([self.broadcast.as_bin()], 3)[1])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_scan_file(self):
+        results = list(scanner.scan_file(self.path_a, testnet=True))
+        blob_end = len(self.blob.txs_out)
+        self.assertEqual(results, [
+            (self.hash_a, txid(self.nulldata), 1, 2, scanner.NULLDATA,
+             b"\xf4\x83"),
+            (self.hash_b, txid(self.segwit), 1, 2, scanner.NULLDATA,
+             b"\xbe\xef"),
+            (self.hash_b, txid(self.blob), 1, 2, scanner.NULLDATA,
+             control.get_nulldata(self.blob)[1]),
+            (self.hash_b, txid(self.blob), 1, blob_end, scanner.BLOB,
+             self.blob_data),
+        ])
+
+    def test_broadcast(self):
+        results = list(scanner.scan_file(self.path_b, testnet=True,
+                                         kinds=[scanner.BROADCAST]))
+        self.assertEqual(len(results), 1)
+        blockhash, txid, begin, end, kind, message = results[0]
+        self.assertEqual(end, len(self.broadcast.txs_out))
+        self.assertEqual(txid, serialize.txid(self.broadcast.hash()))
+        self.assertEqual(message["message"], "ünicode")
+        self.assertEqual(message["address"], ADDRESS)
+
+    def test_broadcast_not_utf8(self):
+        key = deserialize.key(True, fixtures["wallet"]["wif"])
+        msg_data = b"\xff\xfe not utf8"
+        data = binascii.unhexlify(control.BROADCAST_MESSAGE_KEY_VERSON_01)
+        data += control.sign_data(True, msg_data, key) + 7 * b"\0"
+        data += control._address_to_hash160(True, key.address())
+        data += zlib.compress(msg_data, 9)
+        tx = control.add_data_blob(helpers.make_tx(5), data)
+        results = list(scanner.decode_tx(True, tx))
+        self.assertEqual([r[3] for r in results],
+                         [scanner.NULLDATA, scanner.BLOB])  # no broadcast
+        self.assertRaises(exceptions.NoBroadcastMessage,
+                          control.get_broadcast_message, True, tx)
+
+    def test_scan_files(self):
+        paths = [self.path_a, self.path_b]
+        expected = (list(scanner.scan_file(self.path_a, testnet=True)) +
+                    list(scanner.scan_file(self.path_b, testnet=True)))
+        results = scanner.scan_files(paths, testnet=True, processes=2)
+        self.assertEqual(next(results)[:3], expected[0][:3])  # lazy
+        results = [expected[0]] + list(results)
+        self.assertEqual(len(results), 7)  # broadcast is nulldata and blob
+        self.assertEqual([r[:5] for r in results],
+                         [r[:5] for r in expected])
+
+    def test_max_message_size(self):
+        results = list(scanner.scan_file(self.path_b, testnet=True,
+                                         kinds=[scanner.BROADCAST],
+                                         max_message_size=1))
+        self.assertEqual(results, [])
+        results = scanner.scan_files([self.path_b], testnet=True,
+                                     kinds=[scanner.BROADCAST],
+                                     max_message_size=1)
+        self.assertEqual(list(results), [])
+
+    def test_wrong_magic(self):
+        results = list(scanner.scan_file(self.path_a, testnet=False))
+        self.assertEqual(results, [])
+
+    def test_stop_early(self):
+        results = scanner.scan_file(self.path_a, testnet=True)
+        next(results)
+        results.close()  # releases the mmap
+
+
+if __name__ == '__main__':
+    unittest.main()
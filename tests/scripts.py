@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import struct
+import random
+import binascii
+import unittest
+from pycoin.tx import Tx
+from pycoin.tx import TxOut
+from pycoin.tx.script import tools
+from btctxstore import scripts
+from btctxstore import control
+from btctxstore import deserialize
+
+
+class TestScripts(unittest.TestCase):
+
+    def test_get_push_data(self):
+        for size in [0, 1, 20, 75, 76, 255, 256, 70000]:
+            data = os.urandom(size)
+            script = tools.bin_script([data])
+            result, pc = scripts.get_push_data(script, 0)
+            self.assertEqual(result, data)
+            self.assertEqual(pc, len(script))
+
+    def test_get_push_data_truncated(self):
+        script = tools.bin_script([os.urandom(30)])[:-1]
+        self.assertRaises(ValueError, scripts.get_push_data, script, 0)
+
+    def test_nulldata(self):
+        for data in [b"", b"\x05", b"\xf4\x83", os.urandom(40)]:
+            script = tools.compile("OP_RETURN")
+            if data:
+                script += tools.bin_script([data])
+            self.assertTrue(scripts.is_nulldata(script))
+            self.assertEqual(scripts.get_nulldata(script), data)
+        p2pkh = tools.compile("OP_DUP OP_HASH160 [%s] OP_EQUALVERIFY "
+                              "OP_CHECKSIG" % ("ab" * 20))
+        self.assertFalse(scripts.is_nulldata(p2pkh))
+        self.assertTrue(scripts.is_p2pkh(p2pkh))
+        self.assertFalse(scripts.is_nulldata(b""))
+
+    def test_find_data_outputs(self):
+        data = os.urandom(100)
+        tx = Tx(1, [], [TxOut(1000, b"\x51")])
+        control.add_data_blob(tx, data)
+        data_outputs = len(tx.txs_out) - 2
+        p2pkh = tx.txs_out[-1].script
+        tx.txs_out.append(TxOut(1000, b"\x51"))  # ends the data outputs
+        tx.txs_out.append(TxOut(1000, p2pkh))
+        index, nulldata, hash160datas = scripts.find_data_outputs(tx)
+        self.assertEqual(index, 1)
+        self.assertEqual(len(hash160datas), data_outputs)
+        self.assertEqual(control.get_data_blob(tx), data)
+
+    def test_find_data_outputs_none(self):
+        tx = Tx(1, [], [TxOut(1000, b"\x51")])
+        self.assertEqual(scripts.find_data_outputs(tx), (None, None, []))
+
+
+class TestTemplates(unittest.TestCase):
+
+    def _compile_safe(self, data):
+        # tools.compile int-encodes all digit hex not starting with 0
+        hexdata = binascii.hexlify(data).decode("ascii")
+        return not hexdata.isdigit() or hexdata.startswith("0")
+
+    def test_push_data(self):
+        for size in [0, 1, 2, 75, 76, 255, 256, 65535, 65536]:
+            data = os.urandom(size)
+            self.assertEqual(scripts.push_data(data),
+                             tools.bin_script([data]))
+        for value in range(256):
+            data = struct.pack("B", value)
+            self.assertEqual(scripts.push_data(data),
+                             tools.bin_script([data]))
+
+    def test_p2pkh_script(self):
+        rand = random.Random(0)
+        for i in range(100):
+            hash160 = bytes(bytearray(rand.getrandbits(8) for j in range(20)))
+            if not self._compile_safe(hash160):
+                continue
+            expected = tools.compile(
+                "OP_DUP OP_HASH160 %s OP_EQUALVERIFY OP_CHECKSIG" %
+                binascii.hexlify(hash160).decode("ascii")
+            )
+            self.assertEqual(scripts.p2pkh_script(hash160), expected)
+
+    def test_nulldata_script(self):
+        rand = random.Random(1)
+        for size in range(41):
+            data = bytes(bytearray(rand.getrandbits(8) for j in range(size)))
+            if not self._compile_safe(data):
+                continue
+            expected = tools.compile(
+                "OP_RETURN %s" % binascii.hexlify(data).decode("ascii")
+            )
+            self.assertEqual(scripts.nulldata_script(data), expected)
+
+    def test_txouts_byte_identical(self):
+        address = "n3mW3o8XNMyH6xHWBkN98rm7zxxxswzpGM"
+        hash160 = "f4131906b10615a61af347c56f1223ddc214f95c"
+        script = "OP_DUP OP_HASH160 %s OP_EQUALVERIFY OP_CHECKSIG"
+        txout = deserialize.txout(True, address, 1000)
+        self.assertEqual(txout.script, tools.compile(script % hash160))
+        txout = deserialize.hash160data_txout(hash160)
+        self.assertEqual(txout.script, tools.compile(script % hash160))
+        txout = deserialize.nulldata_txout("f483")
+        self.assertEqual(txout.script, tools.compile("OP_RETURN f483"))
+
+    def test_all_digit_data(self):
+        data = binascii.unhexlify("1234")  # compile would int-encode this
+        txout = deserialize.nulldata_txout("1234")
+        self.assertEqual(scripts.get_nulldata(txout.script), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import binascii
+import unittest
+import pycoin
+from pycoin.tx import TxOut
+from pycoin.serialize import h2b
+from pycoin.encoding import double_sha256
+from pycoin.encoding import from_bytes_32
+from btctxstore import sighash
+from . import helpers
+
+
+SCRIPT = h2b("76a914f4131906b10615a61af347c56f1223ddc214f95c88ac")
+
+
+def make_tx(inputs, outputs):
+    txouts = [TxOut(1000 * i, SCRIPT) for i in range(outputs)]
+    return helpers.make_tx(inputs=inputs, txouts=txouts,
+                           script_sig=b"\x01\x02", lock_time=42)
+
+
+class TestSighashEngine(unittest.TestCase):
+
+    def test_digest(self):
+        for inputs, outputs in [(1, 1), (3, 2), (20, 0)]:
+            tx = make_tx(inputs, outputs)
+            engine = sighash.SighashEngine(tx)
+            for index in range(inputs):
+                expected = tx.signature_hash(SCRIPT, index,
+                                             pycoin.tx.SIGHASH_ALL)
+                self.assertEqual(engine.digest(index, SCRIPT), expected)
+
+    def test_preimage(self):
+        tx = make_tx(5, 3)
+        engine = sighash.SighashEngine(tx)
+        for index in range(5):
+            preimage = engine.preimage(index, SCRIPT)
+            self.assertEqual(from_bytes_32(double_sha256(preimage)),
+                             engine.digest(index, SCRIPT))
+
+    def test_codeseparator(self):
+        tx = make_tx(2, 1)
+        script = binascii.unhexlify("ab") + SCRIPT
+        engine = sighash.SighashEngine(tx)
+        expected = tx.signature_hash(script, 1, pycoin.tx.SIGHASH_ALL)
+        self.assertEqual(engine.digest(1, script), expected)
+
+    def test_other_hashtypes(self):
+        tx = make_tx(3, 3)
+        engine = sighash.SighashEngine(tx)
+        for hash_type in [pycoin.tx.SIGHASH_NONE, pycoin.tx.SIGHASH_SINGLE]:
+            expected = tx.signature_hash(SCRIPT, 1, hash_type)
+            self.assertEqual(engine.digest(1, SCRIPT, hash_type), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
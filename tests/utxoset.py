@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# coding: utf-8
+# Copyright (c) 2015 Fabian Barkhau <fabian.barkhau@gmail.com>
+# License: MIT (see LICENSE file)
+
+
+from __future__ import print_function
+from __future__ import unicode_literals
+import os
+import unittest
+from pycoin.tx.Spendable import Spendable
+from pycoin.serialize import h2b
+from btctxstore import control
+from btctxstore import utxoset
+from btctxstore import serialize
+from btctxstore.services import interface
+from . import helpers
+
+
+SCRIPT_A = h2b("76a914f4131906b10615a61af347c56f1223ddc214f95c88ac")
+SCRIPT_B = h2b("76a914000000000000000000000000000000000000000088ac")
+
+
+def make_spendables(values):
+    return [Spendable(value, SCRIPT_A if i % 3 else SCRIPT_B,
+                      os.urandom(32), i)
+            for i, value in enumerate(values)]
+
+
+class TestUtxoSet(unittest.TestCase):
+
+    def setUp(self):
+        self.spendables = make_spendables([5, 3, 9, 1, 7, 3])
+        self.utxos = utxoset.UtxoSet(self.spendables)
+
+    def assertSpendablesEqual(self, a, b):
+        self.assertEqual(serialize.utxos(a), serialize.utxos(b))
+
+    def test_roundtrip(self):
+        self.assertEqual(len(self.utxos), 6)
+        self.assertSpendablesEqual(list(self.utxos), self.spendables)
+        self.assertEqual(list(self.utxos.dicts()),
+                         serialize.utxos(self.spendables))
+        self.assertEqual(self.utxos.total(), 28)
+
+    def test_interned_scripts(self):
+        self.assertEqual(len(self.utxos.scripts), 2)
+        self.assertIs(self.utxos.script(1), self.utxos.script(2))
+
+    def test_indexing(self):
+        self.assertSpendablesEqual([self.utxos[2]], [self.spendables[2]])
+        self.assertSpendablesEqual([self.utxos[-1]], [self.spendables[-1]])
+        self.assertRaises(IndexError, self.utxos.__getitem__, 6)
+
+    def test_slicing(self):
+        for key in [slice(1, 4), slice(None, None, 2), slice(4, 0, -1)]:
+            sliced = self.utxos[key]
+            self.assertIsInstance(sliced, utxoset.UtxoSet)
+            self.assertSpendablesEqual(list(sliced), self.spendables[key])
+
+    def test_sorted(self):
+        expected = sorted(self.spendables, key=lambda s: s.coin_value,
+                          reverse=True)
+        result = self.utxos.sorted(reverse=True)
+        self.assertSpendablesEqual(list(result), expected)
+        self.assertEqual(list(self.utxos.sorted().values), [1, 3, 3, 5, 7, 9])
+
+    def test_sort(self):
+        expected = self.utxos.sorted(reverse=True)
+        self.utxos.sort(reverse=True)
+        self.assertSpendablesEqual(list(self.utxos), list(expected))
+        self.assertIsInstance(self.utxos.txids, bytearray)
+
+    def test_select(self):
+        positions = self.utxos.select(lambda value: value > 4)
+        self.assertEqual(list(positions), [0, 2, 4])
+        taken = self.utxos.take(positions)
+        self.assertSpendablesEqual(list(taken), [self.spendables[0],
+                                                 self.spendables[2],
+                                                 self.spendables[4]])
+
+    def test_without(self):
+        rest = self.utxos.without([4, 0, 2])
+        self.assertSpendablesEqual(list(rest), [self.spendables[1],
+                                                self.spendables[3],
+                                                self.spendables[5]])
+        self.assertSpendablesEqual(list(self.utxos.without([])),
+                                   self.spendables)
+
+    def test_insert_and_find(self):
+        new = make_spendables([4])[0]
+        self.utxos.insert(2, new.tx_hash, 8, new.coin_value, SCRIPT_B)
+        self.assertSpendablesEqual(
+            list(self.utxos),
+            self.spendables[:2] + [Spendable(4, SCRIPT_B, new.tx_hash, 8)] +
+            self.spendables[2:]
+        )
+        self.assertEqual(len(self.utxos.scripts), 2)
+        self.assertEqual(self.utxos.find(new.tx_hash, 8), 2)
+        self.assertEqual(self.utxos.find(self.spendables[5].tx_hash, 5), 6)
+        self.assertIsNone(self.utxos.find(new.tx_hash, 0))
+        self.assertIsNone(self.utxos.find(b"\0" * 32, 0))
+        self.assertRaises(ValueError, self.utxos.insert, 0, b"\0", 0, 1,
+                          SCRIPT_A)
+
+    def test_invalid_txid(self):
+        self.assertRaises(ValueError, self.utxos.append, b"\0", 0, 1,
+                          SCRIPT_A)
+
+    def test_retrieve_utxoset(self):
+        service = helpers.Service(self.spendables)
+        result = control.retrieve_utxoset(service, [])
+        expected = control.retrieve_utxos(service, [])
+        self.assertSpendablesEqual(list(result), expected)
+
+    def test_retrieve_utxoset_from_tuples(self):
+        spendables = self.spendables
+
+        class Service(interface.BlockchainService):
+
+            def spendables_for_address(self, bitcoin_address):
+                return spendables[:3] if bitcoin_address == "a" else \
+                    spendables[3:]
+
+        service = Service()
+        result = control.retrieve_utxoset(service, ["a", "b"])
+        expected = control.retrieve_utxos(service, ["a", "b"])
+        self.assertSpendablesEqual(list(result), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()